@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark des extracteurs de parser_v2.py sur des démos synthétiques.
+
+Chaque scénario génère une démo avec fake_demoparser.FakeDemoParser (graine
+fixe), la parse avec parser_v2 et relève parsingStats.timings par étape:
+durée (meilleure des répétitions) puis, sur une passe supplémentaire non
+chronométrée sous tracemalloc, le pic de mémoire allouée (Python et numpy)
+de chaque étape. Pour chaque étape, l'exposant de croissance de la durée et
+de la mémoire entre le plus petit et le plus grand scénario est estimé:
+~1 = linéaire, >1.5 = croissance quadratique suspecte.
+
+Fonctionne sans demoparser2 ni fichier .dem (utilisable en CI).
+
+Usage:
+    python benchmark_v2.py                        # scénarios par défaut
+    python benchmark_v2.py --repeat 3 --json bench.json
+    python benchmark_v2.py --sections kills,trades --max-exponent 1.5
+    python benchmark_v2.py --extract-workers 4    # extraction parallèle
+"""
+
+import sys
+import json
+import math
+import time
+import types
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_demoparser import FakeDemoParser
+
+# parser_v2 importe demoparser2 au premier parsing: le module synthétique suffit ici
+try:
+    import demoparser2  # noqa: F401
+except ImportError:
+    sys.modules["demoparser2"] = types.SimpleNamespace(DemoParser=FakeDemoParser)
+
+import parser_v2
+
+
+# Scénarios: de la démo courte au match en prolongations à 128 ticks
+SCENARIOS = {
+    "short": dict(rounds=8, tickrate=64, fires_per_second=1.0),
+    "half": dict(rounds=12, tickrate=64, fires_per_second=1.5),
+    "regulation": dict(rounds=24, tickrate=64, fires_per_second=1.5),
+    "overtime": dict(rounds=24, overtime_periods=2, tickrate=64, fires_per_second=1.5),
+    "overtime-128": dict(rounds=24, overtime_periods=3, tickrate=128, fires_per_second=2.0),
+}
+
+
+def run_scenario(name: str, params: Dict, config: parser_v2.ParserConfig, repeat: int, seed: int) -> Dict:
+    """
+    Parse une démo synthétique: meilleure durée par étape sur repeat passes,
+    puis pics de mémoire par étape sur une passe sous tracemalloc (qui ralentit
+    l'exécution, d'où une passe à part).
+    """
+    fake = FakeDemoParser(seed=seed, **params)
+    parser_v2.DemoParser = lambda demo_path: fake
+
+    best: Dict[str, Dict[str, float]] = {}
+    total_best = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = parser_v2.parse_demo(f"{name}.dem", config)
+        total = (time.perf_counter() - started_at) * 1000
+
+        total_best = total if total_best is None else min(total_best, total)
+        for step, timing in result["parsingStats"]["timings"].items():
+            if step not in best or timing["wallMs"] < best[step]["wallMs"]:
+                best[step] = timing
+
+    # Pic global via Timings: les étapes de parse_demo réinitialisent le pic de tracemalloc
+    overall = parser_v2.Timings()
+    tracemalloc.start()
+    try:
+        with overall.measure("total"):
+            result = parser_v2.parse_demo(f"{name}.dem", config)
+    finally:
+        tracemalloc.stop()
+    memory = {step: timing["peakAllocKb"] for step, timing in result["parsingStats"]["timings"].items()}
+
+    stats = {key: value for key, value in result["parsingStats"].items() if key != "timings"}
+    return {
+        "scenario": name,
+        "params": params,
+        "ticks": fake.total_ticks,
+        "rounds": fake.total_rounds,
+        "events": sum(len(rows) for rows in fake.events.values()),
+        "counts": stats,
+        "totalMs": round(total_best, 3),
+        "totalPeakAllocKb": overall.steps["total"]["peakAllocKb"],
+        "timings": best,
+        "peakAllocKb": memory,
+    }
+
+
+def wall_ms(result: Dict, step: str) -> float:
+    return result["timings"].get(step, {}).get("wallMs", 0)
+
+
+def peak_kb(result: Dict, step: str) -> float:
+    return result["peakAllocKb"].get(step, 0)
+
+
+def growth_exponent(small: Dict, large: Dict, step: str, measure: Callable[[Dict, str], float] = wall_ms) -> float:
+    """Exposant k tel que mesure ∝ taille^k (taille = nombre d'événements)."""
+    small_value = measure(small, step)
+    large_value = measure(large, step)
+    if small_value < 1 or large_value < 1 or large["events"] <= small["events"]:
+        return float("nan")
+    return math.log(large_value / small_value) / math.log(large["events"] / small["events"])
+
+
+def print_report(results: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """
+    Affiche le tableau étape × scénario (durée, pic de mémoire allouée) et
+    retourne les exposants de croissance {"wallMs": ..., "peakAllocKb": ...}.
+    """
+    steps = list(dict.fromkeys(step for result in results for step in result["timings"]))
+    width = max(len(step) for step in steps + ["step"])
+
+    header = f"{'step':<{width}}" + "".join(f"{r['scenario']:>27}" for r in results) + f"{'exp. time':>11}{'exp. mem':>10}"
+    print(header)
+    print("-" * len(header))
+
+    exponents = {"wallMs": {}, "peakAllocKb": {}}
+    for step in steps:
+        time_exponent = growth_exponent(results[0], results[-1], step, wall_ms)
+        memory_exponent = growth_exponent(results[0], results[-1], step, peak_kb)
+        exponents["wallMs"][step] = time_exponent
+        exponents["peakAllocKb"][step] = memory_exponent
+        cells = "".join(
+            f"{wall_ms(result, step):>12.1f}ms{peak_kb(result, step) / 1024:>10.1f}MiB" for result in results
+        )
+        print(f"{step:<{width}}{cells}{time_exponent:>11.2f}{memory_exponent:>10.2f}")
+
+    print("-" * len(header))
+    print(f"{'total':<{width}}" + "".join(
+        f"{r['totalMs']:>12.1f}ms{r['totalPeakAllocKb'] / 1024:>10.1f}MiB" for r in results
+    ))
+    print(f"{'events':<{width}}" + "".join(f"{r['events']:>27}" for r in results))
+    print(f"{'ticks':<{width}}" + "".join(f"{r['ticks']:>27}" for r in results))
+
+    return exponents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des extracteurs parser_v2 (démos synthétiques)")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Scénarios à exécuter, du plus petit au plus grand (défaut: {','.join(SCENARIOS)})"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Répétitions par scénario (meilleure mesure)")
+    parser.add_argument("--seed", type=int, default=1, help="Graine du générateur")
+    parser.add_argument("--sections", help="Sections à extraire (défaut: toutes)")
+    parser.add_argument("--no-weapon-fires", action="store_true", help="Désactiver les tirs")
+    parser.add_argument("--no-positions", action="store_true", help="Désactiver les positions")
+    parser.add_argument(
+        "--position-sampling",
+        choices=parser_v2.POSITION_SAMPLING_MODES,
+        default="uniform",
+        help="Échantillonnage des positions"
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=1,
+        help="Threads d'extraction par démo (1 = séquentiel, 0 = nombre de cœurs)"
+    )
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    parser.add_argument(
+        "--max-exponent",
+        type=float,
+        help="Code de sortie 1 si la durée ou la mémoire d'une étape croît plus vite que taille^N"
+    )
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Scénarios inconnus: {', '.join(unknown)}")
+
+    config = parser_v2.ParserConfig(
+        extract_weapon_fires=not args.no_weapon_fires,
+        extract_positions=not args.no_positions,
+        position_sampling=args.position_sampling,
+        sections=args.sections.split(",") if args.sections else None,
+        extract_workers=args.extract_workers,
+    )
+
+    results = []
+    for name in names:
+        print(f"→ {name}", file=sys.stderr)
+        results.append(run_scenario(name, SCENARIOS[name], config, args.repeat, args.seed))
+
+    exponents = print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"results": results, "exponents": exponents}, f, indent=2)
+
+    if args.max_exponent is not None and len(results) > 1:
+        too_steep = {
+            f"{step} ({metric})": k
+            for metric, by_step in exponents.items()
+            for step, k in by_step.items()
+            if k == k and k > args.max_exponent
+        }
+        if too_steep:
+            print(f"\nCroissance au-delà de taille^{args.max_exponent}: "
+                  + ", ".join(f"{step} ({k:.2f})" for step, k in too_steep.items()))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
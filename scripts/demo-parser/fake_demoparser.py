@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+DemoParser synthétique pour benchmarks et tests sans fichier .dem.
+
+Reproduit l'API de demoparser2.DemoParser utilisée par parser_v2.py
+(parse_header, parse_convars, parse_event, parse_events, parse_ticks) avec des
+DataFrames réalistes générés depuis une graine:
+
+- rounds avec freeze time, fin de round, changement de camp à la mi-temps
+  et prolongations (MR3 par période)
+- morts cohérentes (une victime ne meurt qu'une fois par round, l'attaquant
+  est vivant et adverse), dégâts avant chaque mort, tirs, grenades, flashs,
+  bombe, achats pendant le freeze time
+- états joueur par tick: position continue avec phases immobiles, vitesse
+  dérivée, santé et vie cohérentes avec les morts, équipe selon le camp
+
+Usage:
+    from fake_demoparser import FakeDemoParser
+    parser = FakeDemoParser(rounds=24, players=10, tickrate=64, fires_per_second=1.5, seed=1)
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Armes telles que nommées dans les événements demoparser2
+EVENT_WEAPONS = [
+    "ak47", "m4a1", "m4a1_silencer", "awp", "galilar", "famas", "sg556", "aug",
+    "mp9", "mac10", "ump45", "glock", "usp_silencer", "hkp2000", "p250", "deagle",
+    "tec9", "fiveseven", "nova", "xm1014", "knife",
+]
+
+# Armes telles que nommées par la prop active_weapon
+ACTIVE_WEAPONS = [
+    "AK-47", "M4A4", "M4A1-S", "AWP", "Galil AR", "FAMAS", "MP9", "MAC-10",
+    "Glock-18", "USP-S", "P2000", "Desert Eagle", "knife", "Flashbang",
+]
+
+PURCHASE_ITEMS = ["ak47", "m4a1", "awp", "mp9", "vest", "vesthelm", "flashbang", "smokegrenade", "hegrenade", "defuser"]
+
+HITGROUPS = ["head", "chest", "stomach", "leftarm", "rightarm", "leftleg", "rightleg", "neck", "generic"]
+
+ROUND_END_REASONS = {
+    "T": ["ct_killed", "bomb_exploded"],
+    "CT": ["t_killed", "bomb_defused", "time_expired"],
+}
+
+GRENADE_EVENT_NAMES = [
+    "flashbang_detonate", "smokegrenade_detonate", "hegrenade_detonate",
+    "inferno_startburn", "decoy_started",
+]
+
+TEAM_T = 2
+TEAM_CT = 3
+
+STEAMID_BASE = 76561198000000000
+
+
+class FakeDemoParser:
+    """
+    Stand-in déterministe de demoparser2.DemoParser.
+
+    Paramètres:
+    - rounds: rounds réglementaires (la mi-temps tombe à rounds // 2)
+    - overtime_periods: périodes de prolongation de 6 rounds ajoutées
+    - players: nombre de joueurs (répartis en deux équipes)
+    - tickrate: ticks par seconde
+    - fires_per_second: tirs par joueur vivant et par seconde de round live
+    - seed: graine du générateur (même graine = mêmes DataFrames)
+    """
+
+    def __init__(
+        self,
+        demo_path: str = "fake.dem",
+        rounds: int = 24,
+        overtime_periods: int = 0,
+        players: int = 10,
+        tickrate: int = 64,
+        fires_per_second: float = 1.5,
+        seed: int = 1,
+        map_name: str = "de_mirage",
+    ):
+        self.demo_path = demo_path
+        self.tickrate = tickrate
+        self.map_name = map_name
+        self.player_count = players
+        self.fires_per_second = fires_per_second
+        self.total_rounds = rounds + 6 * overtime_periods
+        self.rng = np.random.default_rng(seed)
+
+        self.steamids = np.array([STEAMID_BASE + 7919 * (i + 1) for i in range(players)], dtype=np.uint64)
+        self.names = [f"player_{i + 1}" for i in range(players)]
+        # Équipe de départ: première moitié T, seconde moitié CT
+        self.start_teams = np.array([TEAM_T if i < players // 2 else TEAM_CT for i in range(players)])
+
+        self.events: Dict[str, List[Dict]] = {}
+        self._generate(rounds)
+
+    # -------------------------------------------------------------------------
+    # Génération
+    # -------------------------------------------------------------------------
+
+    def _sides_swapped(self, round_number: int, regulation: int) -> bool:
+        """Camps inversés pour ce round (mi-temps, puis chaque demi-prolongation)."""
+        if round_number <= regulation:
+            return round_number > regulation // 2
+        overtime_round = round_number - regulation - 1
+        # Mi-temps à chaque demi-période de 3 rounds, en partant du camp de fin de match
+        return (overtime_round // 3) % 2 == 0
+
+    def _emit(self, event_name: str, **fields) -> None:
+        self.events.setdefault(event_name, []).append(fields)
+
+    def _player(self, index: int, prefix: str = "user") -> Dict:
+        return {
+            f"{prefix}_steamid": str(self.steamids[index]),
+            f"{prefix}_name": self.names[index],
+        }
+
+    def _generate(self, regulation: int) -> None:
+        rng = self.rng
+        tickrate = self.tickrate
+        players = self.player_count
+
+        # Bornes de rounds et morts par (round, joueur) pour les états par tick
+        self.round_start_ticks: List[int] = []
+        self.round_freeze_end_ticks: List[int] = []
+        self.round_end_ticks: List[int] = []
+        self.round_swapped: List[bool] = []
+        self.death_ticks = np.full((self.total_rounds, players), np.iinfo(np.int64).max, dtype=np.int64)
+
+        # Warmup avant le premier round
+        tick = int(rng.integers(20, 60)) * tickrate
+
+        for round_offset in range(self.total_rounds):
+            round_number = round_offset + 1
+            swapped = self._sides_swapped(round_number, regulation)
+            teams = self._teams(swapped)
+
+            start = tick
+            freeze_end = start + 15 * tickrate
+            live_seconds = int(rng.integers(25, 115))
+            end = freeze_end + live_seconds * tickrate
+
+            self.round_start_ticks.append(start)
+            self.round_freeze_end_ticks.append(freeze_end)
+            self.round_end_ticks.append(end)
+            self.round_swapped.append(swapped)
+
+            self._emit("round_start", tick=start, timelimit=115)
+            self._emit("round_freeze_end", tick=freeze_end)
+
+            # Achats pendant le freeze time
+            for p in range(players):
+                for _ in range(int(rng.integers(0, 4))):
+                    self._emit(
+                        "item_purchase",
+                        tick=int(rng.integers(start, freeze_end)),
+                        **self._player(p),
+                        weapon=str(rng.choice(PURCHASE_ITEMS)),
+                        team=int(teams[p]),
+                        cost=int(rng.choice([200, 300, 650, 1000, 2700, 3100, 4750])),
+                    )
+
+            winner = self._generate_kills(round_offset, teams, freeze_end, end)
+            self._generate_fires(round_offset, freeze_end, end)
+            self._generate_grenades(teams, freeze_end, end)
+            self._generate_bomb(teams, freeze_end, end, winner)
+
+            self._emit(
+                "round_end",
+                tick=end,
+                round=round_number,
+                winner=winner,
+                reason=str(rng.choice(ROUND_END_REASONS[winner])),
+            )
+
+            # Temps entre rounds (plus long à la mi-temps)
+            tick = end + (20 if round_number == regulation // 2 else 7) * tickrate
+
+        self.total_ticks = tick
+
+    def _teams(self, swapped: bool) -> np.ndarray:
+        if not swapped:
+            return self.start_teams
+        return np.where(self.start_teams == TEAM_T, TEAM_CT, TEAM_T)
+
+    def _generate_kills(self, round_offset: int, teams: np.ndarray, freeze_end: int, end: int) -> str:
+        """Morts du round; retourne le camp gagnant."""
+        rng = self.rng
+        alive = set(range(self.player_count))
+        kill_count = int(rng.integers(3, self.player_count))
+        kill_ticks = np.sort(rng.integers(freeze_end + 5 * self.tickrate, end, size=kill_count))
+
+        for kill_tick in kill_ticks:
+            kill_tick = int(kill_tick)
+            candidates = sorted(alive)
+            attacker = int(rng.choice(candidates))
+            enemies = [p for p in candidates if teams[p] != teams[attacker]]
+            if not enemies:
+                break
+
+            victim = int(rng.choice(enemies))
+            alive.discard(victim)
+            self.death_ticks[round_offset, victim] = kill_tick
+            weapon = str(rng.choice(EVENT_WEAPONS))
+
+            # Dégâts précédant la mort (le dernier est fatal)
+            hits = int(rng.integers(1, 4))
+            health = 100
+            for hit in range(hits):
+                fatal = hit == hits - 1
+                damage = health if fatal else int(rng.integers(5, max(6, health - 1)))
+                health -= damage
+                self._emit(
+                    "player_hurt",
+                    tick=kill_tick - (0 if fatal else int(rng.integers(1, 3 * self.tickrate))),
+                    **self._player(attacker, "attacker"),
+                    **self._player(victim),
+                    dmg_health=damage,
+                    dmg_armor=int(rng.integers(0, 30)),
+                    health=max(health, 0),
+                    armor=int(rng.integers(0, 100)),
+                    weapon=weapon,
+                    hitgroup=str(rng.choice(HITGROUPS)),
+                )
+
+            world = rng.random() < 0.02
+            assisted = rng.random() < 0.1
+            self._emit(
+                "player_death",
+                tick=kill_tick,
+                **({"attacker_steamid": None, "attacker_name": None} if world else self._player(attacker, "attacker")),
+                **self._player(victim),
+                weapon="world" if world else weapon,
+                headshot=bool(rng.random() < 0.45),
+                penetrated=int(rng.random() < 0.08),
+                attackerblind=bool(rng.random() < 0.04),
+                noscope=bool(weapon == "awp" and rng.random() < 0.1),
+                thrusmoke=bool(rng.random() < 0.05),
+                assistedflash=bool(assisted),
+                assister_steamid=None,
+            )
+
+        t_alive = any(teams[p] == TEAM_T for p in alive)
+        ct_alive = any(teams[p] == TEAM_CT for p in alive)
+        if t_alive and not ct_alive:
+            return "T"
+        if ct_alive and not t_alive:
+            return "CT"
+        return str(rng.choice(["T", "CT"]))
+
+    def _generate_fires(self, round_offset: int, freeze_end: int, end: int) -> None:
+        rng = self.rng
+        for p in range(self.player_count):
+            death = int(min(self.death_ticks[round_offset, p], end))
+            alive_seconds = max(0.0, (death - freeze_end) / self.tickrate)
+            shots = int(rng.poisson(self.fires_per_second * alive_seconds))
+            if shots == 0 or death <= freeze_end:
+                continue
+            # Tirs en rafales: quelques instants de contact, tirs groupés autour
+            bursts = rng.integers(freeze_end, death, size=max(1, shots // 6))
+            ticks = np.clip(
+                rng.choice(bursts, size=shots) + rng.integers(0, self.tickrate // 2, size=shots),
+                freeze_end, death,
+            )
+            weapon = str(rng.choice(EVENT_WEAPONS[:-1]))
+            silenced = weapon in ("m4a1_silencer", "usp_silencer")
+            for tick in np.sort(ticks):
+                self._emit("weapon_fire", tick=int(tick), **self._player(p), weapon=weapon, silenced=silenced)
+
+    def _generate_grenades(self, teams: np.ndarray, freeze_end: int, end: int) -> None:
+        rng = self.rng
+        for event_name in GRENADE_EVENT_NAMES:
+            for _ in range(int(rng.integers(0, 5))):
+                thrower = int(rng.integers(0, self.player_count))
+                tick = int(rng.integers(freeze_end, end))
+                entity_id = int(rng.integers(100, 2000))
+                self._emit(
+                    event_name,
+                    tick=tick,
+                    user_steamid=str(self.steamids[thrower]) if rng.random() > 0.05 else None,
+                    user_name=self.names[thrower],
+                    entityid=entity_id,
+                    x=float(rng.normal(0, 1200)),
+                    y=float(rng.normal(0, 1200)),
+                    z=float(rng.normal(0, 80)),
+                )
+                if event_name == "flashbang_detonate":
+                    for victim in rng.choice(self.player_count, size=int(rng.integers(0, 4)), replace=False):
+                        self._emit(
+                            "player_blind",
+                            tick=tick,
+                            **self._player(int(victim)),
+                            **self._player(thrower, "attacker"),
+                            blind_duration=float(rng.random() * 4.5),
+                            entityid=entity_id,
+                        )
+
+    def _generate_bomb(self, teams: np.ndarray, freeze_end: int, end: int, winner: str) -> None:
+        rng = self.rng
+        terrorists = [p for p in range(self.player_count) if teams[p] == TEAM_T]
+        cts = [p for p in range(self.player_count) if teams[p] == TEAM_CT]
+        carrier = int(rng.choice(terrorists))
+
+        self._emit("bomb_pickup", tick=freeze_end + 1, **self._player(carrier))
+        if rng.random() < 0.3:
+            self._emit("bomb_dropped", tick=int(rng.integers(freeze_end, end)), **self._player(carrier), entindex=int(rng.integers(100, 900)))
+
+        if rng.random() < 0.55:
+            site = int(rng.choice([300, 301]))
+            plant = int(rng.integers(freeze_end + 20 * self.tickrate, max(freeze_end + 20 * self.tickrate + 1, end - 5 * self.tickrate)))
+            self._emit("bomb_beginplant", tick=plant, **self._player(carrier), site=site)
+            if rng.random() < 0.1:
+                self._emit("bomb_abortplant", tick=plant + self.tickrate, **self._player(carrier), site=site)
+                return
+            self._emit("bomb_planted", tick=plant + 3 * self.tickrate, **self._player(carrier), site=site)
+
+            defuser = int(rng.choice(cts))
+            if winner == "CT":
+                has_kit = bool(rng.random() < 0.6)
+                self._emit("bomb_begindefuse", tick=plant + 8 * self.tickrate, **self._player(defuser), haskit=has_kit)
+                self._emit("bomb_defused", tick=plant + (13 if has_kit else 18) * self.tickrate, **self._player(defuser), site=site, haskit=has_kit)
+            else:
+                self._emit("bomb_exploded", tick=plant + 43 * self.tickrate, **self._player(carrier), site=site)
+
+    # -------------------------------------------------------------------------
+    # États par tick
+    # -------------------------------------------------------------------------
+
+    def _round_of_ticks(self, ticks: np.ndarray) -> np.ndarray:
+        """Index du round (0-based) de chaque tick, -1 hors rounds."""
+        starts = np.asarray(self.round_start_ticks)
+        ends = np.asarray(self.round_end_ticks)
+        index = np.searchsorted(starts, ticks, side="right") - 1
+        inside = (index >= 0) & (ticks <= ends[np.clip(index, 0, None)])
+        return np.where(inside, index, -1)
+
+    def _player_states(self, ticks: np.ndarray, players: np.ndarray) -> Dict[str, np.ndarray]:
+        """États vectorisés pour des paires (tick, joueur)."""
+        rounds = self._round_of_ticks(ticks)
+        in_round = rounds >= 0
+        safe_rounds = np.clip(rounds, 0, None)
+
+        death = self.death_ticks[safe_rounds, players]
+        alive = ~in_round | (ticks < death)
+
+        swapped = np.asarray(self.round_swapped)[safe_rounds] & in_round
+        start_team = self.start_teams[players]
+        team = np.where(swapped, np.where(start_team == TEAM_T, TEAM_CT, TEAM_T), start_team)
+
+        # Trajectoire: sinus écrêté → phases immobiles (plateaux) et déplacements
+        # en diagonale à vitesse de course (~250 unités/s au plus)
+        phase = players * 1.7
+        period = 400.0 * self.tickrate / 64
+        raw = np.sin(ticks / period + phase) * 1.6
+        moving = np.abs(raw) < 1.0
+        shape = np.clip(raw, -1.0, 1.0)
+        slope = np.where(moving, np.cos(ticks / period + phase) * 1.6 / period, 0.0)
+
+        amplitude = 900.0
+        base_x = (players - self.player_count / 2) * 150.0
+        base_y = np.where(team == TEAM_T, -1200.0, 1200.0)
+
+        x = base_x + amplitude * shape
+        y = base_y + 0.5 * amplitude * shape
+        z = np.where(moving, 8.0 * np.abs(np.sin(ticks / 11.0)), 0.0)
+
+        # Vitesse en unités/seconde (dérivée de la trajectoire)
+        vx = amplitude * slope * self.tickrate
+        vy = 0.5 * amplitude * slope * self.tickrate
+        vx = np.where(alive, vx, 0.0)
+        vy = np.where(alive, vy, 0.0)
+
+        health = np.where(alive, 100, 0)
+
+        return {
+            "X": x.astype(np.float32),
+            "Y": y.astype(np.float32),
+            "Z": z.astype(np.float32),
+            "velocity_X": vx.astype(np.float32),
+            "velocity_Y": vy.astype(np.float32),
+            "velocity_Z": np.zeros(len(ticks), dtype=np.float32),
+            "yaw": ((ticks * 0.7 + players * 40) % 360 - 180).astype(np.float32),
+            "pitch": (np.sin(ticks / 50.0 + players) * 20).astype(np.float32),
+            "health": health.astype(np.int32),
+            "armor_value": np.where(alive, 100, 0).astype(np.int32),
+            "has_helmet": alive & ((players % 3) != 0),
+            "has_defuser": (team == TEAM_CT) & ((players % 2) == 0),
+            "is_alive": alive,
+            "team_num": team.astype(np.int32),
+            "balance": ((safe_rounds * 1450 + players * 350) % 16000).astype(np.int32),
+            "equipment_value": np.where(alive, (players * 700 + safe_rounds * 300) % 6000, 0).astype(np.int32),
+            "cash_spent_this_round": ((players * 500 + safe_rounds * 250) % 5000).astype(np.int32),
+            "active_weapon": np.asarray(ACTIVE_WEAPONS, dtype=object)[(players + safe_rounds) % len(ACTIVE_WEAPONS)],
+            "is_scoped": alive & ~moving & ((players % 5) == 0),
+            "is_walking": alive & moving & ((ticks // 200 + players) % 4 == 0),
+            "in_crouch": alive & ~moving & ((ticks // 300 + players) % 3 == 0),
+            "is_airborne": alive & moving & (z > 6.0),
+            "shots_fired": ((ticks // 64 + players) % 30).astype(np.int32),
+        }
+
+    # -------------------------------------------------------------------------
+    # API demoparser2
+    # -------------------------------------------------------------------------
+
+    def parse_header(self) -> Dict[str, str]:
+        return {
+            "map_name": self.map_name,
+            "server_name": "Fake Server",
+            "demo_version_name": "valve_demo_2",
+            "demo_version": "2",
+            "network_protocol": "14030",
+            "playback_ticks": str(self.total_ticks),
+            "playback_time": str(self.total_ticks / self.tickrate),
+            "tickrate": str(self.tickrate),
+        }
+
+    def parse_convars(self) -> Dict[str, str]:
+        return {
+            "mp_maxrounds": str(self.total_rounds),
+            "sv_server_start_time": "1700000000",
+        }
+
+    def list_game_events(self) -> List[str]:
+        return sorted(name for name, rows in self.events.items() if rows) + ["round_end"]
+
+    def _event_frame(self, event_name: str, player: Optional[Sequence[str]]) -> pd.DataFrame:
+        if event_name not in self.events:
+            raise Exception(f"Event not found: {event_name}")
+
+        df = pd.DataFrame(self.events[event_name])
+        if "tick" in df.columns:
+            df = df.sort_values("tick", kind="stable").reset_index(drop=True)
+
+        # Props joueur demandées: colonnes <prefix>_<prop> au tick de l'événement
+        for prefix in ("user", "attacker"):
+            column = f"{prefix}_steamid"
+            if not player or column not in df.columns:
+                continue
+            lookup = {str(steamid): index for index, steamid in enumerate(self.steamids)}
+            indices = np.array([lookup.get(value, -1) for value in df[column]])
+            known = indices >= 0
+            states = self._player_states(df["tick"].to_numpy(dtype=np.int64)[known], indices[known])
+            for prop in player:
+                if prop in states:
+                    values = np.full(len(df), None, dtype=object)
+                    values[known] = states[prop]
+                    df[f"{prefix}_{prop}"] = values
+        return df
+
+    def parse_event(
+        self,
+        event_name: str,
+        *,
+        player: Optional[Sequence[str]] = None,
+        other: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        return self._event_frame(event_name, player)
+
+    def parse_events(
+        self,
+        event_name: Sequence[str],
+        *,
+        player: Optional[Sequence[str]] = None,
+        other: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, pd.DataFrame]]:
+        # Comme demoparser2: seuls les événements présents dans la démo sont retournés
+        return [
+            (name, self._event_frame(name, player))
+            for name in event_name
+            if self.events.get(name)
+        ]
+
+    def parse_ticks(
+        self,
+        wanted_props: Sequence[str],
+        *,
+        players: Optional[Sequence[int]] = None,
+        ticks: Optional[Sequence[int]] = None,
+        prop_states=None,
+    ) -> pd.DataFrame:
+        if ticks is None or len(ticks) == 0:
+            tick_values = np.arange(self.total_ticks, dtype=np.int64)
+        else:
+            tick_values = np.unique(np.asarray(ticks, dtype=np.int64))
+            tick_values = tick_values[(tick_values >= 0) & (tick_values < self.total_ticks)]
+
+        player_indices = np.arange(self.player_count)
+        if players:
+            wanted = {int(steamid) for steamid in players}
+            player_indices = np.array([i for i, steamid in enumerate(self.steamids) if int(steamid) in wanted], dtype=np.int64)
+
+        tick_column = np.repeat(tick_values, len(player_indices))
+        player_column = np.tile(player_indices, len(tick_values))
+        states = self._player_states(tick_column, player_column)
+
+        columns = {}
+        for prop in wanted_props:
+            if prop in ("steamid", "name", "tick"):
+                continue
+            if prop not in states:
+                raise Exception(f"Unknown prop: {prop}")
+            columns[prop] = states[prop]
+
+        df = pd.DataFrame(columns)
+        df["tick"] = tick_column.astype(np.int32)
+        df["steamid"] = self.steamids[player_column]
+        df["name"] = np.asarray(self.names, dtype=object)[player_column]
+        return df
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Génère golden/parser_v2_baseline.json: la sortie du parser_v2 historique
+(avant la refonte) sur une démo synthétique, pour les sections que la
+refonte ne doit pas modifier. test_parser_v2.py compare la sortie actuelle
+à ce fichier, champ par champ.
+
+Le parser historique est lu dans l'historique git (git show), importé à
+part et branché sur fake_demoparser.FakeDemoParser: aucune démo réelle ni
+demoparser2 nécessaire.
+
+Usage (depuis scripts/demo-parser):
+    python golden/make_baseline.py              # révision BASELINE_REVISION
+    python golden/make_baseline.py <révision>
+"""
+
+import sys
+import json
+import types
+import subprocess
+import importlib.util
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from fake_demoparser import FakeDemoParser
+
+# Dernière révision du parser_v2 d'origine
+BASELINE_REVISION = "9e5c1d8b3886463f9d678a1e88cebb3c46fb2004"
+
+# Démo courte: mi-temps, bombe, grenades, achats, quelques centaines de tirs
+SCENARIO = dict(rounds=4, tickrate=64, fires_per_second=0.1, seed=3)
+
+# Sections dont la sortie doit rester identique à l'octet près (positions,
+# clutches et trades ont changé volontairement, les autres sections sont nouvelles)
+SECTIONS = [
+    "metadata", "players", "rounds", "kills", "damages", "grenades", "playerBlinds",
+    "bombEvents", "economyByRound", "purchases", "weaponFires", "entryDuels",
+]
+
+OUTPUT_PATH = Path(__file__).resolve().parent / "parser_v2_baseline.json"
+
+
+def load_baseline(revision: str) -> types.ModuleType:
+    """Module parser_v2 de la révision donnée."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:scripts/demo-parser/parser_v2.py"],
+        cwd=SCRIPT_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+
+    # Le parser historique importe demoparser2 au chargement
+    try:
+        import demoparser2  # noqa: F401
+    except ImportError:
+        sys.modules["demoparser2"] = types.SimpleNamespace(DemoParser=FakeDemoParser)
+
+    spec = importlib.util.spec_from_loader("parser_v2_baseline", loader=None)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    exec(compile(source, f"parser_v2@{revision[:7]}", "exec"), module.__dict__)
+    return module
+
+
+def main():
+    revision = sys.argv[1] if len(sys.argv) > 1 else BASELINE_REVISION
+    baseline = load_baseline(revision)
+
+    fake = FakeDemoParser(**SCENARIO)
+    baseline.DemoParser = lambda demo_path: fake
+    result = baseline.parse_demo("fake.dem", baseline.ParserConfig())
+
+    golden = {
+        "revision": revision,
+        "scenario": SCENARIO,
+        "sections": {name: result[name] for name in SECTIONS},
+    }
+    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+    print(f"{OUTPUT_PATH.name}: {', '.join(f'{name}={len(result[name])}' for name in SECTIONS)}")
+
+
+if __name__ == "__main__":
+    main()
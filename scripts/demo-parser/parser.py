@@ -14,6 +14,12 @@ except ImportError:
     print(json.dumps({"success": False, "error": "demoparser2 not installed"}), file=sys.stderr)
     sys.exit(1)
 
+try:
+    import numpy as np
+except ImportError:
+    print(json.dumps({"success": False, "error": "numpy not installed"}), file=sys.stderr)
+    sys.exit(1)
+
 
 def parse_demo(demo_path: str) -> dict:
     """Parse un fichier .dem et extrait toutes les données pertinentes."""
@@ -22,16 +28,16 @@ def parse_demo(demo_path: str) -> dict:
 
     # Extract rounds first to determine round numbers for other events
     rounds = extract_rounds(parser)
-    round_ticks = [(r["tick"], r["roundNumber"]) for r in rounds]
+    round_index = RoundIndex(rounds)
 
     # Extraction des données
     result = {
         "metadata": extract_metadata(parser),
         "players": extract_players(parser),
         "rounds": rounds,
-        "kills": extract_kills(parser, round_ticks),
-        "damages": extract_damages(parser, round_ticks),
-        "grenades": extract_grenades(parser, round_ticks),
+        "kills": extract_kills(parser, round_index),
+        "damages": extract_damages(parser, round_index),
+        "grenades": extract_grenades(parser, round_index),
         "positions": [],  # Désactivé par défaut pour réduire la taille
         "economy": extract_economy(parser),
     }
@@ -39,18 +45,32 @@ def parse_demo(demo_path: str) -> dict:
     return result
 
 
-def get_round_for_tick(tick: int, round_ticks: list) -> int:
-    """Determine which round a tick belongs to based on round_end ticks."""
-    if not round_ticks:
-        return 1
+class RoundIndex:
+    """
+    Attribue un numéro de round à une colonne de ticks entière.
+
+    Recherche binaire sur les ticks de fin de round triés: un tick appartient
+    au premier round dont la fin est >= tick, et au round suivant le dernier
+    au-delà.
+    """
+
+    def __init__(self, rounds: list):
+        ordered = sorted(rounds, key=lambda r: r["tick"])
+        self.end_ticks = np.array([r["tick"] for r in ordered], dtype=np.int64)
+        self.round_numbers = np.array([r["roundNumber"] for r in ordered], dtype=np.int64)
 
-    current_round = 1
-    for round_end_tick, round_num in round_ticks:
-        if tick <= round_end_tick:
-            return round_num
-        current_round = round_num + 1
+    def assign(self, ticks) -> np.ndarray:
+        """Numéro de round de chaque tick d'une colonne."""
+        ticks = np.nan_to_num(np.asarray(ticks, dtype=np.float64)).astype(np.int64)
+        if len(self.end_ticks) == 0:
+            return np.ones(len(ticks), dtype=np.int64)
 
-    return current_round
+        idx = np.searchsorted(self.end_ticks, ticks, side="left")
+        return np.where(
+            idx < len(self.end_ticks),
+            self.round_numbers[np.minimum(idx, len(self.end_ticks) - 1)],
+            self.round_numbers[-1] + 1,
+        )
 
 
 def extract_metadata(parser: DemoParser) -> dict:
@@ -213,7 +233,7 @@ def get_position_from_row(row, prefix: str) -> dict:
     return {"x": x, "y": y, "z": z}
 
 
-def extract_kills(parser: DemoParser, round_ticks: list) -> list:
+def extract_kills(parser: DemoParser, round_index: RoundIndex) -> list:
     """Extrait tous les kills avec positions."""
     kills = []
 
@@ -251,9 +271,9 @@ def extract_kills(parser: DemoParser, round_ticks: list) -> list:
             print(f"Warning: Could not extract positions: {e}", file=sys.stderr)
 
         # Maintenant traiter chaque kill
-        for _, row in df.iterrows():
+        round_numbers = round_index.assign(df["tick"]).tolist()
+        for (_, row), round_num in zip(df.iterrows(), round_numbers):
             tick = int(row.get("tick", 0))
-            round_num = get_round_for_tick(tick, round_ticks)
 
             attacker_steamid = str(row.get("attacker_steamid", ""))
             victim_steamid = str(row.get("user_steamid", ""))
@@ -287,7 +307,7 @@ def extract_kills(parser: DemoParser, round_ticks: list) -> list:
     return kills
 
 
-def extract_damages(parser: DemoParser, round_ticks: list) -> list:
+def extract_damages(parser: DemoParser, round_index: RoundIndex) -> list:
     """Extrait tous les dégâts infligés."""
     damages = []
 
@@ -308,10 +328,10 @@ def extract_damages(parser: DemoParser, round_ticks: list) -> list:
     try:
         df = parser.parse_event("player_hurt")
         if df is not None and len(df) > 0:
-            for _, row in df.iterrows():
+            round_numbers = round_index.assign(df["tick"]).tolist()
+            for (_, row), round_num in zip(df.iterrows(), round_numbers):
                 try:
                     tick = int(row.get("tick", 0))
-                    round_num = get_round_for_tick(tick, round_ticks)
 
                     # Handle hitgroup - can be string or int in CS2
                     hitgroup = row.get("hitgroup", 0)
@@ -339,7 +359,7 @@ def extract_damages(parser: DemoParser, round_ticks: list) -> list:
     return damages
 
 
-def extract_grenades(parser: DemoParser, round_ticks: list) -> list:
+def extract_grenades(parser: DemoParser, round_index: RoundIndex) -> list:
     """Extrait l'utilisation des grenades."""
     events = []
 
@@ -354,9 +374,9 @@ def extract_grenades(parser: DemoParser, round_ticks: list) -> list:
         try:
             df = parser.parse_event(event_name)
             if df is not None and len(df) > 0:
-                for _, row in df.iterrows():
+                round_numbers = round_index.assign(df["tick"]).tolist()
+                for (_, row), round_num in zip(df.iterrows(), round_numbers):
                     tick = int(row.get("tick", 0))
-                    round_num = get_round_for_tick(tick, round_ticks)
 
                     events.append({
                         "type": grenade_type,
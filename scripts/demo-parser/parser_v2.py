@@ -10,27 +10,125 @@ Fonctionnalités:
 - Événements de grenades avec player_blind
 - Événements bombe (plant, defuse, drop, pickup)
 - Économie réelle par joueur par round
-- Positions continues échantillonnées
+- Positions continues échantillonnées sur tout le match (par fenêtres de rounds)
 - États joueurs détaillés (velocity, scope, crouch, etc.)
 - Achats détaillés
-
-Usage: python parser_v2.py <chemin_fichier.dem> <chemin_sortie.json> [--full-positions]
+- Métriques dérivées par fenêtres temporelles (trades, flash assists,
+  dégâts reçus avant la mort)
+
+Usage: python parser_v2.py <chemin_fichier.dem> <chemin_sortie.json>
+       python parser_v2.py <chemin_fichier.dem> --stream   (NDJSON sur stdout)
+       python parser_v2.py --serve [--socket <chemin>] [--max-jobs N]
+       python parser_v2.py --batch <dossier|manifeste> [--workers N]
+       python parser_v2.py <chemin_fichier.dem> <sortie.json> --sections kills,trades
+       python parser_v2.py <chemin_fichier.dem> <sortie.json> --profile   (cProfile + tracemalloc)
+       python parser_v2.py <chemin_fichier.dem> --stream --profile-out /tmp/profil
+       python parser_v2.py <chemin_fichier.dem> <sortie.json> --position-sampling adaptive
+       python parser_v2.py <chemin_fichier.dem> <sortie.json> --extract-workers 0   (extraction sur tous les cœurs)
+       python parser_v2.py --capabilities   (JSON: version, sections, formats, dépendances)
+       python parser_v2.py --capabilities --check-imports   (importe aussi les dépendances, avec leur durée)
 """
 
+from __future__ import annotations
+
+import os
 import sys
 import json
+import time
+import shutil
+import hashlib
 import argparse
+import threading
+import importlib
+import dataclasses
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Iterable, Callable, TextIO, Union
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
 
 try:
-    from demoparser2 import DemoParser
-    import pandas as pd
-except ImportError as e:
-    print(json.dumps({"success": False, "error": f"Missing dependency: {e}"}), file=sys.stderr)
-    sys.exit(1)
+    import resource
+except ImportError:  # Windows: pas de getrusage
+    resource = None
+
+# Début du chargement du module (startupMs de --capabilities)
+MODULE_STARTED_AT = time.perf_counter()
+
+
+# =============================================================================
+# DÉPENDANCES (IMPORTS DIFFÉRÉS)
+# =============================================================================
+
+# Durée d'import (ms) par module lourd, renseignée au premier accès
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+
+class LazyImport:
+    """
+    Module (ou attribut de module) importé au premier accès.
+
+    --help, --capabilities ou un chemin invalide répondent sans charger
+    pandas/numpy/demoparser2. Au premier accès, le nom global est remplacé
+    par l'objet réel: les appels suivants ne passent plus par le proxy. Un nom
+    déjà remplacé par ailleurs (ex: DemoParser synthétique) est conservé.
+    """
+
+    def __init__(self, alias: str, module: str, attribute: Optional[str] = None):
+        self.alias = alias
+        self.module = module
+        self.attribute = attribute
+        self.value = None
+
+    def load(self) -> Any:
+        if self.value is None:
+            started_at = time.perf_counter()
+            module = importlib.import_module(self.module)
+            IMPORT_TIMINGS[self.module] = round((time.perf_counter() - started_at) * 1000, 3)
+            self.value = getattr(module, self.attribute) if self.attribute else module
+        if globals().get(self.alias) is self:
+            globals()[self.alias] = self.value
+        return self.value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.load()(*args, **kwargs)
+
+
+np = LazyImport("np", "numpy")
+pd = LazyImport("pd", "pandas")
+DemoParser = LazyImport("DemoParser", "demoparser2", "DemoParser")
+
+LAZY_IMPORTS = [np, pd, DemoParser]
+
+# Distributions rapportées par --capabilities (sans les importer)
+DEPENDENCY_DISTRIBUTIONS = {"demoparser2": True, "numpy": True, "pandas": True, "pyarrow": False}
+
+
+def load_dependencies() -> None:
+    """Importe pandas, numpy et demoparser2 (sans effet s'ils le sont déjà)."""
+    try:
+        for lazy in LAZY_IMPORTS:
+            lazy.load()
+    except ImportError as e:
+        raise ImportError(f"Missing dependency: {e}") from e
+
+
+def dependency_versions() -> Dict[str, Optional[str]]:
+    """Versions installées des dépendances (métadonnées, aucun import), None si absente."""
+    from importlib import metadata
+
+    versions = {}
+    for name in DEPENDENCY_DISTRIBUTIONS:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
 
 
 # =============================================================================
@@ -43,18 +141,45 @@ class ParserConfig:
     # Échantillonnage positions (en ticks, 128 tick = 1 seconde)
     position_sample_rate: int = 64  # Toutes les 0.5 secondes
 
+    # Mode d'échantillonnage des positions (pendant les rounds uniquement):
+    # uniform = toutes les position_sample_rate ticks, adaptive = dense autour
+    # des contacts, épars quand un joueur est immobile
+    position_sampling: str = "uniform"
+
+    # Mode adaptive: écart toléré (unités de jeu) entre la position réelle et
+    # celle extrapolée depuis le dernier échantillon du joueur
+    position_error_threshold: float = 32.0
+
     # Activer/désactiver les extractions coûteuses
     extract_positions: bool = True
     extract_weapon_fires: bool = True
     extract_player_states: bool = True
 
-    # Limite de ticks pour les positions (éviter fichiers trop gros)
-    max_position_ticks: int = 50000  # ~6.5 minutes de jeu
+    # Format des sections volumineuses: json | columnar | arrow | parquet
+    output_format: str = "json"
+
+    # steamIds, noms et armes des lignes remplacés par des index dans une
+    # section stringTables
+    string_tables: bool = False
+
+    # Sections à produire (None = toutes), dépendances calculées automatiquement
+    sections: Optional[List[str]] = None
+
+    # Threads d'extraction d'une démo (1 = séquentiel, 0 = nombre de cœurs):
+    # extracteurs indépendants et fenêtres de ticks calculés en parallèle,
+    # document identique et dans le même ordre
+    extract_workers: int = 1
 
     # Props joueur à extraire
     player_props: List[str] = None
 
     def __post_init__(self):
+        if self.position_sampling not in POSITION_SAMPLING_MODES:
+            raise ValueError(f"Unknown position sampling: {self.position_sampling}")
+
+        if self.extract_workers < 0:
+            raise ValueError(f"Invalid extract_workers: {self.extract_workers}")
+
         if self.player_props is None:
             self.player_props = [
                 # Position et mouvement
@@ -86,6 +211,42 @@ class ParserConfig:
 # CONSTANTES
 # =============================================================================
 
+# Version du format de sortie
+PARSER_VERSION = "2.0"
+
+# Révision du contenu produit, dans la clé du cache (ParseCache): à
+# incrémenter à chaque changement de la sortie (valeurs, ordre, sections)
+# pour qu'un cache chaud ne serve pas d'anciens résultats après mise à jour.
+# 2: fenêtres temporelles (trades, flash assists, dégâts avant la mort),
+#    clutches/manAdvantage par machine à états, état de tous les tirs,
+#    positions sur tout le match, échantillonnage adaptive, format tracks
+OUTPUT_REVISION = 2
+
+# Nombre de lignes par chunk en mode --stream
+STREAM_CHUNK_ROWS = 5000
+
+# Formats de sortie (json = tableaux d'objets historiques)
+OUTPUT_FORMATS = ["json", "columnar", "arrow", "parquet", "tracks"]
+
+# Fenêtres des métriques dérivées (en secondes, converties avec le tickrate réel)
+TRADE_WINDOW_SECONDS = 3.0
+FLASH_ASSIST_WINDOW_SECONDS = 5.0
+DAMAGE_BEFORE_DEATH_SECONDS = 5.0
+
+# État joueur joint aux kills / tirs: à défaut du tick exact, tick antérieur
+# le plus proche du même joueur jusqu'à cette durée
+STATE_TOLERANCE_SECONDS = 0.25
+
+# Échantillonnage adaptatif des positions
+POSITION_SAMPLING_MODES = ["uniform", "adaptive"]
+ADAPTIVE_GRID_DIVISOR = 4  # Grille dense autour des contacts: position_sample_rate / 4
+ADAPTIVE_CONTACT_SECONDS = 1.5  # Fenêtre dense autour d'un kill ou de dégâts
+ADAPTIVE_MAX_GAP_SECONDS = 8.0  # Au moins un échantillon par joueur immobile
+
+# Cache des résultats (désactivé sans dossier)
+CACHE_DIR = os.environ.get("PARSER_CACHE_DIR")
+CACHE_MAX_MB = int(os.environ.get("PARSER_CACHE_MAX_MB", "5000"))
+
 # Mapping hitgroup CS2 string → int
 HITGROUP_MAP = {
     "generic": 0, "head": 1, "chest": 2, "stomach": 3,
@@ -96,6 +257,11 @@ HITGROUP_MAP = {
 # Mapping winner CS2
 WINNER_MAP = {"CT": 2, "ct": 2, "T": 3, "t": 3}
 
+# Équipes (team_num CS2) et correspondance avec rounds.winner (WINNER_MAP)
+TEAM_T = 2
+TEAM_CT = 3
+WINNER_TEAM_NUM = {2: TEAM_CT, 3: TEAM_T}
+
 # Mapping raison fin round
 REASON_MAP = {
     "t_killed": 9, "ct_killed": 8, "bomb_exploded": 1,
@@ -113,6 +279,28 @@ WEAPON_CATEGORIES = {
     "grenades": ["hegrenade", "flashbang", "smokegrenade", "molotov", "incgrenade", "decoy"],
 }
 
+# Événements grenades → type
+GRENADE_EVENTS = [
+    ("flashbang_detonate", "flash"),
+    ("smokegrenade_detonate", "smoke"),
+    ("hegrenade_detonate", "he"),
+    ("inferno_startburn", "molotov"),
+    ("decoy_started", "decoy"),
+]
+
+# Événements bombe → type
+BOMB_EVENTS = [
+    ("bomb_planted", "planted"),
+    ("bomb_defused", "defused"),
+    ("bomb_exploded", "exploded"),
+    ("bomb_dropped", "dropped"),
+    ("bomb_pickup", "pickup"),
+    ("bomb_beginplant", "beginplant"),
+    ("bomb_abortplant", "abortplant"),
+    ("bomb_begindefuse", "begindefuse"),
+    ("bomb_abortdefuse", "abortdefuse"),
+]
+
 
 # =============================================================================
 # FONCTIONS UTILITAIRES
@@ -156,20 +344,6 @@ def safe_bool(value: Any, default: bool = False) -> bool:
     return default
 
 
-def get_round_for_tick(tick: int, round_ticks: List[Tuple[int, int]]) -> int:
-    """Détermine le round pour un tick donné."""
-    if not round_ticks:
-        return 1
-
-    current_round = 1
-    for round_end_tick, round_num in round_ticks:
-        if tick <= round_end_tick:
-            return round_num
-        current_round = round_num + 1
-
-    return current_round
-
-
 def normalize_weapon(weapon: str) -> str:
     """Normalise le nom d'une arme."""
     weapon = safe_str(weapon).lower()
@@ -186,14 +360,1006 @@ def get_weapon_category(weapon: str) -> str:
     return "other"
 
 
+def normalize_hitgroup(hitgroup: Any) -> int:
+    """Convertit un hitgroup (string CS2 ou int) en int."""
+    if isinstance(hitgroup, str):
+        return HITGROUP_MAP.get(hitgroup.lower(), 0)
+    return safe_int(hitgroup)
+
+
+# =============================================================================
+# CONTEXTE DE DÉMO (ACCÈS MÉMORISÉS)
+# =============================================================================
+
+class DemoContext:
+    """
+    Enveloppe de DemoParser partagée par tous les extracteurs d'une démo.
+
+    Header, convars, événements (par nom et props joueur) et ticks décodés
+    sont calculés au premier accès puis réutilisés: aucun décodage n'est
+    refait pour la même démo. Une erreur est mémorisée comme un résultat.
+    stats compte, par type d'accès, les réponses depuis la mémoire (hits) et
+    les décodages réels (misses).
+
+    Les fenêtres de ticks lues au fil de l'eau (keep=False) ne sont pas
+    conservées, pour que la mémoire ne dépende pas de la longueur de la démo.
+    Ces lectures peuvent venir de plusieurs threads (ExtractionPool).
+    """
+
+    def __init__(self, parser: DemoParser):
+        self.parser = parser
+        self.cache: Dict[str, Dict[Any, Any]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        # Fenêtres de ticks décodées depuis plusieurs threads (extract_workers)
+        self.stats_lock = threading.Lock()
+
+    def record(self, kind: str, hit: bool) -> None:
+        with self.stats_lock:
+            counts = self.stats.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def memo(self, kind: str, key: Any, compute: Callable[[], Any], keep: bool = True) -> Any:
+        """Résultat mémorisé de compute() sous (kind, key); l'exception est relancée à chaque accès."""
+        cache = self.cache.setdefault(kind, {})
+        hit = key in cache
+        self.record(kind, hit)
+        if hit:
+            value = cache[key]
+        else:
+            try:
+                value = compute()
+            except Exception as e:
+                value = e
+            if keep:
+                cache[key] = value
+
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def header(self) -> Dict:
+        return self.memo("header", None, self.parser.parse_header)
+
+    def convars(self) -> Dict:
+        return self.memo("convars", None, self.parser.parse_convars)
+
+    def events(self, event_names: List[str], player: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        DataFrames des événements (colonnes texte catégorisées), absents si
+        non décodables. Les événements pas encore décodés le sont en un seul
+        parse_events, avec repli événement par événement.
+        """
+        cache = self.cache.setdefault("events", {})
+        props = tuple(player or ())
+        missing = [name for name in event_names if (name, props) not in cache]
+        for name in event_names:
+            self.record("events", name not in missing)
+
+        if missing:
+            try:
+                for event_name, df in self.parser.parse_events(missing, player=list(props) or None):
+                    cache[(event_name, props)] = categorize_strings(df)
+            except Exception as e:
+                # Repli: un parse_event par événement
+                print(f"Warning: Batched event parsing failed, falling back: {e}", file=sys.stderr)
+                for event_name in missing:
+                    try:
+                        df = self.parser.parse_event(event_name, player=list(props) or None)
+                        cache[(event_name, props)] = categorize_strings(df)
+                    except Exception:
+                        continue
+            for event_name in missing:
+                cache.setdefault((event_name, props), None)
+
+        frames = {name: cache[(name, props)] for name in event_names}
+        return {name: df for name, df in frames.items() if df is not None}
+
+    def ticks(self, props: List[str], ticks: Optional[List[int]] = None, keep: bool = True) -> pd.DataFrame:
+        """parse_ticks mémorisé (ticks=None: toute la démo), colonnes texte catégorisées."""
+        key = (tuple(props), None if ticks is None else tuple(ticks))
+        return self.memo(
+            "ticks", key,
+            lambda: categorize_strings(self.parser.parse_ticks(list(props), ticks=None if ticks is None else list(ticks))),
+            keep=keep,
+        )
+
+
+# =============================================================================
+# RÉCUPÉRATION GROUPÉE DES ÉVÉNEMENTS
+# =============================================================================
+
+def is_repeated_text_column(column: str) -> bool:
+    """Colonne à peu de valeurs distinctes très répétées (steamids, noms, armes)."""
+    return column.endswith(("steamid", "name")) or column in ("weapon", "item", "active_weapon")
+
+
+def categorize_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les colonnes steamid / name / weapon en catégories pandas:
+    chaque valeur distincte est stockée (et convertie par convert_column)
+    une seule fois. Les colonnes avec des valeurs absentes restent telles
+    quelles (None et NaN ne se distinguent plus une fois catégorisés).
+    """
+    if df is None or len(df) == 0:
+        return df
+
+    for column in df.columns:
+        if not isinstance(column, str) or not is_repeated_text_column(column):
+            continue
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_float_dtype(values.dtype):
+            continue
+        try:
+            if values.isna().any() or values.nunique() * 2 > len(values):
+                continue
+            df[column] = values.astype("category")
+        except TypeError:
+            continue
+    return df
+
+
+class EventBatch:
+    """
+    Récupération groupée des événements de la démo.
+
+    Chaque extracteur enregistre les événements (et les props joueur
+    additionnelles) dont il a besoin; fetch() les récupère en un seul
+    parse_events, puis chaque extracteur lit son DataFrame via get().
+    """
+
+    def __init__(self):
+        self.event_names: Dict[str, None] = {}
+        self.player_props: Dict[str, None] = {}
+        self.frames: Dict[str, pd.DataFrame] = {}
+
+    def register(self, event_names: List[str], player_props: Optional[List[str]] = None) -> None:
+        """Enregistre des événements et les props joueur à y joindre."""
+        self.event_names.update(dict.fromkeys(event_names))
+        self.player_props.update(dict.fromkeys(player_props or []))
+
+    def fetch(self, context: DemoContext) -> None:
+        """Récupère tous les événements enregistrés en une seule passe."""
+        if not self.event_names:
+            return
+
+        self.frames.update(context.events(list(self.event_names), list(self.player_props) or None))
+
+    def get(self, event_name: str) -> Optional[pd.DataFrame]:
+        """Retourne le DataFrame d'un événement, None si absent ou vide."""
+        df = self.frames.get(event_name)
+        if df is None or len(df) == 0:
+            return None
+        return df
+
+
+# =============================================================================
+# INDEX DES ROUNDS
+# =============================================================================
+
+class RoundIndex:
+    """
+    Index des rounds construit une fois depuis extract_rounds.
+
+    Attribue un numéro de round à une colonne de ticks entière par recherche
+    binaire sur les ticks de fin de round triés: un tick appartient au premier
+    round dont la fin est >= tick, et au round suivant le dernier au-delà.
+    Expose aussi les bornes début / fin de freeze / fin de chaque round.
+    """
+
+    def __init__(self, rounds: List[Dict], freeze_ticks: Optional[List[int]] = None):
+        ordered = sorted(rounds, key=lambda r: r["tick"])
+        self.end_ticks = np.array([r["tick"] for r in ordered], dtype=np.int64)
+        self.round_numbers = np.array([r["roundNumber"] for r in ordered], dtype=np.int64)
+
+        # Un round commence à la fin du précédent
+        self.start_ticks = np.concatenate(([0], self.end_ticks[:-1])) if len(ordered) else self.end_ticks
+
+        # Fin du freeze time: premier round_freeze_end dans (début, fin], sinon début
+        self.freeze_end_ticks = self.start_ticks.copy()
+        if freeze_ticks is not None and len(freeze_ticks) and len(ordered):
+            freeze = np.sort(np.asarray(freeze_ticks, dtype=np.int64))
+            idx = np.searchsorted(freeze, self.start_ticks, side="right")
+            has_freeze = idx < len(freeze)
+            candidates = freeze[np.minimum(idx, len(freeze) - 1)]
+            in_round = has_freeze & (candidates <= self.end_ticks)
+            self.freeze_end_ticks = np.where(in_round, candidates, self.start_ticks)
+
+    def __len__(self) -> int:
+        return len(self.end_ticks)
+
+    def assign(self, ticks: Any) -> np.ndarray:
+        """Attribue un numéro de round à chaque tick d'une colonne."""
+        ticks = np.nan_to_num(np.asarray(ticks, dtype=np.float64)).astype(np.int64)
+        if len(self.end_ticks) == 0:
+            return np.ones(len(ticks), dtype=np.int64)
+
+        idx = np.searchsorted(self.end_ticks, ticks, side="left")
+        after_last = self.round_numbers[-1] + 1
+        return np.where(
+            idx < len(self.end_ticks),
+            self.round_numbers[np.minimum(idx, len(self.end_ticks) - 1)],
+            after_last,
+        )
+
+    def bounds(self, round_number: int) -> Optional[Dict[str, int]]:
+        """Bornes (début, fin du freeze, fin) d'un round, None si inconnu."""
+        matches = np.flatnonzero(self.round_numbers == round_number)
+        if len(matches) == 0:
+            return None
+        i = matches[0]
+        return {
+            "start": int(self.start_ticks[i]),
+            "freezeEnd": int(self.freeze_end_ticks[i]),
+            "end": int(self.end_ticks[i]),
+        }
+
+
+# =============================================================================
+# MOTEUR D'EXTRACTION COLONNAIRE
+# =============================================================================
+
+@dataclass
+class Field:
+    """
+    Champ de sortie d'un enregistrement, décrit de manière déclarative.
+
+    kind: int | float | str | bool (conversions safe_*), weapon | weaponCategory |
+    hitgroup (normalisations), const (valeur fixe `default`) ou computed
+    (colonne précalculée passée à build_records sous la clé `key`).
+    source peut être un dict {clé: colonne} pour produire un objet imbriqué.
+    """
+    key: str
+    source: Any = None
+    kind: str = "str"
+    default: Any = None  # valeur lue si la colonne est absente (ou constante)
+    fallback: Optional[str] = None  # colonne lue si la valeur source est falsy
+    optional: bool = False  # clé omise si la colonne est absente ou la valeur None
+
+
+# Conversions élément par élément (colonnes object, valeurs mappées)
+SCALAR_CONVERTERS = {
+    "int": safe_int,
+    "float": safe_float,
+    "str": safe_str,
+    "bool": safe_bool,
+    "weapon": normalize_weapon,
+    "weaponCategory": get_weapon_category,
+    "hitgroup": normalize_hitgroup,
+}
+
+# Conversions mappées: peu de valeurs distinctes, mémoïsées par valeur
+MAPPED_KINDS = {"weapon", "weaponCategory", "hitgroup"}
+
+
+def convert_column(values: Optional[pd.Series], kind: str, n: int, default: Any = None) -> List[Any]:
+    """Convertit une colonne entière avec la sémantique des helpers safe_*."""
+    convert = SCALAR_CONVERTERS[kind]
+
+    if values is None:
+        return [convert(default)] * n
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Une conversion par catégorie, puis report par code (-1 = absent)
+        categories = convert_column(pd.Series(values.cat.categories), kind, len(values.cat.categories))
+        lookup = np.array(categories + [convert(np.nan)], dtype=object)
+        return lookup[values.cat.codes.to_numpy()].tolist()
+
+    dtype = values.dtype
+    is_bool = pd.api.types.is_bool_dtype(dtype)
+    is_int = pd.api.types.is_integer_dtype(dtype) and not is_bool
+    is_float = pd.api.types.is_float_dtype(dtype)
+
+    if (is_int or is_bool) and values.hasnans:
+        # Entiers/booléens nullables (pd.NA): conversion élément par élément
+        is_int = is_bool = False
+
+    if kind == "int":
+        if is_int:
+            return values.tolist()
+        if is_bool:
+            return values.astype(np.int64).tolist()
+        if is_float:
+            arr = values.to_numpy(dtype=np.float64)
+            nan = np.isnan(arr)
+            if np.isfinite(arr[~nan]).all():
+                return np.where(nan, 0, np.trunc(np.where(nan, 0, arr))).astype(np.int64).tolist()
+
+    elif kind == "float":
+        if is_int or is_bool or is_float:
+            arr = values.to_numpy(dtype=np.float64)
+            return np.where(np.isnan(arr), 0.0, arr).tolist()
+
+    elif kind == "bool":
+        if is_bool:
+            return values.tolist()
+        if is_int or is_float:
+            # bool(NaN) est vrai, comme safe_bool
+            return (values.to_numpy(dtype=np.float64) != 0).tolist()
+
+    elif kind in MAPPED_KINDS:
+        memo = {}
+        result = []
+        for value in values.tolist():
+            try:
+                result.append(memo[value])
+            except KeyError:
+                result.append(memo.setdefault(value, convert(value)))
+            except TypeError:
+                result.append(convert(value))
+        return result
+
+    return [convert(value) for value in values.tolist()]
+
+
+class RecordBatch:
+    """
+    Enregistrements stockés par colonnes plutôt qu'un dict par ligne.
+
+    columns[i] contient les valeurs du champ keys[i]: une liste, ou un dict
+    {sous-clé: liste} pour un objet imbriqué; presence[i] (optionnel) indique
+    les lignes où la clé est présente. Se lit comme une liste d'enregistrements
+    (len, index, itération): chaque dict est construit à la demande, avec les
+    mêmes clés, valeurs et ordre que les dicts construits ligne par ligne.
+    """
+
+    __slots__ = ("keys", "columns", "length", "presence")
+
+    def __init__(
+        self,
+        keys: List[str],
+        columns: List[Any],
+        length: int,
+        presence: Optional[List[Optional[List[bool]]]] = None
+    ):
+        self.keys = keys
+        self.columns = columns
+        self.length = length
+        self.presence = presence if presence and any(p is not None for p in presence) else None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Dict]:
+        def nested(values: Dict[str, List[Any]]) -> Iterator[Dict]:
+            sub_keys = tuple(values)
+            for row in zip(*values.values()):
+                yield dict(zip(sub_keys, row))
+
+        streams = [nested(values) if isinstance(values, dict) else values for values in self.columns]
+
+        keys = self.keys
+        if self.presence is None:
+            for row in zip(*streams):
+                yield dict(zip(keys, row))
+        else:
+            for i, row in enumerate(zip(*streams)):
+                yield {
+                    key: value
+                    for key, value, present in zip(keys, row, self.presence)
+                    if present is None or present[i]
+                }
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+
+        row = {}
+        for j, (key, values) in enumerate(zip(self.keys, self.columns)):
+            if self.presence is not None and self.presence[j] is not None and not self.presence[j][i]:
+                continue
+            row[key] = {k: v[i] for k, v in values.items()} if isinstance(values, dict) else values[i]
+        return row
+
+    def take(self, indices: List[int]) -> "RecordBatch":
+        """Nouveau lot avec les lignes indices, dans cet ordre."""
+        def pick(values: List[Any]) -> List[Any]:
+            return [values[i] for i in indices]
+
+        columns = [
+            {k: pick(v) for k, v in values.items()} if isinstance(values, dict) else pick(values)
+            for values in self.columns
+        ]
+        presence = [None if p is None else pick(p) for p in self.presence] if self.presence else None
+        return RecordBatch(self.keys, columns, len(indices), presence)
+
+
+class SnapshotBatch:
+    """
+    Snapshots {tick, players} adossés à un RecordBatch de joueurs rangés dans
+    l'ordre des snapshots (counts[i] joueurs pour ticks[i]).
+    """
+
+    __slots__ = ("ticks", "counts", "players")
+
+    def __init__(self, ticks: List[int], counts: List[int], players: RecordBatch):
+        self.ticks = ticks
+        self.counts = counts
+        self.players = players
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def __iter__(self) -> Iterator[Dict]:
+        players = iter(self.players)
+        for tick, count in zip(self.ticks, self.counts):
+            yield {
+                "tick": tick,
+                "players": list(islice(players, count)),
+            }
+
+    @classmethod
+    def build(cls, records: RecordBatch, groups: Dict[int, Any], sample_ticks: List[int]) -> "SnapshotBatch":
+        """Snapshots des ticks de sample_ticks ayant des joueurs (groups: tick → indices)."""
+        ticks, counts, order = [], [], []
+        for tick in sample_ticks:
+            indices = groups.get(int(tick))
+            if indices is not None and len(indices):
+                ticks.append(tick)
+                counts.append(len(indices))
+                order.extend(indices)
+        return cls(ticks, counts, records.take(order))
+
+
+# Sections de lignes à sérialiser ligne par ligne (sans liste de dicts complète)
+ROW_BATCHES = (RecordBatch, SnapshotBatch)
+
+
+def build_batch(
+    df: pd.DataFrame,
+    fields: List[Field],
+    computed: Optional[Dict[str, Any]] = None
+) -> RecordBatch:
+    """
+    Transforme un DataFrame d'événements en lot d'enregistrements (RecordBatch).
+
+    Chaque champ est converti colonne par colonne, sans iterrows; l'ordre des
+    clés suit l'ordre des champs pour conserver le JSON produit à l'identique.
+    Une valeur calculée peut être un dict {sous-clé: liste} (objet imbriqué).
+    """
+    n = len(df)
+    columns = df.columns
+    keys, values, presence = [], [], []
+
+    def column(name: Optional[str]) -> Optional[pd.Series]:
+        return df[name] if name is not None and name in columns else None
+
+    for spec in fields:
+        if spec.kind == "const":
+            converted = [spec.default] * n
+        elif spec.kind == "computed":
+            converted = computed[spec.key]
+            if not isinstance(converted, dict):
+                converted = list(converted)
+        elif isinstance(spec.source, dict):
+            if spec.optional and next(iter(spec.source.values())) not in columns:
+                continue
+            converted = {
+                sub_key: convert_column(column(c), spec.kind, n, spec.default)
+                for sub_key, c in spec.source.items()
+            }
+        else:
+            if spec.optional and spec.source not in columns:
+                continue
+            series = column(spec.source)
+            if spec.fallback is not None:
+                primary = series.tolist() if series is not None else [None] * n
+                backup = column(spec.fallback)
+                backup = backup.tolist() if backup is not None else [None] * n
+                series = pd.Series([v or b for v, b in zip(primary, backup)], dtype=object)
+            converted = convert_column(series, spec.kind, n, spec.default)
+
+        keys.append(spec.key)
+        values.append(converted)
+
+        anchor = next(iter(spec.source.values())) if isinstance(spec.source, dict) else spec.source
+        if spec.optional and df[anchor].dtype == object and df[anchor].isnull().any():
+            presence.append([v is not None for v in df[anchor].tolist()])
+        else:
+            presence.append(None)
+
+    return RecordBatch(keys, values, n, presence)
+
+
+def build_records(
+    df: pd.DataFrame,
+    fields: List[Field],
+    computed: Optional[Dict[str, Any]] = None
+) -> List[Dict]:
+    """Comme build_batch, en liste de dicts (sections courtes ou modifiées ensuite)."""
+    return list(build_batch(df, fields, computed))
+
+
+def snapshot_mask(df: pd.DataFrame, alive_only: bool = False) -> np.ndarray:
+    """Masque vectorisé des lignes joueur valides (steamid non nul, vivant)."""
+    n = len(df)
+    steamids = df["steamid"] if "steamid" in df.columns else None
+
+    if steamids is None:
+        mask = np.zeros(n, dtype=bool)
+    elif pd.api.types.is_numeric_dtype(steamids.dtype) and not steamids.hasnans:
+        mask = steamids.to_numpy() != 0
+    else:
+        mask = np.array([s not in ("", "0") for s in convert_column(steamids, "str", n)], dtype=bool)
+
+    if alive_only:
+        alive = df["is_alive"] if "is_alive" in df.columns else None
+        mask &= np.array(convert_column(alive, "bool", n, default=True), dtype=bool)
+
+    return mask
+
+
+def group_by_tick(df: pd.DataFrame, records: List[Dict]) -> Dict[int, List[Dict]]:
+    """Regroupe les enregistrements (alignés sur df) par tick, en une passe."""
+    if len(df) == 0:
+        return {}
+    return {
+        int(tick): [records[i] for i in indices]
+        for tick, indices in df.groupby("tick", sort=False).indices.items()
+    }
+
+
+class ChunkedSection:
+    """
+    Section produite morceau par morceau (listes d'enregistrements).
+
+    Les writers sérialisent chaque morceau dès qu'il est calculé: seul le
+    morceau courant est en mémoire. Itérable une seule fois.
+    """
+
+    def __init__(self, chunks: Iterable[List[Dict]]):
+        self.chunks = iter(chunks)
+
+    def __iter__(self) -> Iterator[List[Dict]]:
+        return self.chunks
+
+    def rows(self) -> Iterator[Dict]:
+        """Enregistrements à plat, morceau après morceau."""
+        for chunk in self.chunks:
+            yield from chunk
+
+
+# =============================================================================
+# PLAN DE DÉCODAGE DES TICKS
+# =============================================================================
+
+# Props de tick demandées par chaque extracteur
+PLAYER_TICK_PROPS = ["steamid", "name", "team_num"]
+KILL_TICK_PROPS = ["X", "Y", "Z", "steamid"]
+FIRE_TICK_PROPS = [
+    "steamid", "X", "Y", "Z", "velocity_X", "velocity_Y", "velocity_Z",
+    "yaw", "pitch", "is_scoped", "in_crouch", "is_airborne",
+]
+ECONOMY_TICK_PROPS = [
+    "steamid", "balance", "equipment_value", "cash_spent_this_round",
+    "has_helmet", "has_defuser", "armor_value", "team_num", "active_weapon",
+]
+POSITION_TICK_PROPS = [
+    "steamid", "X", "Y", "Z", "velocity_X", "velocity_Y", "velocity_Z",
+    "health", "armor_value", "is_alive", "team_num",
+    "is_scoped", "is_walking", "in_crouch", "is_airborne",
+    "active_weapon", "balance",
+]
+
+# Nombre maximal de ticks décodés par parse_ticks pour une fenêtre de rounds
+TICK_WINDOW_MAX_TICKS = 10000
+
+
+class TickPlan:
+    """
+    Plan de décodage des ticks partagé par tous les extracteurs.
+
+    Chaque extracteur enregistre les props et les ticks dont il a besoin,
+    puis le plan effectue un unique parse_ticks sur l'union des props et des
+    ticks. Chaque extracteur récupère ensuite sa tranche (ses ticks, ses props).
+    Une demande enregistrée avec ticks=None accepte n'importe quels ticks déjà
+    décodés par le plan (décodage complet si aucun autre extracteur n'en demande).
+    """
+
+    def __init__(self):
+        self.requests: Dict[str, Tuple[List[str], Optional[set]]] = {}
+        self.frame: Optional[pd.DataFrame] = None
+
+    def register(self, name: str, props: List[str], ticks: Optional[List[int]] = None) -> None:
+        """Enregistre les props et ticks nécessaires à un extracteur."""
+        tick_set = None if ticks is None else {int(t) for t in ticks}
+        self.requests[name] = (list(props), tick_set)
+
+    def union_props(self) -> List[str]:
+        """Union ordonnée des props demandées."""
+        props = {}
+        for wanted, _ in self.requests.values():
+            props.update(dict.fromkeys(wanted))
+        return list(props)
+
+    def union_ticks(self) -> List[int]:
+        """Union triée des ticks explicitement demandés."""
+        ticks = set()
+        for _, wanted in self.requests.values():
+            if wanted is not None:
+                ticks |= wanted
+        return sorted(ticks)
+
+    def execute(self, context: DemoContext) -> None:
+        """Décode en une seule passe l'union des props et des ticks."""
+        if not self.requests:
+            return
+
+        ticks = self.union_ticks()
+        if not ticks and all(wanted is not None for _, wanted in self.requests.values()):
+            # Aucun tick demandé: parse_ticks sans ticks décoderait toute la démo
+            return
+
+        try:
+            self.frame = context.ticks(self.union_props(), ticks or None)
+        except Exception as e:
+            print(f"Warning: Could not parse ticks: {e}", file=sys.stderr)
+            self.frame = None
+
+    def get(self, name: str) -> Optional[pd.DataFrame]:
+        """Retourne la tranche (ticks, props) d'un extracteur."""
+        if name not in self.requests or self.frame is None or len(self.frame) == 0:
+            return None
+
+        props, ticks = self.requests[name]
+        columns = [c for c in dict.fromkeys(["tick", "steamid", "name", *props]) if c in self.frame.columns]
+        frame = self.frame if ticks is None else self.frame[self.frame["tick"].isin(ticks)]
+        return frame[columns]
+
+
+def round_windows(ticks: Any, round_index: RoundIndex, max_ticks: int = TICK_WINDOW_MAX_TICKS) -> List[np.ndarray]:
+    """
+    Découpe des ticks en fenêtres de rounds consécutifs d'au plus max_ticks
+    ticks distincts (un round plus long est lui-même découpé).
+    Les fenêtres sont triées et couvrent chacune un intervalle de ticks contigu.
+    """
+    ticks = np.unique(np.asarray(ticks, dtype=np.int64))
+    if len(ticks) == 0:
+        return []
+
+    # Début de chaque round dans les ticks triés
+    rounds = round_index.assign(ticks)
+    boundaries = np.append(np.flatnonzero(np.diff(rounds, prepend=rounds[0] - 1)), len(ticks))
+
+    windows = []
+    window_start = 0
+    for start, end in zip(boundaries[:-1].tolist(), boundaries[1:].tolist()):
+        if end - window_start > max_ticks and start > window_start:
+            windows.append(ticks[window_start:start])
+            window_start = start
+        while end - window_start > max_ticks:
+            windows.append(ticks[window_start:window_start + max_ticks])
+            window_start += max_ticks
+    if window_start < len(ticks):
+        windows.append(ticks[window_start:])
+
+    return windows
+
+
+def decode_tick_window(context: DemoContext, props: List[str], ticks: np.ndarray) -> Optional[pd.DataFrame]:
+    """Décode les props aux ticks d'une fenêtre (None si vide ou en erreur), sans la conserver."""
+    if len(ticks) == 0:
+        # parse_ticks sans ticks décoderait toute la démo
+        return None
+
+    try:
+        return context.ticks(props, [int(t) for t in ticks], keep=False)
+    except Exception as e:
+        print(f"Warning: Could not parse ticks: {e}", file=sys.stderr)
+        return None
+
+
+class ExtractionPool:
+    """
+    Pool de threads partagé par les extracteurs d'une démo (extract_workers).
+
+    Des threads plutôt que des processus: les DataFrames d'événements et le
+    DemoParser sont partagés sans copie. Le gain vient du code numpy/pandas
+    et des parse_ticks qui relâchent le GIL.
+    """
+
+    def __init__(self, workers: int):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+
+    def submit(self, function: Callable[..., Any], *args) -> Any:
+        return self.executor.submit(function, *args)
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+        """
+        function(item) pour chaque item, résultats dans l'ordre des items.
+        Au plus workers calculs d'avance: la mémoire reste bornée.
+        """
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(self.executor.submit(function, item))
+                if len(pending) > self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ExtractionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def map_windows(
+    function: Callable[[Any], Any],
+    windows: Iterable[Any],
+    pool: Optional[ExtractionPool] = None
+) -> Iterator[Any]:
+    """function(fenêtre) dans l'ordre des fenêtres, sur le pool s'il y en a un."""
+    if pool is None:
+        return map(function, windows)
+    return pool.map(function, windows)
+
+
+def position_windows(
+    round_index: RoundIndex,
+    sample_rate: int,
+    total_ticks: int = 0,
+    max_ticks: int = TICK_WINDOW_MAX_TICKS
+) -> List[List[np.ndarray]]:
+    """
+    Ticks échantillonnés pour les positions, par round: de la fin du freeze
+    time à la fin du round, sur la grille des multiples de sample_rate.
+    Sans rounds connus, toute la démo (total_ticks) par tranches de max_ticks.
+
+    Les rounds consécutifs sont regroupés en fenêtres d'au plus max_ticks
+    ticks (un round plus long forme sa propre fenêtre), décodées chacune par
+    un seul parse_ticks: quelques passes sur la démo au lieu d'une par round.
+    """
+    if len(round_index) == 0:
+        ticks = np.arange(0, total_ticks, sample_rate, dtype=np.int64)
+        return [[ticks[i:i + max_ticks]] for i in range(0, len(ticks), max_ticks)]
+
+    windows = []
+    size = 0
+    for start, end in zip(round_index.freeze_end_ticks.tolist(), round_index.end_ticks.tolist()):
+        first = -(-start // sample_rate) * sample_rate
+        ticks = np.arange(first, end + 1, sample_rate, dtype=np.int64)
+        if not len(ticks):
+            continue
+        if not windows or size + len(ticks) > max_ticks:
+            windows.append([])
+            size = 0
+        windows[-1].append(ticks)
+        size += len(ticks)
+    return windows
+
+
+# =============================================================================
+# JOINTURES TEMPORELLES
+# =============================================================================
+
+def key_column(values: Any) -> np.ndarray:
+    """Colonne de clé de jointure: object, None pour les valeurs absentes ou vides."""
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values) | (values == "")
+    return np.where(missing, None, values)
+
+
+def joint_key_codes(
+    left_keys: List[np.ndarray],
+    right_keys: List[np.ndarray],
+    left_size: int,
+    right_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Codes entiers communs aux clés gauche et droite (plusieurs colonnes
+    combinées); -1 si une des clés est absente (ne joint jamais).
+    """
+    left_codes = np.zeros(left_size, dtype=np.int64)
+    right_codes = np.zeros(right_size, dtype=np.int64)
+
+    for left_values, right_values in zip(left_keys, right_keys):
+        codes, uniques = pd.factorize(np.concatenate([
+            np.asarray(left_values, dtype=object),
+            np.asarray(right_values, dtype=object),
+        ]))
+        cardinality = len(uniques) + 1
+        combined = np.concatenate([left_codes, right_codes]) * cardinality + codes
+        combined[(codes < 0) | (np.concatenate([left_codes, right_codes]) < 0)] = -1
+
+        # Recompacter pour éviter les dépassements avec beaucoup de clés
+        valid = combined >= 0
+        combined[valid] = pd.factorize(combined[valid])[0]
+        left_codes, right_codes = combined[:left_size], combined[left_size:]
+
+    return left_codes, right_codes
+
+
+def window_join(
+    left_ticks: Any,
+    right_ticks: Any,
+    min_offset: int,
+    max_offset: int,
+    left_keys: Optional[List[Any]] = None,
+    right_keys: Optional[List[Any]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Jointure temporelle vectorisée entre deux séries d'événements.
+
+    Retourne les paires d'indices (i, j) telles que les clés left_keys[k][i]
+    et right_keys[k][j] sont égales pour chaque k et que
+    right_ticks[j] - left_ticks[i] est dans [min_offset, max_offset].
+    Les paires sont ordonnées par i, puis par tick (et position) de j.
+
+    Coût: tri de la droite + deux recherches binaires par événement gauche,
+    puis linéaire dans le nombre de paires produites.
+    """
+    left_ticks = np.asarray(left_ticks, dtype=np.int64)
+    right_ticks = np.asarray(right_ticks, dtype=np.int64)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    if len(left_ticks) == 0 or len(right_ticks) == 0:
+        return empty
+
+    left_codes, right_codes = joint_key_codes(
+        [key_column(values) for values in left_keys or []],
+        [key_column(values) for values in right_keys or []],
+        len(left_ticks),
+        len(right_ticks),
+    )
+
+    # Droite triée par (clé, tick, position): clé composite clé * span + tick relatif
+    candidates = np.flatnonzero(right_codes >= 0)
+    if len(candidates) == 0:
+        return empty
+    order = candidates[np.lexsort((right_ticks[candidates], right_codes[candidates]))]
+
+    tick_min = int(right_ticks[order].min())
+    span = int(right_ticks[order].max()) - tick_min + 1
+    composite = right_codes[order] * span + (right_ticks[order] - tick_min)
+
+    low = np.maximum(left_ticks - tick_min + min_offset, 0)
+    high = np.minimum(left_ticks - tick_min + max_offset, span - 1)
+    valid = (left_codes >= 0) & (low <= high)
+
+    starts = np.searchsorted(composite, left_codes * span + low, side="left")
+    ends = np.searchsorted(composite, left_codes * span + high, side="right")
+    counts = np.where(valid, ends - starts, 0)
+
+    total = int(counts.sum())
+    if total == 0:
+        return empty
+
+    left_index = np.repeat(np.arange(len(left_ticks)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    right_index = order[np.repeat(starts, counts) + offsets]
+    return left_index, right_index
+
+
+def steamid_integers(values: Any) -> np.ndarray:
+    """steamids (texte, entiers ou catégories) → int64, 0 si absent ou invalide."""
+    def to_integer(value: Any) -> int:
+        try:
+            steamid = int(safe_str(value))
+        except ValueError:
+            return 0
+        return steamid if 0 < steamid < 2**63 else 0
+
+    # Une conversion par valeur distincte (peu de joueurs, beaucoup de lignes)
+    codes, uniques = pd.factorize(values if isinstance(values, pd.Series) else pd.Series(values, dtype=object))
+    converted = np.array([to_integer(value) for value in uniques] + [0], dtype=np.int64)
+    return converted[codes]
+
+
+def join_tick_state(
+    ticks: Any,
+    steamids: Any,
+    state_df: Optional[pd.DataFrame],
+    tolerance: int = 0
+) -> np.ndarray:
+    """
+    Jointure vectorisée événements → état joueur décodé (state_df: tick, steamid).
+
+    Pour chaque événement (ticks[i], steamids[i]), retourne la ligne de
+    state_df du même joueur au même tick ou, à défaut, au tick antérieur le
+    plus proche d'au plus tolerance ticks; -1 sans état. En cas de doublon
+    (tick, steamid), la dernière ligne. Les lignes d'état sans tick (0) ou
+    sans steamid sont ignorées.
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    rows = np.full(len(ticks), -1, dtype=np.int64)
+    if len(ticks) == 0 or state_df is None or len(state_df) == 0 or "steamid" not in state_df.columns:
+        return rows
+
+    state_ticks = np.asarray(convert_column(state_df["tick"], "int", len(state_df)), dtype=np.int64)
+    candidates = np.flatnonzero((state_ticks != 0) & (steamid_integers(state_df["steamid"]) != 0))
+    if len(candidates) == 0:
+        return rows
+
+    # Codes joueur communs aux deux côtés (0 = absent, ne joint jamais)
+    event_ids = steamid_integers(steamids)
+    codes, _ = pd.factorize(np.concatenate([steamid_integers(state_df["steamid"])[candidates], event_ids]))
+    state_codes, event_codes = codes[:len(candidates)], codes[len(candidates):]
+
+    # État trié par (joueur, tick, position): clé composite joueur * span + tick relatif
+    order = np.lexsort((state_ticks[candidates], state_codes))
+    tick_min = int(min(state_ticks[candidates].min(), ticks.min()))
+    span = int(max(state_ticks[candidates].max(), ticks.max())) - tick_min + 1
+    composite = state_codes[order] * span + (state_ticks[candidates][order] - tick_min)
+
+    # Dernière ligne d'état <= (joueur, tick) de l'événement
+    wanted = event_codes * span + (ticks - tick_min)
+    positions = np.searchsorted(composite, wanted, side="right") - 1
+    found = (event_ids != 0) & (positions >= 0)
+    nearest = composite[np.maximum(positions, 0)]
+    found &= (nearest >= event_codes * span) & (wanted - nearest <= tolerance)
+
+    rows[found] = candidates[order[positions[found]]]
+    return rows
+
+
+def take_state(state_df: Optional[pd.DataFrame], column: str, kind: str, rows: np.ndarray) -> np.ndarray:
+    """Valeurs (converties safe_*) de state_df aux lignes rows; 0 / False pour -1."""
+    dtype = np.bool_ if kind == "bool" else np.float64
+    found = rows >= 0
+    if state_df is None or len(state_df) == 0 or not found.any():
+        return np.zeros(len(rows), dtype=dtype)
+
+    # Lignes jointes d'abord: seules elles sont converties
+    picked = state_df[column].iloc[np.maximum(rows, 0)] if column in state_df.columns else None
+    if picked is not None and not picked.hasnans and pd.api.types.is_numeric_dtype(picked.dtype):
+        values = picked.to_numpy(dtype=np.float64)
+        values = values != 0 if kind == "bool" else values
+    else:
+        values = np.asarray(convert_column(picked, kind, len(rows)), dtype=dtype)
+    return np.where(found, values, dtype(0))
+
+
+def with_missing(values: np.ndarray, found: np.ndarray, missing: Any) -> List[Any]:
+    """Liste de values, missing aux positions sans état (found faux)."""
+    if found.all():
+        return values.tolist()
+    result = values.astype(object)
+    result[~found] = missing
+    return result.tolist()
+
+
+def seconds_to_ticks(seconds: float, tickrate: int) -> int:
+    """Durée en secondes → nombre de ticks entiers (borne incluse)."""
+    return int(seconds * (tickrate or 64))
+
+
+def norms(*components: Any) -> List[float]:
+    """
+    Normes euclidiennes ligne à ligne de colonnes de composantes.
+
+    Carrés et racine par pow Python (x ** 2, ** 0.5) et non x * x / np.sqrt:
+    pour des valeurs non float32, pow (libm) et la multiplication numpy
+    peuvent différer sur le dernier bit; l'arrondi reste celui historique.
+    """
+    columns = [np.asarray(values, dtype=np.float64).tolist() for values in components]
+    result = []
+    for row in zip(*columns):
+        squared = 0.0
+        for value in row:
+            squared += value ** 2
+        result.append(squared ** 0.5)
+    return result
+
+
 # =============================================================================
 # EXTRACTEURS
 # =============================================================================
 
-def extract_metadata(parser: DemoParser) -> Dict:
+def extract_metadata(context: DemoContext) -> Dict:
     """Extrait les métadonnées complètes de la démo."""
     try:
-        header = parser.parse_header()
+        header = context.header()
 
         metadata = {
             "map": header.get("map_name", "unknown"),
@@ -206,7 +1372,7 @@ def extract_metadata(parser: DemoParser) -> Dict:
 
         # Recherche de la date dans les convars
         try:
-            convars = parser.parse_convars()
+            convars = context.convars()
             date_convars = [
                 'sv_server_start_time', 'server_start_time',
                 'match_start_time', 'game_start_time',
@@ -236,14 +1402,14 @@ def extract_metadata(parser: DemoParser) -> Dict:
         }
 
 
-def extract_players(parser: DemoParser) -> List[Dict]:
+def extract_players(tick_df: Optional[pd.DataFrame], events: EventBatch) -> List[Dict]:
     """Extrait les informations complètes des joueurs."""
     players = []
     seen_steamids = set()
 
     try:
-        # Méthode 1: parse_ticks pour données joueur
-        df = parser.parse_ticks(["steamid", "name", "team_num"])
+        # Méthode 1: ticks décodés par le plan pour données joueur
+        df = tick_df
         if df is not None and len(df) > 0:
             for _, row in df.drop_duplicates(subset=["steamid"]).iterrows():
                 steamid = safe_str(row.get("steamid", ""))
@@ -260,7 +1426,7 @@ def extract_players(parser: DemoParser) -> List[Dict]:
     # Méthode 2: Fallback depuis les kills
     if not players:
         try:
-            df = parser.parse_event("player_death")
+            df = events.get("player_death")
             if df is not None and len(df) > 0:
                 for _, row in df.iterrows():
                     for prefix in ["attacker", "user"]:
@@ -270,7 +1436,7 @@ def extract_players(parser: DemoParser) -> List[Dict]:
                             players.append({
                                 "steamId": steamid,
                                 "name": safe_str(row.get(f"{prefix}_name", "Unknown")),
-                                "team": 0,
+                                "team": safe_int(row.get(f"{prefix}_team_num", 0)),
                             })
         except Exception:
             pass
@@ -278,12 +1444,12 @@ def extract_players(parser: DemoParser) -> List[Dict]:
     return players
 
 
-def extract_rounds(parser: DemoParser) -> List[Dict]:
+def extract_rounds(events: EventBatch) -> List[Dict]:
     """Extrait les informations détaillées de chaque round."""
     rounds = []
 
     try:
-        df = parser.parse_event("round_end")
+        df = events.get("round_end")
         if df is not None and len(df) > 0:
             for _, row in df.iterrows():
                 winner = row.get("winner", 0)
@@ -310,550 +1476,712 @@ def extract_rounds(parser: DemoParser) -> List[Dict]:
     return rounds
 
 
-def extract_kills(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+KILL_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("attackerSteamId", "attacker_steamid", "str"),
+    Field("attackerName", "attacker_name", "str"),
+    Field("victimSteamId", "user_steamid", "str"),
+    Field("victimName", "user_name", "str"),
+    Field("weapon", "weapon", "weapon", default=""),
+    Field("weaponCategory", "weapon", "weaponCategory", default=""),
+    Field("headshot", "headshot", "bool", default=False),
+    Field("penetrated", "penetrated", "bool", default=False),
+    Field("attackerBlind", "attackerblind", "bool", default=False),
+    Field("noScope", "noscope", "bool", default=False),
+    Field("throughSmoke", "thrusmoke", "bool", default=False),
+    Field("assistedFlash", "assistedflash", "bool", default=False),
+    Field("attackerPosition", kind="computed"),
+    Field("victimPosition", kind="computed"),
+    Field("distance", kind="computed"),
+]
+
+
+def extract_kills(
+    events: EventBatch,
+    round_index: RoundIndex,
+    pos_df: Optional[pd.DataFrame],
+    tickrate: int = 64
+) -> RecordBatch:
     """Extrait tous les kills avec positions et contexte complet."""
-    kills = []
+    kills = RecordBatch([], [], 0)
 
     try:
-        df = parser.parse_event("player_death")
+        df = events.get("player_death")
         if df is None or len(df) == 0:
             return kills
 
-        # Récupérer les positions aux ticks de mort
-        kill_ticks = list(df["tick"].unique())
-        player_positions = {}
-
-        try:
-            pos_df = parser.parse_ticks(["X", "Y", "Z", "steamid"], ticks=kill_ticks)
-            if pos_df is not None and len(pos_df) > 0:
-                for _, row in pos_df.iterrows():
-                    tick = safe_int(row.get("tick", 0))
-                    steamid = safe_str(row.get("steamid", ""))
-                    if steamid and tick:
-                        key = f"{tick}_{steamid}"
-                        player_positions[key] = {
-                            "x": safe_float(row.get("X")),
-                            "y": safe_float(row.get("Y")),
-                            "z": safe_float(row.get("Z")),
-                        }
-        except Exception:
-            pass
-
-        for _, row in df.iterrows():
-            tick = safe_int(row.get("tick", 0))
-            round_num = get_round_for_tick(tick, round_ticks)
+        # Positions aux ticks de mort (décodées par le plan), 0.0 si absentes
+        ticks = convert_column(df["tick"], "int", len(df))
+        tolerance = seconds_to_ticks(STATE_TOLERANCE_SECONDS, tickrate)
 
-            attacker_steamid = safe_str(row.get("attacker_steamid", ""))
-            victim_steamid = safe_str(row.get("user_steamid", ""))
+        def positions(steamid_column: str) -> np.ndarray:
+            steamids = df[steamid_column] if steamid_column in df.columns else [None] * len(df)
+            rows = join_tick_state(ticks, steamids, pos_df, tolerance)
+            return np.stack([take_state(pos_df, column, "float", rows) for column in ("X", "Y", "Z")])
 
-            attacker_pos = player_positions.get(
-                f"{tick}_{attacker_steamid}",
-                {"x": 0.0, "y": 0.0, "z": 0.0}
-            )
-            victim_pos = player_positions.get(
-                f"{tick}_{victim_steamid}",
-                {"x": 0.0, "y": 0.0, "z": 0.0}
-            )
+        attacker_pos = positions("attacker_steamid")
+        victim_pos = positions("user_steamid")
 
-            weapon = normalize_weapon(row.get("weapon", ""))
+        distance = norms(*(attacker_pos - victim_pos))
 
-            kills.append({
-                "tick": tick,
-                "round": round_num,
-                "attackerSteamId": attacker_steamid,
-                "attackerName": safe_str(row.get("attacker_name", "")),
-                "victimSteamId": victim_steamid,
-                "victimName": safe_str(row.get("user_name", "")),
-                "weapon": weapon,
-                "weaponCategory": get_weapon_category(weapon),
-                "headshot": safe_bool(row.get("headshot", False)),
-                "penetrated": safe_bool(row.get("penetrated", False)),
-                "attackerBlind": safe_bool(row.get("attackerblind", False)),
-                "noScope": safe_bool(row.get("noscope", False)),
-                "throughSmoke": safe_bool(row.get("thrusmoke", False)),
-                "assistedFlash": safe_bool(row.get("assistedflash", False)),
-                "attackerPosition": attacker_pos,
-                "victimPosition": victim_pos,
-                "distance": calculate_distance(attacker_pos, victim_pos),
-            })
+        kills = build_batch(df, KILL_FIELDS, {
+            "round": round_index.assign(df["tick"]).tolist(),
+            "attackerPosition": dict(zip("xyz", attacker_pos.tolist())),
+            "victimPosition": dict(zip("xyz", victim_pos.tolist())),
+            "distance": distance,
+        })
     except Exception as e:
         print(f"Error extracting kills: {e}", file=sys.stderr)
 
     return kills
 
 
-def calculate_distance(pos1: Dict, pos2: Dict) -> float:
-    """Calcule la distance entre deux positions."""
-    dx = pos1.get("x", 0) - pos2.get("x", 0)
-    dy = pos1.get("y", 0) - pos2.get("y", 0)
-    dz = pos1.get("z", 0) - pos2.get("z", 0)
-    return (dx**2 + dy**2 + dz**2) ** 0.5
+DAMAGE_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("attackerSteamId", "attacker_steamid", "str"),
+    Field("victimSteamId", "user_steamid", "str"),
+    Field("damage", "dmg_health", "int"),
+    Field("damageArmor", "dmg_armor", "int"),
+    Field("healthRemaining", "health", "int"),
+    Field("armorRemaining", "armor", "int"),
+    Field("weapon", "weapon", "weapon"),
+    Field("weaponCategory", "weapon", "weaponCategory"),
+    Field("hitgroup", "hitgroup", "hitgroup"),
+]
 
 
-def extract_damages(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+def extract_damages(events: EventBatch, round_index: RoundIndex) -> RecordBatch:
     """Extrait tous les dégâts infligés avec détails."""
-    damages = []
+    damages = RecordBatch([], [], 0)
 
     try:
-        df = parser.parse_event("player_hurt")
+        df = events.get("player_hurt")
         if df is not None and len(df) > 0:
-            for _, row in df.iterrows():
-                tick = safe_int(row.get("tick", 0))
-                round_num = get_round_for_tick(tick, round_ticks)
-
-                hitgroup = row.get("hitgroup", 0)
-                if isinstance(hitgroup, str):
-                    hitgroup = HITGROUP_MAP.get(hitgroup.lower(), 0)
-                else:
-                    hitgroup = safe_int(hitgroup)
-
-                weapon = normalize_weapon(row.get("weapon", ""))
-
-                damages.append({
-                    "tick": tick,
-                    "round": round_num,
-                    "attackerSteamId": safe_str(row.get("attacker_steamid", "")),
-                    "victimSteamId": safe_str(row.get("user_steamid", "")),
-                    "damage": safe_int(row.get("dmg_health", 0)),
-                    "damageArmor": safe_int(row.get("dmg_armor", 0)),
-                    "healthRemaining": safe_int(row.get("health", 0)),
-                    "armorRemaining": safe_int(row.get("armor", 0)),
-                    "weapon": weapon,
-                    "weaponCategory": get_weapon_category(weapon),
-                    "hitgroup": hitgroup,
-                })
+            rounds = round_index.assign(df["tick"]).tolist()
+            damages = build_batch(df, DAMAGE_FIELDS, {"round": rounds})
     except Exception:
         pass
 
     return damages
 
 
-def extract_weapon_fires(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
-    """Extrait tous les tirs d'armes pour calcul d'accuracy."""
-    fires = []
-
+def extract_weapon_fires(
+    context: DemoContext,
+    events: EventBatch,
+    round_index: RoundIndex,
+    tickrate: int = 64,
+    max_ticks: int = TICK_WINDOW_MAX_TICKS,
+    pool: Optional[ExtractionPool] = None
+) -> ChunkedSection:
+    """
+    Extrait tous les tirs d'armes pour calcul d'accuracy.
+
+    L'état des tireurs est décodé pour chaque tick de tir, par fenêtres de
+    rounds d'au plus max_ticks ticks: chaque fenêtre est produite dès qu'elle
+    est calculée, la mémoire ne dépend pas de la longueur de la démo. Avec un
+    pool, les fenêtres suivantes sont décodées en avance.
+    """
+    return ChunkedSection(iter_weapon_fire_windows(context, events, round_index, tickrate, max_ticks, pool))
+
+
+def iter_weapon_fire_windows(
+    context: DemoContext,
+    events: EventBatch,
+    round_index: RoundIndex,
+    tickrate: int,
+    max_ticks: int,
+    pool: Optional[ExtractionPool] = None
+) -> Iterator[List[Dict]]:
+    """Tirs d'armes d'une fenêtre de rounds à la fois, dans l'ordre des ticks."""
     try:
-        df = parser.parse_event("weapon_fire")
-        if df is not None and len(df) > 0:
-            # Récupérer les positions et velocités aux ticks de tir
-            fire_ticks = list(df["tick"].unique())
+        df = events.get("weapon_fire")
+        if df is None or len(df) == 0:
+            return
 
-            # Échantillonner si trop de ticks
-            if len(fire_ticks) > 10000:
-                fire_ticks = fire_ticks[::2]  # Un sur deux
+        # Tri stable par tick: chaque fenêtre est une tranche contiguë
+        ticks = np.nan_to_num(np.asarray(df["tick"], dtype=np.float64)).astype(np.int64)
+        order = np.argsort(ticks, kind="stable")
+        sorted_ticks = ticks[order]
 
-            player_states = {}
-            try:
-                state_df = parser.parse_ticks(
-                    ["steamid", "X", "Y", "Z", "velocity_X", "velocity_Y", "velocity_Z",
-                     "yaw", "pitch", "is_scoped", "in_crouch", "is_airborne"],
-                    ticks=fire_ticks
-                )
-                if state_df is not None and len(state_df) > 0:
-                    for _, row in state_df.iterrows():
-                        tick = safe_int(row.get("tick", 0))
-                        steamid = safe_str(row.get("steamid", ""))
-                        if steamid and tick:
-                            key = f"{tick}_{steamid}"
-                            player_states[key] = {
-                                "position": {
-                                    "x": safe_float(row.get("X")),
-                                    "y": safe_float(row.get("Y")),
-                                    "z": safe_float(row.get("Z")),
-                                },
-                                "velocity": {
-                                    "x": safe_float(row.get("velocity_X")),
-                                    "y": safe_float(row.get("velocity_Y")),
-                                    "z": safe_float(row.get("velocity_Z")),
-                                },
-                                "viewAngles": {
-                                    "yaw": safe_float(row.get("yaw")),
-                                    "pitch": safe_float(row.get("pitch")),
-                                },
-                                "isScoped": safe_bool(row.get("is_scoped")),
-                                "isCrouching": safe_bool(row.get("in_crouch")),
-                                "isAirborne": safe_bool(row.get("is_airborne")),
-                            }
-            except Exception:
-                pass
+        tolerance = seconds_to_ticks(STATE_TOLERANCE_SECONDS, tickrate)
 
-            for _, row in df.iterrows():
-                tick = safe_int(row.get("tick", 0))
-                round_num = get_round_for_tick(tick, round_ticks)
-                steamid = safe_str(row.get("user_steamid", ""))
-                weapon = normalize_weapon(row.get("weapon", ""))
+        def fire_window(window: np.ndarray) -> RecordBatch:
+            lo = np.searchsorted(sorted_ticks, window[0], side="left")
+            hi = np.searchsorted(sorted_ticks, window[-1], side="right")
+            window_df = df.iloc[order[lo:hi]]
 
-                state = player_states.get(f"{tick}_{steamid}", {})
-                velocity = state.get("velocity", {"x": 0, "y": 0, "z": 0})
-                speed = (velocity["x"]**2 + velocity["y"]**2) ** 0.5
+            state_df = decode_tick_window(context, FIRE_TICK_PROPS, window)
+            return weapon_fire_batch(window_df, round_index, state_df, tolerance)
 
-                fires.append({
-                    "tick": tick,
-                    "round": round_num,
-                    "steamId": steamid,
-                    "weapon": weapon,
-                    "weaponCategory": get_weapon_category(weapon),
-                    "silencer": safe_bool(row.get("silenced", False)),
-                    "position": state.get("position", {"x": 0, "y": 0, "z": 0}),
-                    "velocity": velocity,
-                    "speed": speed,
-                    "viewAngles": state.get("viewAngles", {"yaw": 0, "pitch": 0}),
-                    "isScoped": state.get("isScoped", False),
-                    "isCrouching": state.get("isCrouching", False),
-                    "isAirborne": state.get("isAirborne", False),
-                    "isMoving": speed > 10,
-                    "isCounterStrafed": speed < 34,  # Threshold pour counter-strafe
-                })
+        yield from map_windows(fire_window, round_windows(sorted_ticks, round_index, max_ticks), pool)
     except Exception as e:
         print(f"Warning: Could not extract weapon fires: {e}", file=sys.stderr)
 
-    return fires
 
-
-def extract_grenades(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+WEAPON_FIRE_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("steamId", "user_steamid", "str"),
+    Field("weapon", "weapon", "weapon", default=""),
+    Field("weaponCategory", "weapon", "weaponCategory", default=""),
+    Field("silencer", "silenced", "bool", default=False),
+    Field("position", kind="computed"),
+    Field("velocity", kind="computed"),
+    Field("speed", kind="computed"),
+    Field("viewAngles", kind="computed"),
+    Field("isScoped", kind="computed"),
+    Field("isCrouching", kind="computed"),
+    Field("isAirborne", kind="computed"),
+    Field("isMoving", kind="computed"),
+    Field("isCounterStrafed", kind="computed"),
+]
+
+
+def weapon_fire_batch(
+    df: pd.DataFrame,
+    round_index: RoundIndex,
+    state_df: Optional[pd.DataFrame],
+    tolerance: int = 0
+) -> RecordBatch:
+    """Enregistrements weaponFires d'une tranche de weapon_fire (état du tireur joint par tick et steamid)."""
+    steamids = df["user_steamid"] if "user_steamid" in df.columns else [None] * len(df)
+    rows = join_tick_state(convert_column(df["tick"], "int", len(df)), steamids, state_df, tolerance)
+    found = rows >= 0
+
+    # Sans état: 0 entiers et False, comme les valeurs par défaut historiques
+    def state(column: str) -> List[Any]:
+        return with_missing(take_state(state_df, column, "float", rows), found, 0)
+
+    def flag(column: str) -> List[bool]:
+        return take_state(state_df, column, "bool", rows).tolist()
+
+    speed = np.array(norms(
+        take_state(state_df, "velocity_X", "float", rows), take_state(state_df, "velocity_Y", "float", rows)
+    ))
+
+    return build_batch(df, WEAPON_FIRE_FIELDS, {
+        "round": round_index.assign(df["tick"]).tolist(),
+        "position": {"x": state("X"), "y": state("Y"), "z": state("Z")},
+        "velocity": {"x": state("velocity_X"), "y": state("velocity_Y"), "z": state("velocity_Z")},
+        "speed": speed.tolist(),
+        "viewAngles": {"yaw": state("yaw"), "pitch": state("pitch")},
+        "isScoped": flag("is_scoped"),
+        "isCrouching": flag("in_crouch"),
+        "isAirborne": flag("is_airborne"),
+        "isMoving": (speed > 10).tolist(),
+        "isCounterStrafed": (speed < 34).tolist(),  # Threshold pour counter-strafe
+    })
+
+
+GRENADE_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("throwerSteamId", "user_steamid", "str", fallback="entityid"),
+    Field("position", {"x": "x", "y": "y", "z": "z"}, "float"),
+]
+
+
+def extract_grenades(events: EventBatch, round_index: RoundIndex) -> List[Dict]:
     """Extrait l'utilisation complète des grenades."""
-    events = []
-
-    grenade_events = [
-        ("flashbang_detonate", "flash"),
-        ("smokegrenade_detonate", "smoke"),
-        ("hegrenade_detonate", "he"),
-        ("inferno_startburn", "molotov"),
-        ("decoy_started", "decoy"),
-    ]
+    grenades = []
 
-    for event_name, grenade_type in grenade_events:
+    for event_name, grenade_type in GRENADE_EVENTS:
         try:
-            df = parser.parse_event(event_name)
+            df = events.get(event_name)
             if df is not None and len(df) > 0:
-                for _, row in df.iterrows():
-                    tick = safe_int(row.get("tick", 0))
-                    round_num = get_round_for_tick(tick, round_ticks)
-
-                    events.append({
-                        "type": grenade_type,
-                        "tick": tick,
-                        "round": round_num,
-                        "throwerSteamId": safe_str(
-                            row.get("user_steamid", "") or row.get("entityid", "")
-                        ),
-                        "position": {
-                            "x": safe_float(row.get("x", 0)),
-                            "y": safe_float(row.get("y", 0)),
-                            "z": safe_float(row.get("z", 0)),
-                        },
-                    })
+                rounds = round_index.assign(df["tick"]).tolist()
+                fields = [Field("type", kind="const", default=grenade_type), *GRENADE_FIELDS]
+                grenades.extend(build_records(df, fields, {"round": rounds}))
         except Exception:
             continue
 
-    return events
+    return grenades
 
 
-def extract_player_blinds(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+BLIND_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("victimSteamId", "user_steamid", "str"),
+    Field("attackerSteamId", "attacker_steamid", "str"),
+    Field("duration", "blind_duration", "float"),
+    Field("entityId", "entityid", "int"),
+]
+
+
+def extract_player_blinds(events: EventBatch, round_index: RoundIndex) -> List[Dict]:
     """Extrait les événements player_blind pour les flashs reçues."""
     blinds = []
 
     try:
-        df = parser.parse_event("player_blind")
+        df = events.get("player_blind")
         if df is not None and len(df) > 0:
-            for _, row in df.iterrows():
-                tick = safe_int(row.get("tick", 0))
-                round_num = get_round_for_tick(tick, round_ticks)
-
-                blinds.append({
-                    "tick": tick,
-                    "round": round_num,
-                    "victimSteamId": safe_str(row.get("user_steamid", "")),
-                    "attackerSteamId": safe_str(row.get("attacker_steamid", "")),
-                    "duration": safe_float(row.get("blind_duration", 0)),
-                    "entityId": safe_int(row.get("entityid", 0)),
-                })
+            rounds = round_index.assign(df["tick"]).tolist()
+            blinds = build_records(df, BLIND_FIELDS, {"round": rounds})
     except Exception as e:
         print(f"Warning: Could not extract player blinds: {e}", file=sys.stderr)
 
     return blinds
 
 
-def extract_bomb_events(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+BOMB_EVENT_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("steamId", "user_steamid", "str"),
+    Field("site", "site", "int", optional=True),
+]
+
+# Position ajoutée quand l'événement la fournit
+BOMB_POSITION_FIELD = Field("position", {"x": "x", "y": "y", "z": "z"}, "float", optional=True)
+
+
+def extract_bomb_events(events: EventBatch, round_index: RoundIndex) -> List[Dict]:
     """Extrait tous les événements liés à la bombe."""
-    events = []
-
-    bomb_event_types = [
-        ("bomb_planted", "planted"),
-        ("bomb_defused", "defused"),
-        ("bomb_exploded", "exploded"),
-        ("bomb_dropped", "dropped"),
-        ("bomb_pickup", "pickup"),
-        ("bomb_beginplant", "beginplant"),
-        ("bomb_abortplant", "abortplant"),
-        ("bomb_begindefuse", "begindefuse"),
-        ("bomb_abortdefuse", "abortdefuse"),
-    ]
-
-    for event_name, event_type in bomb_event_types:
+    bomb_events = []
+
+    for event_name, event_type in BOMB_EVENTS:
         try:
-            df = parser.parse_event(event_name)
+            df = events.get(event_name)
             if df is not None and len(df) > 0:
-                for _, row in df.iterrows():
-                    tick = safe_int(row.get("tick", 0))
-                    round_num = get_round_for_tick(tick, round_ticks)
-
-                    event = {
-                        "type": event_type,
-                        "tick": tick,
-                        "round": round_num,
-                        "steamId": safe_str(row.get("user_steamid", "")),
-                    }
+                fields = [Field("type", kind="const", default=event_type), *BOMB_EVENT_FIELDS]
 
-                    # Ajouter site si disponible
-                    site = row.get("site", None)
-                    if site is not None:
-                        event["site"] = safe_int(site)
-
-                    # Ajouter haskit pour defuse
-                    if event_type in ["begindefuse", "defused"]:
-                        event["hasKit"] = safe_bool(row.get("haskit", False))
-
-                    # Ajouter position si disponible
-                    x = row.get("x")
-                    if x is not None:
-                        event["position"] = {
-                            "x": safe_float(x),
-                            "y": safe_float(row.get("y", 0)),
-                            "z": safe_float(row.get("z", 0)),
-                        }
-
-                    events.append(event)
+                # Ajouter haskit pour defuse
+                if event_type in ["begindefuse", "defused"]:
+                    fields.append(Field("hasKit", "haskit", "bool"))
+
+                fields.append(BOMB_POSITION_FIELD)
+
+                rounds = round_index.assign(df["tick"]).tolist()
+                bomb_events.extend(build_records(df, fields, {"round": rounds}))
         except Exception:
             continue
 
-    return events
+    return bomb_events
+
+
+ECONOMY_PLAYER_FIELDS = [
+    Field("steamId", "steamid", "str"),
+    Field("balance", "balance", "int"),
+    Field("equipmentValue", "equipment_value", "int"),
+    Field("spentThisRound", "cash_spent_this_round", "int"),
+    Field("hasHelmet", "has_helmet", "bool"),
+    Field("hasDefuser", "has_defuser", "bool"),
+    Field("armorValue", "armor_value", "int"),
+    Field("team", "team_num", "int"),
+    Field("weapon", "active_weapon", "weapon"),
+]
 
 
-def extract_economy_by_round(parser: DemoParser, rounds: List[Dict]) -> List[Dict]:
+def extract_economy_by_round(
+    events: EventBatch,
+    rounds: List[Dict],
+    econ_df: Optional[pd.DataFrame]
+) -> List[Dict]:
     """Extrait l'économie détaillée par joueur par round."""
     economy = []
 
     try:
-        # Récupérer les ticks de début de round (freeze_end)
-        freeze_df = parser.parse_event("round_freeze_end")
+        # Ticks de début de round (freeze_end)
+        freeze_df = events.get("round_freeze_end")
         if freeze_df is None or len(freeze_df) == 0:
             return economy
 
         freeze_ticks = list(freeze_df["tick"].values)
 
-        # Parser les données économiques aux ticks de freeze_end
-        econ_df = parser.parse_ticks(
-            ["steamid", "balance", "equipment_value", "cash_spent_this_round",
-             "has_helmet", "has_defuser", "armor_value", "team_num", "active_weapon"],
-            ticks=freeze_ticks
-        )
-
+        # Données économiques aux ticks de freeze_end (décodées par le plan)
         if econ_df is None or len(econ_df) == 0:
             return economy
 
-        # Grouper par tick
-        for i, freeze_tick in enumerate(freeze_ticks):
-            round_num = i + 1
-            tick_data = econ_df[econ_df["tick"] == freeze_tick]
+        # Grouper par tick (une seule passe)
+        players_df = econ_df[snapshot_mask(econ_df)]
+        by_tick = group_by_tick(players_df, build_records(players_df, ECONOMY_PLAYER_FIELDS))
 
-            round_economy = {
-                "round": round_num,
+        for i, freeze_tick in enumerate(freeze_ticks):
+            economy.append({
+                "round": i + 1,
                 "tick": int(freeze_tick),
-                "players": [],
-            }
-
-            for _, row in tick_data.iterrows():
-                steamid = safe_str(row.get("steamid", ""))
-                if not steamid or steamid == "0":
-                    continue
-
-                round_economy["players"].append({
-                    "steamId": steamid,
-                    "balance": safe_int(row.get("balance", 0)),
-                    "equipmentValue": safe_int(row.get("equipment_value", 0)),
-                    "spentThisRound": safe_int(row.get("cash_spent_this_round", 0)),
-                    "hasHelmet": safe_bool(row.get("has_helmet", False)),
-                    "hasDefuser": safe_bool(row.get("has_defuser", False)),
-                    "armorValue": safe_int(row.get("armor_value", 0)),
-                    "team": safe_int(row.get("team_num", 0)),
-                    "weapon": normalize_weapon(row.get("active_weapon", "")),
-                })
-
-            economy.append(round_economy)
+                "players": list(by_tick.get(int(freeze_tick), [])),
+            })
     except Exception as e:
         print(f"Warning: Could not extract economy: {e}", file=sys.stderr)
 
     return economy
 
 
-def extract_item_purchases(parser: DemoParser, round_ticks: List[Tuple[int, int]]) -> List[Dict]:
+PURCHASE_FIELDS = [
+    Field("tick", "tick", "int"),
+    Field("round", kind="computed"),
+    Field("steamId", "user_steamid", "str"),
+    Field("item", "weapon", "weapon"),
+    Field("itemCategory", "weapon", "weaponCategory"),
+    Field("team", "team", "int"),
+]
+
+
+def extract_item_purchases(events: EventBatch, round_index: RoundIndex) -> List[Dict]:
     """Extrait les achats d'items."""
     purchases = []
 
     try:
-        df = parser.parse_event("item_purchase")
+        df = events.get("item_purchase")
         if df is not None and len(df) > 0:
-            for _, row in df.iterrows():
-                tick = safe_int(row.get("tick", 0))
-                round_num = get_round_for_tick(tick, round_ticks)
-
-                item = normalize_weapon(row.get("weapon", ""))
-
-                purchases.append({
-                    "tick": tick,
-                    "round": round_num,
-                    "steamId": safe_str(row.get("user_steamid", "")),
-                    "item": item,
-                    "itemCategory": get_weapon_category(item),
-                    "team": safe_int(row.get("team", 0)),
-                })
+            rounds = round_index.assign(df["tick"]).tolist()
+            purchases = build_records(df, PURCHASE_FIELDS, {"round": rounds})
     except Exception as e:
         print(f"Warning: Could not extract purchases: {e}", file=sys.stderr)
 
     return purchases
 
 
-def extract_player_positions(
-    parser: DemoParser,
-    config: ParserConfig
-) -> List[Dict]:
-    """Extrait les positions continues échantillonnées."""
-    if not config.extract_positions:
-        return []
+POSITION_PLAYER_FIELDS = [
+    Field("steamId", "steamid", "str"),
+    Field("x", "X", "float"),
+    Field("y", "Y", "float"),
+    Field("z", "Z", "float"),
+    Field("velocityX", "velocity_X", "float"),
+    Field("velocityY", "velocity_Y", "float"),
+    Field("velocityZ", "velocity_Z", "float"),
+    Field("speed", kind="computed"),
+    Field("health", "health", "int", default=100),
+    Field("armor", "armor_value", "int"),
+    Field("team", "team_num", "int"),
+    Field("isScoped", "is_scoped", "bool"),
+    Field("isWalking", "is_walking", "bool"),
+    Field("isCrouching", "in_crouch", "bool"),
+    Field("isAirborne", "is_airborne", "bool"),
+    Field("weapon", "active_weapon", "weapon"),
+    Field("balance", "balance", "int"),
+]
+
+
+# Champs continus: suivis par extrapolation en mode adaptive, les autres
+# déclenchent un échantillon dès qu'ils changent
+ADAPTIVE_CONTINUOUS_KEYS = {"x", "y", "z", "velocityX", "velocityY", "velocityZ", "speed"}
 
-    positions = []
 
+def extract_player_positions(
+    context: DemoContext,
+    events: EventBatch,
+    round_index: RoundIndex,
+    config: ParserConfig,
+    tickrate: int,
+    pool: Optional[ExtractionPool] = None
+) -> ChunkedSection:
+    """
+    Extrait les positions continues échantillonnées sur tout le match.
+
+    Rounds échantillonnés de la fin du freeze time à la fin du round, regroupés
+    en fenêtres d'au plus TICK_WINDOW_MAX_TICKS ticks (position_windows): un
+    parse_ticks par fenêtre, redécoupée ensuite par round. Chaque fenêtre est
+    produite dès qu'elle est calculée, la mémoire est bornée par une fenêtre
+    (par thread avec un pool).
+    """
+    return ChunkedSection(iter_position_windows(context, events, round_index, config, tickrate, pool))
+
+
+def iter_position_windows(
+    context: DemoContext,
+    events: EventBatch,
+    round_index: RoundIndex,
+    config: ParserConfig,
+    tickrate: int,
+    pool: Optional[ExtractionPool] = None
+) -> Iterator[List[Dict]]:
+    """Snapshots de positions d'un round à la fois, décodés par fenêtres de rounds."""
     try:
-        # Obtenir tous les ticks disponibles
-        header = parser.parse_header()
-        total_ticks = int(header.get("playback_ticks", 0))
-
-        if total_ticks == 0:
-            return []
-
-        # Générer les ticks à échantillonner
-        sample_ticks = list(range(0, min(total_ticks, config.max_position_ticks), config.position_sample_rate))
-
-        if not sample_ticks:
-            return []
-
-        # Parser les positions
-        pos_df = parser.parse_ticks(
-            ["steamid", "X", "Y", "Z", "velocity_X", "velocity_Y", "velocity_Z",
-             "health", "armor_value", "is_alive", "team_num",
-             "is_scoped", "is_walking", "in_crouch", "is_airborne",
-             "active_weapon", "balance"],
-            ticks=sample_ticks
-        )
-
-        if pos_df is None or len(pos_df) == 0:
-            return []
-
-        # Grouper par tick
-        for tick in sample_ticks:
-            tick_data = pos_df[pos_df["tick"] == tick]
-
-            snapshot = {
-                "tick": tick,
-                "players": [],
-            }
-
-            for _, row in tick_data.iterrows():
-                steamid = safe_str(row.get("steamid", ""))
-                if not steamid or steamid == "0":
-                    continue
-
-                if not safe_bool(row.get("is_alive", True)):
-                    continue
-
-                velocity_x = safe_float(row.get("velocity_X", 0))
-                velocity_y = safe_float(row.get("velocity_Y", 0))
-                speed = (velocity_x**2 + velocity_y**2) ** 0.5
-
-                snapshot["players"].append({
-                    "steamId": steamid,
-                    "x": safe_float(row.get("X")),
-                    "y": safe_float(row.get("Y")),
-                    "z": safe_float(row.get("Z")),
-                    "velocityX": velocity_x,
-                    "velocityY": velocity_y,
-                    "velocityZ": safe_float(row.get("velocity_Z", 0)),
-                    "speed": speed,
-                    "health": safe_int(row.get("health", 100)),
-                    "armor": safe_int(row.get("armor_value", 0)),
-                    "team": safe_int(row.get("team_num", 0)),
-                    "isScoped": safe_bool(row.get("is_scoped", False)),
-                    "isWalking": safe_bool(row.get("is_walking", False)),
-                    "isCrouching": safe_bool(row.get("in_crouch", False)),
-                    "isAirborne": safe_bool(row.get("is_airborne", False)),
-                    "weapon": normalize_weapon(row.get("active_weapon", "")),
-                    "balance": safe_int(row.get("balance", 0)),
-                })
-
-            if snapshot["players"]:
-                positions.append(snapshot)
+        total_ticks = 0
+        if len(round_index) == 0:
+            total_ticks = safe_int(context.header().get("playback_ticks", 0))
+
+        adaptive = config.position_sampling == "adaptive"
+        sample_rate = config.position_sample_rate
+        if adaptive:
+            # Décodage sur la grille dense, la sélection se fait par joueur
+            sample_rate = max(1, sample_rate // ADAPTIVE_GRID_DIVISOR)
+            contacts = contact_events(events)
+
+        def round_snapshots(pos_df: Optional[pd.DataFrame], sample_ticks: np.ndarray) -> SnapshotBatch:
+            if adaptive:
+                return adaptive_position_snapshots(
+                    pos_df, sample_ticks.tolist(), contacts, config, tickrate
+                )
+            return position_snapshots(pos_df, sample_ticks.tolist())
+
+        def position_window(rounds: List[np.ndarray]) -> List[SnapshotBatch]:
+            # Un round partage au plus son premier tick avec la fin du précédent
+            window_df = decode_tick_window(context, POSITION_TICK_PROPS, np.unique(np.concatenate(rounds)))
+            if window_df is None:
+                return [round_snapshots(None, sample_ticks) for sample_ticks in rounds]
+
+            ticks = window_df["tick"]
+            return [
+                round_snapshots(window_df[ticks.between(sample_ticks[0], sample_ticks[-1])], sample_ticks)
+                for sample_ticks in rounds
+            ]
 
+        windows = position_windows(round_index, sample_rate, total_ticks)
+        for snapshots in map_windows(position_window, windows, pool):
+            yield from snapshots
     except Exception as e:
         print(f"Warning: Could not extract positions: {e}", file=sys.stderr)
 
-    return positions
 
+def contact_events(events: EventBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """(ticks, steamids) des joueurs impliqués dans un kill ou des dégâts."""
+    ticks, steamids = [], []
+    for event_name in ["player_death", "player_hurt"]:
+        df = events.get(event_name)
+        if df is None or len(df) == 0:
+            continue
+        for column in ["attacker_steamid", "user_steamid"]:
+            if column in df.columns:
+                ticks.append(np.nan_to_num(np.asarray(df["tick"], dtype=np.float64)).astype(np.int64))
+                steamids.append(key_column(convert_column(df[column], "str", len(df))))
+
+    if not ticks:
+        return np.array([], dtype=np.int64), np.array([], dtype=object)
+    return np.concatenate(ticks), np.concatenate(steamids)
+
+
+def position_records(pos_df: Optional[pd.DataFrame]) -> Tuple[Optional[pd.DataFrame], Optional[RecordBatch]]:
+    """Joueurs vivants et leurs enregistrements de position (alignés)."""
+    if pos_df is None or len(pos_df) == 0:
+        return None, None
+
+    players_df = pos_df[snapshot_mask(pos_df, alive_only=True)]
+    n = len(players_df)
+
+    def velocity(column: str) -> np.ndarray:
+        values = players_df[column] if column in players_df.columns else None
+        return np.array(convert_column(values, "float", n), dtype=np.float64)
+
+    speed = norms(velocity("velocity_X"), velocity("velocity_Y"))
+    return players_df, build_batch(players_df, POSITION_PLAYER_FIELDS, {"speed": speed})
+
+
+def position_snapshots(pos_df: Optional[pd.DataFrame], sample_ticks: List[int]) -> SnapshotBatch:
+    """Snapshots {tick, players} des joueurs vivants aux ticks échantillonnés."""
+    players_df, records = position_records(pos_df)
+    if not records:
+        return SnapshotBatch([], [], RecordBatch([], [], 0))
+
+    # Joueurs vivants, regroupés par tick en une seule passe
+    groups = {int(tick): indices for tick, indices in players_df.groupby("tick", sort=False).indices.items()}
+    return SnapshotBatch.build(records, groups, sample_ticks)
+
+
+def adaptive_position_snapshots(
+    pos_df: Optional[pd.DataFrame],
+    sample_ticks: List[int],
+    contacts: Tuple[np.ndarray, np.ndarray],
+    config: ParserConfig,
+    tickrate: int
+) -> SnapshotBatch:
+    """
+    Snapshots adaptatifs sur une fenêtre décodée à la grille dense.
+
+    À moins de ADAPTIVE_CONTACT_SECONDS d'un kill ou de dégâts, tous les ticks
+    de la grille dense sont retenus pour les joueurs impliqués (attaquant et
+    victime). Ailleurs, seuls les ticks multiples de
+    position_sample_rate sont candidats, et un joueur n'y est retenu que si
+
+    - c'est son premier échantillon de la fenêtre,
+    - un champ discret a changé (arme, santé, scope, accroupi...),
+    - sa position s'écarte de plus de position_error_threshold de
+      l'extrapolation (position + vélocité) de son dernier échantillon,
+    - ou son dernier échantillon date de plus de ADAPTIVE_MAX_GAP_SECONDS.
+    """
+    players_df, batch = position_records(pos_df)
+    if not batch:
+        return SnapshotBatch([], [], RecordBatch([], [], 0))
+
+    # Dicts temporaires pour la sélection, le résultat reste un lot par colonnes
+    records = list(batch)
+    ticks = np.asarray(convert_column(players_df["tick"], "int", len(records)), dtype=np.int64)
+
+    # Échantillons d'un joueur à moins de contact_window d'un de ses contacts
+    contact_window = seconds_to_ticks(ADAPTIVE_CONTACT_SECONDS, tickrate)
+    contact_ticks, contact_steamids = contacts
+    near_contact = np.zeros(len(ticks), dtype=bool)
+    near_idx, _ = window_join(
+        ticks, contact_ticks, -contact_window, contact_window,
+        [key_column([record["steamId"] for record in records])], [contact_steamids]
+    )
+    near_contact[near_idx] = True
 
-def extract_clutch_situations(kills: List[Dict], rounds: List[Dict]) -> List[Dict]:
-    """Identifie les situations de clutch (1vX)."""
-    clutches = []
+    on_grid = ticks % config.position_sample_rate == 0
+    max_gap = seconds_to_ticks(ADAPTIVE_MAX_GAP_SECONDS, tickrate)
+    last: Dict[str, Tuple[int, Dict]] = {}
+    groups: Dict[int, List[int]] = {}
 
-    # Grouper les kills par round
-    kills_by_round = {}
-    for kill in kills:
-        r = kill["round"]
-        if r not in kills_by_round:
-            kills_by_round[r] = []
-        kills_by_round[r].append(kill)
+    for i in np.argsort(ticks, kind="stable").tolist():
+        if not (near_contact[i] or on_grid[i]):
+            continue
 
-    for round_info in rounds:
-        round_num = round_info["roundNumber"]
-        round_kills = kills_by_round.get(round_num, [])
+        record = records[i]
+        tick = int(ticks[i])
+        previous = last.get(record["steamId"])
+
+        keep = previous is None or near_contact[i] or tick - previous[0] >= max_gap
+        if not keep:
+            prev_tick, prev = previous
+            keep = any(record[key] != prev[key] for key in record if key not in ADAPTIVE_CONTINUOUS_KEYS)
+        if not keep:
+            dt = (tick - prev_tick) / tickrate
+            error = (
+                (record["x"] - prev["x"] - prev["velocityX"] * dt) ** 2
+                + (record["y"] - prev["y"] - prev["velocityY"] * dt) ** 2
+                + (record["z"] - prev["z"] - prev["velocityZ"] * dt) ** 2
+            ) ** 0.5
+            keep = error > config.position_error_threshold
+
+        if keep:
+            last[record["steamId"]] = (tick, record)
+            groups.setdefault(tick, []).append(i)
+
+    return SnapshotBatch.build(batch, groups, sample_ticks)
+
+
+class RoundStateMachine:
+    """
+    Joueurs vivants par équipe au fil des morts d'un round.
+
+    Part du roster au freeze_end, retire chaque victime, détecte le premier
+    1vX (une équipe réduite à un joueur face à au moins un adversaire) et
+    compte les kills du joueur en clutch à partir de ce moment.
+    """
+
+    def __init__(self, roster: Dict[str, int]):
+        self.team_of = dict(roster)
+        self.alive = {
+            team: {steamid for steamid, t in roster.items() if t == team}
+            for team in (TEAM_T, TEAM_CT)
+        }
+        self.clutch: Optional[Dict] = None
+        self.clutch_team: Optional[int] = None
+
+    def counts(self) -> Tuple[int, int]:
+        return len(self.alive[TEAM_T]), len(self.alive[TEAM_CT])
+
+    def on_death(self, tick: int, victim: str, victim_team: int, attacker: str) -> None:
+        team = self.team_of.get(victim, victim_team)
+
+        if self.clutch is not None and attacker == self.clutch["steamId"] and team != self.clutch_team:
+            self.clutch["killsInClutch"] += 1
+
+        if team in self.alive:
+            self.alive[team].discard(victim)
+
+        if self.clutch is None:
+            for side, opponents in ((TEAM_T, TEAM_CT), (TEAM_CT, TEAM_T)):
+                if len(self.alive[side]) == 1 and self.alive[opponents]:
+                    self.clutch_team = side
+                    self.clutch = {
+                        "steamId": next(iter(self.alive[side])),
+                        "versus": len(self.alive[opponents]),
+                        "startTick": tick,
+                        "killsInClutch": 0,
+                    }
+                    break
+
+
+def round_rosters(
+    roster_df: Optional[pd.DataFrame],
+    round_index: RoundIndex
+) -> Dict[int, Dict[str, int]]:
+    """Équipe de chaque joueur au freeze_end de chaque round: {round: {steamid: team_num}}."""
+    rosters: Dict[int, Dict[str, int]] = {}
+    if roster_df is None or len(roster_df) == 0:
+        return rosters
+
+    teams = pd.to_numeric(roster_df["team_num"], errors="coerce").fillna(0).astype(np.int64).tolist()
+    round_numbers = round_index.assign(roster_df["tick"]).tolist()
+    for round_num, steamid, team in zip(round_numbers, roster_df["steamid"].tolist(), teams):
+        if team in (TEAM_T, TEAM_CT):
+            rosters.setdefault(round_num, {})[safe_str(steamid)] = team
+    return rosters
+
+
+def extract_round_states(
+    events: EventBatch,
+    round_index: RoundIndex,
+    rounds: List[Dict],
+    roster_df: Optional[pd.DataFrame]
+) -> Dict[str, List[Dict]]:
+    """
+    Machine à états par round, en une passe sur les morts triées:
+    - clutches: 1vX exacts (versus, kills, victoire selon rounds.winner, survie)
+    - manAdvantage: timeline compacte [tick, vivants T, vivants CT] par round,
+      en partant du freeze_end
+    Le roster vient de team_num au freeze_end; à défaut, des équipes des
+    joueurs impliqués dans les morts du round.
+    """
+    clutches = []
+    timelines = []
 
-        if len(round_kills) < 2:
-            continue
+    try:
+        death_df = events.get("player_death")
+        rosters = round_rosters(roster_df, round_index)
+        fallback_rosters: Dict[int, Dict[str, int]] = {}
+
+        deaths_by_round: Dict[int, List[Tuple[int, str, int, str]]] = {}
+        if death_df is not None:
+            ticks = death_df["tick"].to_numpy(dtype=np.int64)
+            victims = [safe_str(v) for v in key_column(death_df["user_steamid"])]
+            attackers = [safe_str(v) for v in key_column(death_df["attacker_steamid"])] \
+                if "attacker_steamid" in death_df.columns else [""] * len(death_df)
+            victim_teams = pd.to_numeric(death_df.get("user_team_num"), errors="coerce") \
+                if "user_team_num" in death_df.columns else pd.Series(np.zeros(len(death_df)))
+            attacker_teams = pd.to_numeric(death_df.get("attacker_team_num"), errors="coerce") \
+                if "attacker_team_num" in death_df.columns else pd.Series(np.zeros(len(death_df)))
+            victim_teams = victim_teams.fillna(0).astype(np.int64).tolist()
+            attacker_teams = attacker_teams.fillna(0).astype(np.int64).tolist()
+            round_numbers = round_index.assign(ticks).tolist()
+
+            for i in np.argsort(ticks, kind="stable").tolist():
+                round_num = round_numbers[i]
+                deaths_by_round.setdefault(round_num, []).append(
+                    (int(ticks[i]), victims[i], victim_teams[i], attackers[i])
+                )
+                # Roster de repli: joueurs impliqués dans les morts du round
+                fallback = fallback_rosters.setdefault(round_num, {})
+                for steamid, team in ((victims[i], victim_teams[i]), (attackers[i], attacker_teams[i])):
+                    if steamid and team in (TEAM_T, TEAM_CT):
+                        fallback.setdefault(steamid, team)
+
+        for round_info in sorted(rounds, key=lambda r: r["tick"]):
+            round_num = round_info["roundNumber"]
+            roster = rosters.get(round_num) or fallback_rosters.get(round_num)
+            if not roster:
+                continue
+
+            bounds = round_index.bounds(round_num)
+            machine = RoundStateMachine(roster)
+            timeline = [[bounds["freezeEnd"] if bounds else round_info["tick"], *machine.counts()]]
+
+            for tick, victim, victim_team, attacker in deaths_by_round.get(round_num, []):
+                machine.on_death(tick, victim, victim_team, attacker)
+                entry = [tick, *machine.counts()]
+                if timeline[-1][0] == tick:
+                    timeline[-1] = entry
+                else:
+                    timeline.append(entry)
 
-        # Trier par tick
-        round_kills.sort(key=lambda k: k["tick"])
+            timelines.append({"round": round_num, "timeline": timeline})
 
-        # Tracker les joueurs morts par équipe
-        team_deaths = {2: set(), 3: set()}  # CT=2, T=3
-
-        for i, kill in enumerate(round_kills):
-            victim_id = kill["victimSteamId"]
-
-            # Determiner l'équipe de la victime (approximation basée sur le tueur)
-            # En pratique, il faudrait le team de la victime
-            attacker_id = kill["attackerSteamId"]
-
-            # Compter les joueurs restants après ce kill
-            remaining_after_kill = len(round_kills) - i - 1
-
-            # Détecter un clutch potentiel (simplifié)
-            if remaining_after_kill >= 2:
-                # Le tueur de ce kill pourrait être en clutch
-                later_kills_by_same = [
-                    k for k in round_kills[i+1:]
-                    if k["attackerSteamId"] == attacker_id
-                ]
-
-                if len(later_kills_by_same) >= 2:
-                    clutches.append({
-                        "round": round_num,
-                        "steamId": attacker_id,
-                        "killsInClutch": len(later_kills_by_same) + 1,
-                        "startTick": kill["tick"],
-                        "won": True,  # Simplifié
-                    })
-                    break  # Un seul clutch par round
+            if machine.clutch is not None:
+                winner_team = WINNER_TEAM_NUM.get(round_info["winner"])
+                clutches.append({
+                    "round": round_num,
+                    **machine.clutch,
+                    "won": winner_team == machine.clutch_team,
+                    "survived": machine.clutch["steamId"] in machine.alive[machine.clutch_team],
+                })
+    except Exception as e:
+        print(f"Warning: Could not extract round states: {e}", file=sys.stderr)
 
-    return clutches
+    return {"clutches": clutches, "manAdvantage": timelines}
 
 
 def extract_entry_duels(kills: List[Dict]) -> List[Dict]:
@@ -889,115 +2217,1677 @@ def extract_entry_duels(kills: List[Dict]) -> List[Dict]:
     return entries
 
 
-def extract_trades(kills: List[Dict]) -> List[Dict]:
-    """Identifie les trades (morts vengées rapidement)."""
+def extract_trades(kills: List[Dict], tickrate: int) -> List[Dict]:
+    """
+    Identifie les trades (morts vengées rapidement): pour chaque kill, le
+    premier kill suivant du même round, dans la fenêtre, dont la victime est
+    le tueur original.
+    """
     trades = []
-    trade_window = 3.0  # 3 secondes
-    ticks_per_second = 128  # Approximation
+    if not kills:
+        return trades
 
-    # Trier par round et tick
-    sorted_kills = sorted(kills, key=lambda k: (k["round"], k["tick"]))
+    rounds = np.array([k["round"] for k in kills], dtype=np.int64)
+    ticks = np.array([k["tick"] for k in kills], dtype=np.int64)
+    attackers = [k["attackerSteamId"] for k in kills]
+    victims = [k["victimSteamId"] for k in kills]
 
-    for i, kill in enumerate(sorted_kills):
-        # Chercher si ce kill a été trade
-        for j in range(i + 1, len(sorted_kills)):
-            trade_kill = sorted_kills[j]
+    # Rang dans l'ordre (round, tick): un trade est un kill strictement après
+    rank = np.empty(len(kills), dtype=np.int64)
+    rank[np.lexsort((ticks, rounds))] = np.arange(len(kills))
 
-            # Même round
-            if trade_kill["round"] != kill["round"]:
-                break
+    left, right = window_join(
+        ticks, ticks, 0, seconds_to_ticks(TRADE_WINDOW_SECONDS, tickrate),
+        left_keys=[attackers, rounds], right_keys=[victims, rounds],
+    )
+    later = rank[right] > rank[left]
+    left, right = left[later], right[later]
+
+    # Premier trade par kill (plus petit rang)
+    first = {}
+    for i, j in zip(left.tolist(), right.tolist()):
+        if i not in first or rank[j] < rank[first[i]]:
+            first[i] = j
+
+    for i in sorted(first, key=lambda index: rank[index]):
+        kill, trade_kill = kills[i], kills[first[i]]
+        trades.append({
+            "round": kill["round"],
+            "originalKillTick": kill["tick"],
+            "tradeTick": trade_kill["tick"],
+            "timeToTrade": (trade_kill["tick"] - kill["tick"]) / tickrate,
+            "originalVictimId": kill["victimSteamId"],
+            "originalKillerId": kill["attackerSteamId"],
+            "traderId": trade_kill["attackerSteamId"],
+        })
 
-            # Dans la fenêtre de temps
-            tick_diff = trade_kill["tick"] - kill["tick"]
-            time_diff = tick_diff / ticks_per_second
+    return trades
 
-            if time_diff > trade_window:
-                break
 
-            # Le tueur original est mort
-            if trade_kill["victimSteamId"] == kill["attackerSteamId"]:
-                trades.append({
-                    "round": kill["round"],
-                    "originalKillTick": kill["tick"],
-                    "tradeTick": trade_kill["tick"],
-                    "timeToTrade": time_diff,
-                    "originalVictimId": kill["victimSteamId"],
-                    "originalKillerId": kill["attackerSteamId"],
-                    "traderId": trade_kill["attackerSteamId"],
+def extract_flash_assists(events: EventBatch, round_index: RoundIndex, tickrate: int) -> List[Dict]:
+    """
+    Kills assistés par flash: la victime était aveuglée par un adversaire
+    (autre que le tueur) au moment de sa mort. La flash la plus récente est retenue.
+    """
+    assists = []
+
+    try:
+        death_df = events.get("player_death")
+        blind_df = events.get("player_blind")
+        if death_df is None or blind_df is None:
+            return assists
+
+        left, right = window_join(
+            death_df["tick"], blind_df["tick"],
+            -seconds_to_ticks(FLASH_ASSIST_WINDOW_SECONDS, tickrate), 0,
+            left_keys=[death_df["user_steamid"]], right_keys=[blind_df["user_steamid"]],
+        )
+
+        death_ticks = death_df["tick"].to_numpy(dtype=np.int64)
+        blind_ticks = blind_df["tick"].to_numpy(dtype=np.int64)
+        durations = pd.to_numeric(blind_df["blind_duration"], errors="coerce").fillna(0).to_numpy()
+        flashers = key_column(blind_df["attacker_steamid"])
+        killers = key_column(death_df["attacker_steamid"]) if "attacker_steamid" in death_df.columns \
+            else np.full(len(death_df), None, dtype=object)
+
+        # Victime encore aveuglée, flash lancée par un autre que le tueur
+        keep = (
+            (death_ticks[left] <= blind_ticks[right] + durations[right] * tickrate)
+            & (flashers[right] != None)  # noqa: E711 (comparaison élément par élément)
+            & (flashers[right] != killers[left])
+        )
+
+        # Flash adverse uniquement quand les équipes sont connues
+        if "attacker_team_num" in blind_df.columns and "user_team_num" in blind_df.columns:
+            flasher_teams = blind_df["attacker_team_num"].to_numpy(dtype=object)
+            victim_teams = blind_df["user_team_num"].to_numpy(dtype=object)
+            keep &= flasher_teams[right] != victim_teams[right]
+
+        left, right = left[keep], right[keep]
+
+        # Paires ordonnées par tick de flash: la dernière par mort est la plus récente
+        latest = dict(zip(left.tolist(), right.tolist()))
+
+        round_numbers = round_index.assign(death_df["tick"]).tolist()
+        for i in sorted(latest):
+            j = latest[i]
+            assists.append({
+                "round": round_numbers[i],
+                "killTick": int(death_ticks[i]),
+                "killerSteamId": safe_str(killers[i]),
+                "victimSteamId": safe_str(death_df["user_steamid"].iat[i]),
+                "flasherSteamId": safe_str(flashers[j]),
+                "blindTick": int(blind_ticks[j]),
+                "blindDuration": float(durations[j]),
+                "timeBlindToKill": (int(death_ticks[i]) - int(blind_ticks[j])) / tickrate,
+            })
+    except Exception as e:
+        print(f"Warning: Could not extract flash assists: {e}", file=sys.stderr)
+
+    return assists
+
+
+def extract_damage_before_death(events: EventBatch, round_index: RoundIndex, tickrate: int) -> List[Dict]:
+    """
+    Dégâts reçus par chaque victime dans les secondes précédant sa mort,
+    agrégés par attaquant (trié par dégâts décroissants).
+    """
+    records = []
+
+    try:
+        death_df = events.get("player_death")
+        hurt_df = events.get("player_hurt")
+        if death_df is None:
+            return records
+
+        left = right = np.empty(0, dtype=np.int64)
+        if hurt_df is not None:
+            left, right = window_join(
+                death_df["tick"], hurt_df["tick"],
+                -seconds_to_ticks(DAMAGE_BEFORE_DEATH_SECONDS, tickrate), 0,
+                left_keys=[death_df["user_steamid"]], right_keys=[hurt_df["user_steamid"]],
+            )
+
+        by_death: Dict[int, List[Dict]] = {}
+        first_ticks: Dict[int, int] = {}
+        if len(left):
+            pairs = pd.DataFrame({
+                "death": left,
+                "attacker": key_column(hurt_df["attacker_steamid"].to_numpy()[right]),
+                "damage": pd.to_numeric(hurt_df["dmg_health"], errors="coerce").fillna(0).to_numpy()[right],
+                "tick": hurt_df["tick"].to_numpy(dtype=np.int64)[right],
+            })
+            pairs["attacker"] = pairs["attacker"].fillna("")
+
+            first_ticks = pairs.groupby("death")["tick"].min().to_dict()
+            grouped = pairs.groupby(["death", "attacker"], sort=False).agg(
+                damage=("damage", "sum"), hits=("damage", "size")
+            ).reset_index().sort_values(["death", "damage"], ascending=[True, False], kind="stable")
+
+            for death, attacker, damage, hits in grouped.itertuples(index=False):
+                by_death.setdefault(death, []).append({
+                    "steamId": attacker,
+                    "damage": int(damage),
+                    "hits": int(hits),
                 })
+
+        death_ticks = death_df["tick"].to_numpy(dtype=np.int64)
+        killers = key_column(death_df["attacker_steamid"]) if "attacker_steamid" in death_df.columns \
+            else np.full(len(death_df), None, dtype=object)
+        round_numbers = round_index.assign(death_df["tick"]).tolist()
+
+        for i in range(len(death_df)):
+            attackers = by_death.get(i, [])
+            records.append({
+                "round": round_numbers[i],
+                "tick": int(death_ticks[i]),
+                "victimSteamId": safe_str(death_df["user_steamid"].iat[i]),
+                "killerSteamId": safe_str(killers[i]),
+                "totalDamage": sum(a["damage"] for a in attackers),
+                "hits": sum(a["hits"] for a in attackers),
+                "firstDamageTick": int(first_ticks[i]) if i in first_ticks else None,
+                "attackers": attackers,
+            })
+    except Exception as e:
+        print(f"Warning: Could not extract damage before death: {e}", file=sys.stderr)
+
+    return records
+
+
+# =============================================================================
+# INSTRUMENTATION
+# =============================================================================
+
+def peak_rss_kb() -> int:
+    """Pic de mémoire résidente du processus (Ko sous Linux, 0 si indisponible)."""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Timings:
+    """
+    Mesures par étape pour parsingStats.timings.
+
+    Pour chaque étape: durée réelle (wallMs), temps CPU (cpuMs) et pic de
+    mémoire résidente du processus atteint à la fin de l'étape (rssHighWaterKb):
+    un niveau haut global qui ne redescend jamais, pas la consommation de
+    l'étape. Avec tracemalloc actif (--profile), peakAllocKb est le pic de
+    mémoire allouée par Python pendant l'étape au-dessus de son niveau de
+    départ. Une étape mesurée plusieurs fois (ex: sérialisation section par
+    section) cumule les durées et garde le plus grand pic.
+
+    Les étapes en cours (imbriquées, sur plusieurs threads avec un pool, ou
+    d'autres instances) partagent le pic de tracemalloc, global au processus:
+    avant chaque reset_peak, le pic courant est reporté sur toutes les étapes
+    ouvertes, qui voient donc aussi les allocations des autres threads.
+    """
+
+    # [niveau de départ, pic vu] de chaque étape en cours, toutes instances confondues
+    _open: List[List[int]] = []
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, float]] = {}
+
+    def _traced_peak_start(self) -> Optional[List[int]]:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return None
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for span in self._open:
+                span[1] = max(span[1], peak)
+            tracemalloc.reset_peak()
+            span = [current, current]
+            self._open.append(span)
+            return span
+
+    def _traced_peak_end(self, span: List[int]) -> int:
+        import tracemalloc
+        with self._lock:
+            self._open.remove(span)
+            if not tracemalloc.is_tracing():
+                return span[1] - span[0]
+            _, peak = tracemalloc.get_traced_memory()
+            return max(span[1], peak) - span[0]
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        span = self._traced_peak_start()
+        try:
+            yield
+        finally:
+            step = self.steps.setdefault(name, {"wallMs": 0.0, "cpuMs": 0.0, "rssHighWaterKb": 0})
+            step["wallMs"] = round(step["wallMs"] + (time.perf_counter() - wall_start) * 1000, 3)
+            step["cpuMs"] = round(step["cpuMs"] + (time.process_time() - cpu_start) * 1000, 3)
+            step["rssHighWaterKb"] = max(step["rssHighWaterKb"], peak_rss_kb())
+            if span is not None:
+                peak_kb = round(self._traced_peak_end(span) / 1024, 1)
+                step["peakAllocKb"] = max(step.get("peakAllocKb", 0), peak_kb)
+
+
+@contextmanager
+def profiled(base_path: Optional[str]) -> Iterator[None]:
+    """
+    Profile le bloc si base_path est fourni: écrit <base_path>.prof (cProfile,
+    lisible avec pstats/snakeviz) et <base_path>.memory.txt (top tracemalloc).
+    """
+    if not base_path:
+        yield
+        return
+
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(f"{base_path}.prof")
+        with open(f"{base_path}.memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB\n\n")
+            for stat in snapshot.statistics("lineno")[:50]:
+                f.write(f"{stat}\n")
+
+
+# =============================================================================
+# REGISTRE DES EXTRACTEURS
+# =============================================================================
+
+@dataclass(frozen=True)
+class Extractor:
+    """
+    Extracteur d'une section du document.
+
+    - requires: sections calculées avant (et conservées pour) cet extracteur
+    - events / player_props: événements à inclure dans le parse_events groupé
+      (events: tuple, ou fonction de la config quand ils dépendent d'une option)
+    - plan: enregistre dans le TickPlan les ticks nécessaires (après fetch)
+    - enabled: option de ParserConfig qui désactive la section
+    - options: champs de ParserConfig dont dépend le résultat (tuple, ou
+      fonction de la config), repris dans la clé du cache
+    - internal: résultat partagé entre extracteurs, absent du document
+    """
+    name: str
+    run: Callable[["ExtractionState"], Any]
+    requires: Tuple[str, ...] = ()
+    events: Union[Tuple[str, ...], Callable[[ParserConfig], Tuple[str, ...]]] = ()
+    player_props: Tuple[str, ...] = ()
+    plan: Optional[Callable[["ExtractionState"], None]] = None
+    enabled: Optional[Callable[[ParserConfig], bool]] = None
+    options: Union[Tuple[str, ...], Callable[[ParserConfig], Tuple[str, ...]]] = ()
+    internal: bool = False
+
+    def required_events(self, config: ParserConfig) -> Tuple[str, ...]:
+        """Événements à décoder pour cette configuration."""
+        return self.events(config) if callable(self.events) else self.events
+
+    def config_options(self, config: ParserConfig) -> Tuple[str, ...]:
+        """Champs de la config qui modifient le résultat pour cette configuration."""
+        return self.options(config) if callable(self.options) else self.options
+
+
+class ExtractionState:
+    """
+    État partagé par les extracteurs d'une démo.
+
+    compute() exécute un extracteur une seule fois; seules les sections dont
+    dépend un autre extracteur restent en mémoire, les autres sont produites
+    puis libérées. Une section découpée (ChunkedSection) est calculée au fil
+    de sa sérialisation: sa mesure et son compteur cumulent sur ses morceaux.
+    Avec un pool (extract_workers), compute_all calcule les extracteurs
+    indépendants en parallèle.
+    """
+
+    def __init__(
+        self,
+        context: DemoContext,
+        config: ParserConfig,
+        retained: set,
+        timings: Optional[Timings] = None,
+        pool: Optional[ExtractionPool] = None
+    ):
+        self.context = context
+        self.pool = pool
+        self.config = config
+        self.retained = retained
+        self.events = EventBatch()
+        self.tick_plan = TickPlan()
+        self.sections: Dict[str, Any] = {}
+        self.counts: Dict[str, int] = {}
+        self.timings = timings or Timings()
+        self._round_index: Optional[RoundIndex] = None
+
+    @property
+    def round_index(self) -> RoundIndex:
+        if self._round_index is None:
+            freeze_df = self.events.get("round_freeze_end")
+            self._round_index = RoundIndex(
+                self.compute("rounds"),
+                freeze_df["tick"].values if freeze_df is not None else None
+            )
+        return self._round_index
+
+    @property
+    def tickrate(self) -> int:
+        """Tickrate réel de la démo (métadonnées), 64 par défaut."""
+        return self.compute("metadata").get("tickrate") or 64
+
+    def compute(self, name: str) -> Any:
+        """Résultat d'un extracteur (mémorisé s'il est une dépendance)."""
+        if name in self.sections:
+            return self.sections[name]
+
+        # Dépendances d'abord, pour que chaque mesure ne couvre que son extracteur
+        for dependency in EXTRACTORS[name].requires:
+            self.compute(dependency)
+
+        with self.timings.measure(name):
+            value = EXTRACTORS[name].run(self)
+        if isinstance(value, ChunkedSection):
+            value = ChunkedSection(self.stream(name, value))
+            if name in self.retained:
+                value = list(value.rows())
+        elif isinstance(value, (list,) + ROW_BATCHES):
+            self.counts[name] = len(value)
+        if name in self.retained:
+            self.sections[name] = value
+        return value
+
+    def compute_after(self, name: str, dependencies: List[Any]) -> Any:
+        """compute(name) une fois les futures de ses dépendances terminées."""
+        for dependency in dependencies:
+            dependency.result()
+        return self.compute(name)
+
+    def compute_all(self, names: List[str], needed: List[str]) -> Iterator[Tuple[str, Any]]:
+        """
+        (nom, résultat) de chaque section de names, dans cet ordre.
+
+        Avec un pool, les extracteurs nécessaires sont soumis d'emblée dans
+        l'ordre du registre: une dépendance est soumise (et démarre) avant ses
+        dépendants, qui attendent son résultat. Les durées par extracteur
+        restent exactes; cpuMs et peakAllocKb couvrent alors tous les threads.
+        """
+        if self.pool is None:
+            for name in names:
+                yield name, self.compute(name)
+            return
+
+        # Index des rounds partagé, construit une seule fois avant les threads
+        if "rounds" in needed:
+            self.round_index
+
+        futures = {}
+        for name in needed:
+            if name not in self.sections:
+                dependencies = [futures[dep] for dep in EXTRACTORS[name].requires if dep in futures]
+                futures[name] = self.pool.submit(self.compute_after, name, dependencies)
+
+        for name in names:
+            yield name, futures[name].result() if name in futures else self.sections[name]
+
+    def stream(self, name: str, chunks: ChunkedSection) -> Iterator[List[Dict]]:
+        """Morceaux d'une section découpée, mesurés et comptés au fil de la sérialisation."""
+        self.counts[name] = 0
+        while True:
+            with self.timings.measure(name):
+                chunk = next(chunks.chunks, None)
+            if chunk is None:
+                return
+            self.counts[name] += len(chunk)
+            yield chunk
+
+
+def plan_kill_ticks(state: ExtractionState) -> None:
+    death_df = state.events.get("player_death")
+    if death_df is not None:
+        state.tick_plan.register("kills", KILL_TICK_PROPS, death_df["tick"].unique())
+
+
+def plan_economy_ticks(state: ExtractionState) -> None:
+    freeze_df = state.events.get("round_freeze_end")
+    if freeze_df is not None:
+        state.tick_plan.register("economy", ECONOMY_TICK_PROPS, freeze_df["tick"].values)
+
+
+def plan_roster_ticks(state: ExtractionState) -> None:
+    round_index = state.round_index
+    if len(round_index):
+        state.tick_plan.register("rosters", ["team_num"], round_index.freeze_end_ticks)
+
+
+# Ordre du registre = ordre des sections dans le document
+EXTRACTORS: Dict[str, Extractor] = {extractor.name: extractor for extractor in [
+    Extractor(
+        "metadata",
+        run=lambda state: extract_metadata(state.context),
+    ),
+    Extractor(
+        "players",
+        run=lambda state: extract_players(state.tick_plan.get("players"), state.events),
+        events=("player_death",),
+        player_props=("team_num",),
+        plan=lambda state: state.tick_plan.register("players", PLAYER_TICK_PROPS),
+    ),
+    Extractor(
+        "rounds",
+        run=lambda state: extract_rounds(state.events),
+        events=("round_end", "round_freeze_end"),
+    ),
+    Extractor(
+        "kills",
+        run=lambda state: extract_kills(
+            state.events, state.round_index, state.tick_plan.get("kills"), state.tickrate
+        ),
+        requires=("rounds", "metadata"),
+        events=("player_death",),
+        player_props=("team_num",),
+        plan=plan_kill_ticks,
+    ),
+    Extractor(
+        "damages",
+        run=lambda state: extract_damages(state.events, state.round_index),
+        requires=("rounds",),
+        events=("player_hurt",),
+    ),
+    Extractor(
+        "grenades",
+        run=lambda state: extract_grenades(state.events, state.round_index),
+        requires=("rounds",),
+        events=tuple(event_name for event_name, _ in GRENADE_EVENTS),
+    ),
+    Extractor(
+        "playerBlinds",
+        run=lambda state: extract_player_blinds(state.events, state.round_index),
+        requires=("rounds",),
+        events=("player_blind",),
+    ),
+    Extractor(
+        "bombEvents",
+        run=lambda state: extract_bomb_events(state.events, state.round_index),
+        requires=("rounds",),
+        events=tuple(event_name for event_name, _ in BOMB_EVENTS),
+    ),
+    Extractor(
+        "economyByRound",
+        run=lambda state: extract_economy_by_round(
+            state.events, state.compute("rounds"), state.tick_plan.get("economy")
+        ),
+        requires=("rounds",),
+        events=("round_freeze_end",),
+        plan=plan_economy_ticks,
+    ),
+    Extractor(
+        "purchases",
+        run=lambda state: extract_item_purchases(state.events, state.round_index),
+        requires=("rounds",),
+        events=("item_purchase",),
+    ),
+    Extractor(
+        "weaponFires",
+        run=lambda state: extract_weapon_fires(
+            state.context, state.events, state.round_index, state.tickrate, pool=state.pool
+        ),
+        requires=("rounds", "metadata"),
+        events=("weapon_fire",),
+        enabled=lambda config: config.extract_weapon_fires,
+    ),
+    Extractor(
+        "positions",
+        run=lambda state: extract_player_positions(
+            state.context, state.events, state.round_index, state.config, state.tickrate, state.pool
+        ),
+        requires=("rounds", "metadata"),
+        # Contacts (kills, dégâts): seulement pour l'échantillonnage adaptive
+        events=lambda config: ("player_death", "player_hurt") if config.position_sampling == "adaptive" else (),
+        enabled=lambda config: config.extract_positions,
+        options=lambda config: ("position_sample_rate", "position_sampling") + (
+            ("position_error_threshold",) if config.position_sampling == "adaptive" else ()
+        ),
+    ),
+    Extractor(
+        "roundStates",
+        run=lambda state: extract_round_states(
+            state.events, state.round_index, state.compute("rounds"), state.tick_plan.get("rosters")
+        ),
+        requires=("rounds",),
+        events=("player_death",),
+        player_props=("team_num",),
+        plan=plan_roster_ticks,
+        internal=True,
+    ),
+    Extractor(
+        "clutches",
+        run=lambda state: state.compute("roundStates")["clutches"],
+        requires=("roundStates",),
+    ),
+    Extractor(
+        "entryDuels",
+        run=lambda state: extract_entry_duels(state.compute("kills")),
+        requires=("kills",),
+    ),
+    Extractor(
+        "trades",
+        run=lambda state: extract_trades(state.compute("kills"), state.tickrate),
+        requires=("kills", "metadata"),
+    ),
+    Extractor(
+        "flashAssists",
+        run=lambda state: extract_flash_assists(state.events, state.round_index, state.tickrate),
+        requires=("rounds", "metadata"),
+        events=("player_death", "player_blind"),
+        player_props=("team_num",),
+    ),
+    Extractor(
+        "manAdvantage",
+        run=lambda state: state.compute("roundStates")["manAdvantage"],
+        requires=("roundStates",),
+    ),
+    Extractor(
+        "damageBeforeDeath",
+        run=lambda state: extract_damage_before_death(state.events, state.round_index, state.tickrate),
+        requires=("rounds", "metadata"),
+        events=("player_death", "player_hurt"),
+    ),
+]}
+
+# Sections du document (hors résultats internes)
+OUTPUT_SECTIONS = [name for name, extractor in EXTRACTORS.items() if not extractor.internal]
+
+# Compteurs de parsingStats: clé → section
+PARSING_STATS_COUNTS = [
+    ("totalKills", "kills"),
+    ("totalDamages", "damages"),
+    ("totalGrenades", "grenades"),
+    ("totalBlinds", "playerBlinds"),
+    ("totalBombEvents", "bombEvents"),
+    ("totalWeaponFires", "weaponFires"),
+    ("totalPositionSnapshots", "positions"),
+    ("totalPurchases", "purchases"),
+]
+
+
+def resolve_sections(config: ParserConfig) -> Tuple[List[str], List[str]]:
+    """
+    Résout les sections demandées.
+    Retourne (sections produites, extracteurs à exécuter), dans l'ordre du registre.
+    """
+    requested = config.sections if config.sections is not None else list(OUTPUT_SECTIONS)
+
+    unknown = [name for name in requested if name not in OUTPUT_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+
+    wanted = {
+        name for name in requested
+        if EXTRACTORS[name].enabled is None or EXTRACTORS[name].enabled(config)
+    }
+
+    # Fermeture transitive des dépendances
+    needed = set()
+    pending = list(wanted)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(EXTRACTORS[name].requires)
+
+    selected = [name for name in EXTRACTORS if name in wanted]
+    return selected, [name for name in EXTRACTORS if name in needed]
+
+
+# =============================================================================
+# FORMATS DE SORTIE
+# =============================================================================
+
+# Colonnes des sections volumineuses en format colonnaire: nom → chemin dans la ligne
+COLUMNAR_LAYOUTS = {
+    "positions": [
+        ("tick", ("tick",)),
+        ("steamId", ("steamId",)),
+        ("x", ("x",)), ("y", ("y",)), ("z", ("z",)),
+        ("velocityX", ("velocityX",)), ("velocityY", ("velocityY",)), ("velocityZ", ("velocityZ",)),
+        ("speed", ("speed",)),
+        ("health", ("health",)), ("armor", ("armor",)), ("team", ("team",)),
+        ("isScoped", ("isScoped",)), ("isWalking", ("isWalking",)),
+        ("isCrouching", ("isCrouching",)), ("isAirborne", ("isAirborne",)),
+        ("weapon", ("weapon",)), ("balance", ("balance",)),
+    ],
+    "weaponFires": [
+        ("tick", ("tick",)), ("round", ("round",)),
+        ("steamId", ("steamId",)),
+        ("weapon", ("weapon",)), ("weaponCategory", ("weaponCategory",)),
+        ("silencer", ("silencer",)),
+        ("x", ("position", "x")), ("y", ("position", "y")), ("z", ("position", "z")),
+        ("velocityX", ("velocity", "x")), ("velocityY", ("velocity", "y")), ("velocityZ", ("velocity", "z")),
+        ("speed", ("speed",)),
+        ("yaw", ("viewAngles", "yaw")), ("pitch", ("viewAngles", "pitch")),
+        ("isScoped", ("isScoped",)), ("isCrouching", ("isCrouching",)), ("isAirborne", ("isAirborne",)),
+        ("isMoving", ("isMoving",)), ("isCounterStrafed", ("isCounterStrafed",)),
+    ],
+}
+
+
+def format_version(output_format: str, string_tables: bool = False) -> str:
+    """Marqueur de version du document selon le format de sortie."""
+    version = PARSER_VERSION if output_format == "json" else f"{PARSER_VERSION}-{output_format}"
+    return f"{version}-strings" if string_tables else version
+
+
+def section_rows(name: str, value: List[Dict]) -> Iterator[Dict]:
+    """Lignes à plat d'une section (un joueur par ligne pour les positions)."""
+    if isinstance(value, ChunkedSection):
+        value = value.rows()
+
+    if name == "positions":
+        for snapshot in value:
+            for player in snapshot["players"]:
+                yield {"tick": snapshot["tick"], **player}
+    else:
+        yield from value
+
+
+def rows_to_columns(name: str, value: List[Dict]) -> Dict[str, List[Any]]:
+    """Convertit une section en struct-of-arrays {colonne: [valeurs]}."""
+    layout = COLUMNAR_LAYOUTS[name]
+    columns = {column: [] for column, _ in layout}
+    appenders = [(columns[column].append, path) for column, path in layout]
+
+    for row in section_rows(name, value):
+        for append, path in appenders:
+            item = row
+            for key in path:
+                item = item[key]
+            append(item)
+
+    return columns
+
+
+# Format tracks: colonnes quantifiées et codées en deltas (valeur = entier / échelle),
+# les autres colonnes en run-length; speed est recalculée au décodage
+TRACK_KEY = "steamId"
+TRACK_DELTA_SCALES = {
+    "tick": 1,
+    "x": 1, "y": 1, "z": 1,
+    "velocityX": 1, "velocityY": 1, "velocityZ": 1,
+    "yaw": 100, "pitch": 100,
+}
+TRACK_DERIVED = {"speed"}
+
+
+def delta_encode(values: List[float], scale: int) -> List[int]:
+    """[q0, q1 - q0, q2 - q1, ...] avec qi = round(vi * scale)."""
+    quantized = np.rint(np.asarray(values, dtype=np.float64) * scale).astype(np.int64)
+    return np.diff(quantized, prepend=0).tolist()
+
+
+def delta_decode(deltas: List[int], scale: int) -> List[float]:
+    """Inverse de delta_encode (à la quantification près)."""
+    quantized = np.cumsum(np.asarray(deltas, dtype=np.int64))
+    return quantized.tolist() if scale == 1 else (quantized / scale).tolist()
+
+
+def rle_encode(values: List[Any]) -> List[List[Any]]:
+    """[[valeur, répétitions], ...]"""
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+def rle_decode(runs: List[List[Any]]) -> List[Any]:
+    """Inverse de rle_encode."""
+    return [value for value, count in runs for _ in range(count)]
+
+
+def encode_tracks(name: str, value: Any) -> Dict:
+    """
+    Encode une section volumineuse (positions, weaponFires) en pistes par joueur.
+
+    Spécification (décodeurs: decode_tracks ici, decodeTrackSection côté TS):
+    {"format": "tracks", "rows": n,
+     "encoding": {colonne: {"codec": "delta", "scale": s} | {"codec": "rle"}},
+     "derived": ["speed"],
+     "tracks": [{"steamId": id, "rows": k, "columns": {colonne: données}}]}
+    - delta: entiers [q0, q1 - q0, ...]; valeur i = (somme des i+1 premiers) / scale
+    - rle: [[valeur, répétitions], ...]
+    - speed = sqrt(velocityX² + velocityY²), recalculée depuis les vélocités
+    Les colonnes sont celles de COLUMNAR_LAYOUTS (sauf steamId et speed). Les
+    pistes sont dans l'ordre d'apparition des joueurs; les lignes d'origine se
+    retrouvent en fusionnant les pistes par tick (tri stable, piste par piste).
+    Les lignes d'un même tick sortent dans l'ordre des pistes: pour
+    weaponFires, des tirs simultanés de joueurs différents peuvent donc être
+    permutés (l'ordre de chaque joueur est conservé).
+    """
+    columns = rows_to_columns(name, value)
+    keys = columns.pop(TRACK_KEY)
+    for column in TRACK_DERIVED:
+        columns.pop(column, None)
+
+    indices: Dict[Any, List[int]] = {}
+    for i, key in enumerate(keys):
+        indices.setdefault(key, []).append(i)
+
+    tracks = []
+    for key, rows in indices.items():
+        encoded = {}
+        for column, values in columns.items():
+            picked = [values[i] for i in rows]
+            if column in TRACK_DELTA_SCALES:
+                encoded[column] = delta_encode(picked, TRACK_DELTA_SCALES[column])
+            else:
+                encoded[column] = rle_encode(picked)
+        tracks.append({TRACK_KEY: key, "rows": len(rows), "columns": encoded})
+
+    return {
+        "format": "tracks",
+        "rows": len(keys),
+        "encoding": {
+            column: {"codec": "delta", "scale": TRACK_DELTA_SCALES[column]}
+            if column in TRACK_DELTA_SCALES else {"codec": "rle"}
+            for column in columns
+        },
+        "derived": sorted(TRACK_DERIVED & {column for column, _ in COLUMNAR_LAYOUTS[name]}),
+        "tracks": tracks,
+    }
+
+
+def decode_tracks(name: str, value: Dict) -> List[Dict]:
+    """Reconstruit une section encodée par encode_tracks (forme JSON d'origine)."""
+    flat = []
+    for track in value["tracks"]:
+        columns = {}
+        for column, data in track["columns"].items():
+            codec = value["encoding"][column]
+            columns[column] = delta_decode(data, codec["scale"]) if codec["codec"] == "delta" else rle_decode(data)
+        for i in range(track["rows"]):
+            row = {TRACK_KEY: track[TRACK_KEY], **{column: values[i] for column, values in columns.items()}}
+            if "speed" in value.get("derived", []):
+                row["speed"] = (row["velocityX"] ** 2 + row["velocityY"] ** 2) ** 0.5
+            flat.append(row)
+
+    # Fusion des pistes par tick (tri stable)
+    flat.sort(key=lambda row: row["tick"])
+
+    layout = COLUMNAR_LAYOUTS[name]
+    if name == "positions":
+        snapshots: Dict[int, List[Dict]] = {}
+        for row in flat:
+            snapshots.setdefault(row["tick"], []).append(
+                {column: row[column] for column, _ in layout if column != "tick"}
+            )
+        return [{"tick": tick, "players": players} for tick, players in snapshots.items()]
+
+    rows = []
+    for row in flat:
+        record: Dict[str, Any] = {}
+        for column, path in layout:
+            target = record
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = row[column]
+        rows.append(record)
+    return rows
+
+
+def write_arrow_section(columns: Dict[str, List[Any]], path: str, output_format: str) -> None:
+    """Écrit une section colonnaire en Arrow IPC ou Parquet."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError(f"pyarrow is required for --format {output_format}")
+
+    table = pa.table(columns)
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+# Tables de chaînes (--string-tables): clé de ligne → table
+STRING_TABLE_KEYS = {
+    "steamId": "steamIds",
+    "attackerSteamId": "steamIds",
+    "victimSteamId": "steamIds",
+    "killerSteamId": "steamIds",
+    "throwerSteamId": "steamIds",
+    "flasherSteamId": "steamIds",
+    "winnerId": "steamIds",
+    "loserId": "steamIds",
+    "traderId": "steamIds",
+    "originalVictimId": "steamIds",
+    "originalKillerId": "steamIds",
+    "name": "names",
+    "attackerName": "names",
+    "victimName": "names",
+    "weapon": "weapons",
+    "item": "weapons",
+    "weaponCategory": "weaponCategories",
+    "itemCategory": "weaponCategories",
+}
+STRING_TABLES = ["steamIds", "names", "weapons", "weaponCategories"]
+
+
+class StringTables:
+    """
+    Dictionnaire des chaînes répétées des lignes (steamIds, noms, armes).
+
+    Chaque valeur d'un champ de STRING_TABLE_KEYS est remplacée par son index
+    dans la table correspondante, attribué dans l'ordre de première
+    apparition. Les tables sont complètes une fois toutes les sections
+    encodées: format_sections les émet dans la section stringTables, avant
+    parsingStats.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[Any, int]] = {table: {} for table in STRING_TABLES}
+
+    def ref(self, table: str, value: Any) -> int:
+        """Index de value dans la table (ajoutée au besoin)."""
+        refs = self.tables[table]
+        ref = refs.get(value)
+        if ref is None:
+            ref = refs[value] = len(refs)
+        return ref
+
+    def encode_row(self, row: Dict) -> Dict:
+        """Ligne avec ses chaînes remplacées par des index (listes de lignes imbriquées comprises)."""
+        encoded = {}
+        for key, value in row.items():
+            table = STRING_TABLE_KEYS.get(key)
+            if table is not None:
+                encoded[key] = self.ref(table, value)
+            elif isinstance(value, list) and value and isinstance(value[0], dict):
+                encoded[key] = [self.encode_row(item) for item in value]
+            else:
+                encoded[key] = value
+        return encoded
+
+    def encode_batch(self, batch: RecordBatch) -> RecordBatch:
+        """RecordBatch encodé colonne par colonne."""
+        columns = []
+        for key, values in zip(batch.keys, batch.columns):
+            table = STRING_TABLE_KEYS.get(key)
+            if table is not None and not isinstance(values, dict):
+                refs = self.tables[table]
+                values = [refs[value] if value in refs else self.ref(table, value) for value in values]
+            columns.append(values)
+        return RecordBatch(batch.keys, columns, batch.length, batch.presence)
+
+    def encode(self, value: Any) -> Any:
+        """Encode une section de lignes (les autres sections sont inchangées)."""
+        if isinstance(value, RecordBatch):
+            return self.encode_batch(value)
+        if isinstance(value, SnapshotBatch):
+            return SnapshotBatch(value.ticks, value.counts, self.encode_batch(value.players))
+        if isinstance(value, ChunkedSection):
+            # Encodé au fil de la consommation: l'ordre des index reste celui du document
+            return ChunkedSection(self.encode(chunk) for chunk in value)
+        if isinstance(value, list):
+            return [self.encode_row(row) if isinstance(row, dict) else row for row in value]
+        return value
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """Section stringTables: {table: [valeur de l'index 0, 1, ...]}."""
+        return {table: list(refs) for table, refs in self.tables.items()}
+
+
+def resolve_string_tables(document: Dict) -> Dict:
+    """
+    Inverse de StringTables: remplace les index par les chaînes (document
+    produit avec --string-tables), sections json, columnar et tracks comprises.
+    """
+    tables = document.pop("stringTables", None)
+    if tables is None:
+        return document
+
+    def lookup(key: str, item: Any) -> Any:
+        return tables[STRING_TABLE_KEYS[key]][item] if key in STRING_TABLE_KEYS and isinstance(item, int) else item
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        return {key: lookup(key, item) if key in STRING_TABLE_KEYS else resolve(item) for key, item in value.items()}
+
+    def resolve_section(value: Dict) -> Dict:
+        if value.get("format") == "columnar":
+            value["columns"] = {
+                column: [lookup(column, item) for item in values] for column, values in value["columns"].items()
+            }
+        elif value.get("format") == "tracks":
+            for track in value["tracks"]:
+                track[TRACK_KEY] = lookup(TRACK_KEY, track[TRACK_KEY])
+                for column, data in track["columns"].items():
+                    if column in STRING_TABLE_KEYS:
+                        track["columns"][column] = [[lookup(column, item), count] for item, count in data]
+        return value
+
+    for name, value in document.items():
+        if isinstance(value, list):
+            document[name] = resolve(value)
+        elif isinstance(value, dict) and name in COLUMNAR_LAYOUTS:
+            document[name] = resolve_section(value)
+    return document
+
+
+def format_sections(
+    sections: Iterator[Tuple[str, Any]],
+    output_format: str,
+    output_path: Optional[str] = None,
+    string_tables: bool = False
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Applique le format de sortie aux sections volumineuses.
+
+    - json: sections inchangées (tableaux d'objets)
+    - columnar: {"format": "columnar", "rows": n, "columns": {colonne: [...]}}
+    - arrow / parquet: la section est écrite dans un fichier voisin
+      <output_path>.<section>.<ext> et remplacée par
+      {"format": ..., "rows": n, "path": nom du fichier}
+    - tracks: pistes par joueur quantifiées et codées en deltas / run-length
+      (voir encode_tracks)
+    Le champ "version" porte le format (ex: "2.0-columnar").
+
+    Avec string_tables (json, columnar, tracks), les steamIds, noms et armes
+    des lignes sont remplacés par des index (voir StringTables) avant le
+    format de sortie, et la section stringTables est ajoutée avant
+    parsingStats (version "...-strings").
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    if output_format in ("arrow", "parquet") and not output_path:
+        raise ValueError(f"--format {output_format} requires an output path")
+
+    # Fichiers voisins: les index n'y seraient pas résolus par resolve_string_tables
+    if string_tables and output_format in ("arrow", "parquet"):
+        raise ValueError(f"--string-tables is not supported with --format {output_format}")
+
+    tables = StringTables() if string_tables else None
+
+    for name, value in sections:
+        if tables is not None:
+            if name == "parsingStats":
+                yield "stringTables", tables.to_dict()
+                tables = None
+            elif name != "version":
+                value = tables.encode(value)
+
+        if name == "version":
+            yield name, format_version(output_format, string_tables)
+        elif output_format == "json" or name not in COLUMNAR_LAYOUTS:
+            yield name, value
+        elif output_format == "tracks":
+            yield name, encode_tracks(name, value)
+        else:
+            columns = rows_to_columns(name, value)
+            rows = len(columns["tick"])
+
+            if output_format == "columnar":
+                yield name, {"format": output_format, "rows": rows, "columns": columns}
+            else:
+                extension = "arrow" if output_format == "arrow" else "parquet"
+                path = f"{output_path}.{name}.{extension}"
+                write_arrow_section(columns, path, output_format)
+                yield name, {"format": output_format, "rows": rows, "path": Path(path).name}
+
+    if tables is not None:
+        yield "stringTables", tables.to_dict()
+
+
+# =============================================================================
+# CACHE DES RÉSULTATS
+# =============================================================================
+
+class ParseCache:
+    """
+    Cache disque des sorties JSON, adressé par contenu.
+
+    Clé = sha256(contenu du .dem, version et révision de sortie du parser,
+    ParserConfig normalisé - voir normalized_config):
+    une même démo uploadée par plusieurs joueurs ou remise en file n'est
+    parsée qu'une fois. Chaque entrée est <clé>.json (la sortie) et
+    <clé>.stats.json (parsingStats). L'heure de modification sert d'horodatage
+    LRU: une lecture la rafraîchit, l'éviction supprime les plus anciennes
+    jusqu'à repasser sous max_bytes.
+
+    Les formats arrow/parquet (fichiers voisins nommés d'après la sortie)
+    ne sont pas mis en cache.
+    """
+
+    CACHEABLE_FORMATS = ("json", "columnar", "tracks")
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(demo_path: str, config: ParserConfig) -> str:
+        """Clé de cache d'une démo pour une configuration donnée."""
+        content = hashlib.sha256()
+        with open(demo_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                content.update(block)
+
+        normalized = json.dumps(ParseCache.normalized_config(config), sort_keys=True)
+        key = hashlib.sha256()
+        key.update(f"{content.hexdigest()}:{PARSER_VERSION}.{OUTPUT_REVISION}:{normalized}".encode())
+        return key.hexdigest()
+
+    @staticmethod
+    def normalized_config(config: ParserConfig) -> Dict:
+        """
+        Champs de la config qui déterminent la sortie: sections produites
+        (ordre du registre, options extract_* appliquées), format, tables de
+        chaînes et options des extracteurs exécutés (Extractor.options).
+        L'ordre de sections, extract_workers ou les options de positions sans
+        la section positions ne changent pas la clé.
+        """
+        selected, needed = resolve_sections(config)
+        fields = {
+            "sections": selected,
+            "output_format": config.output_format,
+            "string_tables": config.string_tables,
+        }
+        for name in needed:
+            for option in EXTRACTORS[name].config_options(config):
+                fields[option] = getattr(config, option)
+        return fields
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.directory / f"{key}.json", self.directory / f"{key}.stats.json"
+
+    def fetch(self, key: str, output_path: str) -> Optional[Dict]:
+        """Copie la sortie en cache vers output_path; retourne les stats ou None."""
+        output_entry, stats_entry = self._paths(key)
+
+        try:
+            with open(stats_entry, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            shutil.copyfile(output_entry, output_path)
+            os.utime(output_entry)
+        except (OSError, ValueError):
+            return None
+
+        return stats
+
+    def store(self, key: str, output_path: str, stats: Dict) -> None:
+        """Ajoute une sortie au cache puis applique l'éviction LRU."""
+        output_entry, stats_entry = self._paths(key)
+        suffix = f".{os.getpid()}.tmp"
+
+        # Écriture atomique: plusieurs processus (batch, serveurs) partagent le cache
+        shutil.copyfile(output_path, str(output_entry) + suffix)
+        with open(str(stats_entry) + suffix, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False)
+        os.replace(str(stats_entry) + suffix, stats_entry)
+        os.replace(str(output_entry) + suffix, output_entry)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.stats.json"):
+            output_entry = path.with_name(path.name[:-len(".stats.json")] + ".json")
+            try:
+                stat = output_entry.stat()
+            except OSError:
+                continue
+            size = stat.st_size + path.stat().st_size
+            entries.append((stat.st_mtime, size, output_entry, path))
+            total += size
+
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, output_entry, stats_entry in entries:
+            if total <= self.max_bytes:
                 break
+            for path in (stats_entry, output_entry):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
 
-    return trades
+
+def default_cache(cache_dir: Optional[str] = None, max_mb: Optional[int] = None) -> Optional[ParseCache]:
+    """Cache configuré par arguments ou variables d'environnement (None si désactivé)."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not cache_dir:
+        return None
+    return ParseCache(cache_dir, (max_mb if max_mb is not None else CACHE_MAX_MB) * 1024 * 1024)
+
+
+# =============================================================================
+# MODE SERVEUR
+# =============================================================================
+
+def config_from_fields(fields: Optional[Dict]) -> ParserConfig:
+    """Construit un ParserConfig depuis les champs (snake_case) d'une requête."""
+    fields = fields or {}
+    known = {f.name for f in dataclasses.fields(ParserConfig)}
+    unknown = sorted(set(fields) - known)
+    if unknown:
+        raise ValueError(f"Unknown config fields: {', '.join(unknown)}")
+    return ParserConfig(**fields)
+
+
+def capabilities(check_imports: bool = False) -> Dict:
+    """
+    Capacités du parser pour les vérifications de disponibilité.
+
+    Par défaut, répond sans importer pandas/numpy/demoparser2: les versions
+    viennent des métadonnées installées, ready = dépendances requises
+    présentes (une installation cassée n'est pas détectée). Avec
+    check_imports, les dépendances sont réellement importées: ready exige
+    leur import, imports donne la durée de chaque import (ms, ~0 s'ils
+    étaient déjà chargés) et importError la cause d'un échec. Pour un
+    parsing, la durée des imports est dans parsingStats.timings.imports.
+    """
+    versions = dependency_versions()
+    missing = [name for name, required in DEPENDENCY_DISTRIBUTIONS.items() if required and versions[name] is None]
+    result = {
+        "success": True,
+        "ready": not missing,
+        "missing": missing,
+        "parserVersion": PARSER_VERSION,
+        "sections": OUTPUT_SECTIONS,
+        "outputFormats": OUTPUT_FORMATS,
+        "positionSampling": POSITION_SAMPLING_MODES,
+        "dependencies": versions,
+    }
+
+    if check_imports:
+        try:
+            load_dependencies()
+        except Exception as e:
+            # ImportError, mais aussi OSError d'une bibliothèque native invalide
+            result["ready"] = False
+            result["importError"] = str(e)
+        result["imports"] = {lazy.module: IMPORT_TIMINGS.get(lazy.module) for lazy in LAZY_IMPORTS}
+
+    result["startupMs"] = round((time.perf_counter() - MODULE_STARTED_AT) * 1000, 3)
+    result["pid"] = os.getpid()
+    return result
+
+
+class ParserServer:
+    """
+    Serveur de parsing longue durée: réutilise un interpréteur déjà chaud.
+
+    Protocole JSON lignes (une requête → une réponse, même "id"):
+    - {"type": "parse", "demoPath", "outputPath", "config": {champs ParserConfig}, "profile"?}
+      → {"success", "output", "stats", "cached"} ou {"success": false, "error"}
+    - {"type": "health"} → {"status": "ok", "pid", "jobs", "maxJobs", "uptime"}
+    - {"type": "ready"} → {"ready": bool, "version"}
+    - {"type": "capabilities", "checkImports"?} → voir capabilities()
+    - {"type": "shutdown"} → {"success": true}, puis arrêt
+    Après max_jobs parsings, le serveur envoie {"type": "recycle"} et s'arrête
+    pour que le superviseur le remplace par un processus neuf.
+    """
+
+    def __init__(self, max_jobs: int = 0, cache: Optional[ParseCache] = None):
+        self.max_jobs = max_jobs
+        self.cache = cache
+        self.jobs = 0
+        self.started_at = time.time()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_jobs > 0 and self.jobs >= self.max_jobs
+
+    def handle(self, request: Dict) -> Dict:
+        """Traite une requête et retourne la réponse."""
+        kind = request.get("type", "parse")
+        response = {"id": request.get("id"), "type": kind}
+
+        if kind == "parse":
+            response.update(self.run_job(request))
+        elif kind == "health":
+            response.update({
+                "status": "ok",
+                "pid": os.getpid(),
+                "jobs": self.jobs,
+                "maxJobs": self.max_jobs,
+                "uptime": round(time.time() - self.started_at, 3),
+            })
+        elif kind == "ready":
+            response.update({"ready": not self.exhausted, "version": PARSER_VERSION})
+        elif kind == "capabilities":
+            response.update(capabilities(bool(request.get("checkImports"))))
+        elif kind == "shutdown":
+            response["success"] = True
+        else:
+            response.update({"success": False, "error": f"Unknown request type: {kind}"})
+
+        return response
+
+    def run_job(self, request: Dict) -> Dict:
+        """
+        Exécute une requête de parsing. Seules les requêtes valides (champs,
+        config, démo existante) comptent dans max_jobs: une requête rejetée
+        ne charge rien en mémoire et ne doit pas avancer le recyclage.
+        """
+        try:
+            demo_path = request["demoPath"]
+            output_path = request["outputPath"]
+            config = config_from_fields(request.get("config"))
+        except KeyError as e:
+            return {"success": False, "error": f"Missing request field: {e.args[0]}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        if not Path(demo_path).exists():
+            return {"success": False, "error": f"File not found: {demo_path}"}
+
+        self.jobs += 1
+        try:
+            stats, cached = parse_to_file(
+                demo_path, output_path, config, self.cache, profile=bool(request.get("profile"))
+            )
+            return {"success": True, "output": output_path, "stats": stats, "cached": cached}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def serve_lines(self, lines: Iterable[str], send: Callable[[Dict], None]) -> bool:
+        """Traite des requêtes ligne à ligne; retourne False si le serveur doit s'arrêter."""
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                send({"id": None, "success": False, "error": f"Invalid request: {e}"})
+                continue
+
+            send(self.handle(request))
+
+            if request.get("type") == "shutdown":
+                return False
+            if self.exhausted:
+                send({"id": None, "type": "recycle", "jobs": self.jobs})
+                return False
+
+        return True
+
+
+def json_line_writer(out: TextIO) -> Callable[[Dict], None]:
+    """Écrit un objet JSON par ligne et vide le tampon."""
+    def send(obj: Dict) -> None:
+        out.write(json.dumps(obj, ensure_ascii=False))
+        out.write("\n")
+        out.flush()
+    return send
+
+
+def serve_stdio(server: ParserServer) -> None:
+    """Sert les requêtes lues sur stdin, réponses sur stdout."""
+    send = json_line_writer(sys.stdout)
+
+    # Les prints parasites ne doivent pas corrompre le protocole
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        send({"id": None, "type": "ready", "ready": True, "version": PARSER_VERSION, "pid": os.getpid()})
+        server.serve_lines(sys.stdin, send)
+    finally:
+        sys.stdout = stdout
+
+
+def serve_unix_socket(server: ParserServer, socket_path: str) -> None:
+    """Sert les requêtes sur un socket unix, une connexion à la fois."""
+    import socket
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+
+    try:
+        running = True
+        while running:
+            conn, _ = listener.accept()
+            with conn, conn.makefile("r", encoding="utf-8") as reader, \
+                    conn.makefile("w", encoding="utf-8") as writer:
+                running = server.serve_lines(reader, json_line_writer(writer))
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# =============================================================================
+# MODE BATCH
+# =============================================================================
+
+BATCH_OUTPUT_SUFFIX = ".v2.json"
+
+
+def collect_batch_demos(source: str) -> List[str]:
+    """
+    Liste les démos d'un lot: fichiers .dem d'un dossier (récursif) ou
+    manifeste texte (un chemin par ligne, relatif au manifeste, # = commentaire).
+    """
+    source_path = Path(source)
+
+    if source_path.is_dir():
+        return sorted(str(p) for p in source_path.rglob("*.dem"))
+
+    demos = []
+    with open(source_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            demo = Path(line)
+            if not demo.is_absolute():
+                demo = source_path.parent / demo
+            demos.append(str(demo))
+    return demos
+
+
+def run_batch_job(
+    demo_path: str,
+    config: ParserConfig,
+    cache: Optional[ParseCache] = None,
+    profile: bool = False
+) -> Dict:
+    """Parse une démo du lot; la sortie est écrite à côté de l'entrée."""
+    output_path = demo_path + BATCH_OUTPUT_SUFFIX
+    started_at = time.time()
+
+    try:
+        if not Path(demo_path).exists():
+            raise FileNotFoundError(f"File not found: {demo_path}")
+
+        stats, cached = parse_to_file(demo_path, output_path, config, cache, profile)
+        return {
+            "demo": demo_path,
+            "success": True,
+            "output": output_path,
+            "stats": stats,
+            "cached": cached,
+            "seconds": round(time.time() - started_at, 3),
+        }
+    except Exception as e:
+        return {
+            "demo": demo_path,
+            "success": False,
+            "error": str(e),
+            "seconds": round(time.time() - started_at, 3),
+        }
+
+
+def run_batch(
+    demos: List[str],
+    config: ParserConfig,
+    workers: Optional[int] = None,
+    send: Callable[[Dict], None] = None,
+    cache: Optional[ParseCache] = None,
+    profile: bool = False,
+) -> Dict:
+    """
+    Parse un lot de démos sur un pool de processus borné.
+    Chaque résultat est envoyé dès qu'il est terminé (ordre d'achèvement).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    send = send or json_line_writer(sys.stdout)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(demos) or 1))
+    succeeded = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_batch_job, demo, config, cache, profile) for demo in demos]
+        for future in as_completed(futures):
+            result = future.result()
+            succeeded += result["success"]
+            send(result)
+
+    return {"total": len(demos), "succeeded": succeeded, "failed": len(demos) - succeeded}
 
 
 # =============================================================================
 # FONCTION PRINCIPALE
 # =============================================================================
 
-def parse_demo(demo_path: str, config: ParserConfig = None) -> Dict:
-    """Parse un fichier .dem et extrait toutes les données."""
+def iter_sections(demo_path: str, config: ParserConfig = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Parse un fichier .dem et produit chaque section dès qu'elle est calculée.
+
+    Les sections sont produites dans l'ordre du document final; seules les
+    sections demandées (config.sections) et leurs dépendances sont extraites,
+    et seules les dépendances (rounds, kills) restent en mémoire.
+    """
 
     if config is None:
         config = ParserConfig()
 
-    parser = DemoParser(demo_path)
-
-    # Extraire rounds d'abord pour calculer les rounds des autres événements
-    rounds = extract_rounds(parser)
-    round_ticks = [(r["tick"], r["roundNumber"]) for r in rounds]
+    selected, needed = resolve_sections(config)
+    retained = {dep for name in needed for dep in EXTRACTORS[name].requires}
+
+    # Imports lourds au premier parsing du processus (~0 ms ensuite)
+    timings = Timings()
+    with timings.measure("imports"):
+        load_dependencies()
+
+    # Pool fermé (threads arrêtés) même si l'ouverture de la démo échoue
+    workers = config.extract_workers or os.cpu_count() or 1
+    with ExtractionPool(workers) if workers > 1 else nullcontext() as pool:
+        context = DemoContext(DemoParser(demo_path))
+        state = ExtractionState(context, config, retained, timings, pool)
+
+        # Un seul parse_events pour tous les extracteurs nécessaires
+        for name in needed:
+            extractor = EXTRACTORS[name]
+            event_names = extractor.required_events(config)
+            if event_names:
+                state.events.register(list(event_names), player_props=list(extractor.player_props))
+        with state.timings.measure("parseEvents"):
+            state.events.fetch(context)
+
+        # Un seul décodage des ticks pour tous les extracteurs nécessaires
+        for name in needed:
+            if EXTRACTORS[name].plan is not None:
+                EXTRACTORS[name].plan(state)
+        with state.timings.measure("parseTicks"):
+            state.tick_plan.execute(context)
+
+        yield "version", PARSER_VERSION
+        yield from state.compute_all(selected, needed)
+
+    # Statistiques de parsing (timings complété par le writer avec la sérialisation)
+    stats = {key: state.counts.get(name, 0) for key, name in PARSING_STATS_COUNTS}
+    stats["decoding"] = context.stats
+    stats["timings"] = state.timings.steps
+    yield "parsingStats", stats
+
+
+def materialize(value: Any) -> Any:
+    """Liste de dicts pour une section découpée ou un lot d'enregistrements."""
+    if isinstance(value, ChunkedSection):
+        return list(value.rows())
+    if isinstance(value, ROW_BATCHES):
+        return list(value)
+    return value
+
+
+def parse_demo(demo_path: str, config: ParserConfig = None, output_path: Optional[str] = None) -> Dict:
+    """Parse un fichier .dem et extrait toutes les données."""
+    if config is None:
+        config = ParserConfig()
 
-    # Extractions principales
-    result = {
-        "version": "2.0",
-        "metadata": extract_metadata(parser),
-        "players": extract_players(parser),
-        "rounds": rounds,
-        "kills": extract_kills(parser, round_ticks),
-        "damages": extract_damages(parser, round_ticks),
-        "grenades": extract_grenades(parser, round_ticks),
-        "playerBlinds": extract_player_blinds(parser, round_ticks),
-        "bombEvents": extract_bomb_events(parser, round_ticks),
-        "economyByRound": extract_economy_by_round(parser, rounds),
-        "purchases": extract_item_purchases(parser, round_ticks),
+    sections = iter_sections(demo_path, config)
+    return {
+        name: materialize(value)
+        for name, value in format_sections(sections, config.output_format, output_path, config.string_tables)
     }
 
-    # Extractions conditionnelles (coûteuses)
-    if config.extract_weapon_fires:
-        result["weaponFires"] = extract_weapon_fires(parser, round_ticks)
-
-    if config.extract_positions:
-        result["positions"] = extract_player_positions(parser, config)
-
-    # Données dérivées
-    result["clutches"] = extract_clutch_situations(result["kills"], rounds)
-    result["entryDuels"] = extract_entry_duels(result["kills"])
-    result["trades"] = extract_trades(result["kills"])
-
-    # Statistiques de parsing
-    result["parsingStats"] = {
-        "totalKills": len(result["kills"]),
-        "totalDamages": len(result["damages"]),
-        "totalGrenades": len(result["grenades"]),
-        "totalBlinds": len(result.get("playerBlinds", [])),
-        "totalBombEvents": len(result.get("bombEvents", [])),
-        "totalWeaponFires": len(result.get("weaponFires", [])),
-        "totalPositionSnapshots": len(result.get("positions", [])),
-        "totalPurchases": len(result.get("purchases", [])),
-    }
 
-    return result
+def parse_to_file(
+    demo_path: str,
+    output_path: str,
+    config: ParserConfig = None,
+    cache: Optional[ParseCache] = None,
+    profile: bool = False,
+    profile_path: Optional[str] = None
+) -> Tuple[Dict, bool]:
+    """
+    Parse une démo, écrit le JSON de sortie et retourne (statistiques, cache_hit).
+    Avec un cache, une démo déjà parsée avec la même configuration est copiée.
+    Avec profile, écrit aussi <profile_path>.prof et <profile_path>.memory.txt
+    (profile_path: output_path par défaut).
+    """
+    if config is None:
+        config = ParserConfig()
+
+    key = None
+    if cache is not None and config.output_format in ParseCache.CACHEABLE_FORMATS:
+        key = ParseCache.key(demo_path, config)
+        stats = cache.fetch(key, output_path)
+        if stats is not None:
+            return stats, True
+
+    with profiled((profile_path or output_path) if profile else None):
+        sections = format_sections(
+            iter_sections(demo_path, config), config.output_format, output_path, config.string_tables
+        )
+        with open(output_path, 'w', encoding='utf-8') as f:
+            stats = write_json_document(sections, f)
+
+    if key is not None:
+        cache.store(key, output_path, stats)
+
+    return stats, False
+
+
+def write_json_document(sections: Iterator[Tuple[str, Any]], out: TextIO) -> Dict:
+    """
+    Écrit les sections en un objet JSON au fil de l'eau (même octets que
+    json.dump du dict complet) et retourne parsingStats.
+    Le temps de sérialisation est ajouté à parsingStats.timings.
+    """
+    stats = {}
+    timings = Timings()
+    separator = "{"
+
+    for name, value in sections:
+        if name == "parsingStats":
+            stats = value
+            if "timings" in value:
+                value["timings"].update(timings.steps)
+
+        with timings.measure("serialization"):
+            out.write(separator)
+            out.write(json.dumps(name))
+            out.write(": ")
+            if not isinstance(value, (ChunkedSection,) + ROW_BATCHES):
+                out.write(json.dumps(value, ensure_ascii=False))
+        separator = ", "
+
+        if isinstance(value, (ChunkedSection,) + ROW_BATCHES):
+            # Chaque morceau est écrit dès qu'il est calculé (hors mesure de sérialisation);
+            # un lot d'enregistrements est écrit ligne par ligne, sans liste de dicts
+            row_separator = "["
+            for chunk in (value if isinstance(value, ChunkedSection) else [value]):
+                with timings.measure("serialization"):
+                    for row in chunk:
+                        out.write(row_separator)
+                        out.write(json.dumps(row, ensure_ascii=False))
+                        row_separator = ", "
+            out.write("[]" if row_separator == "[" else "]")
+
+    out.write("{}" if separator == "{" else "}")
+    return stats
+
+
+def write_ndjson_stream(
+    sections: Iterator[Tuple[str, Any]],
+    out: TextIO,
+    chunk_rows: int = STREAM_CHUNK_ROWS
+) -> Dict:
+    """
+    Écrit les sections en NDJSON au fil de l'eau.
+
+    Une ligne par objet: {"section": nom, "data": valeur} pour les sections
+    scalaires, {"section": nom, "rows": [...]} par chunk pour les listes
+    (au moins un chunk, éventuellement vide), puis une ligne finale
+    {"section": "end", "success": true, "stats": parsingStats}.
+    """
+    stats = {}
+    timings = Timings()
+
+    def write_line(obj: Dict) -> None:
+        out.write(json.dumps(obj, ensure_ascii=False))
+        out.write("\n")
+        out.flush()
+
+    for name, value in sections:
+        if name == "parsingStats":
+            stats = value
+            if "timings" in value:
+                value["timings"].update(timings.steps)
+
+        if isinstance(value, (ChunkedSection,) + ROW_BATCHES):
+            # Regroupe les morceaux calculés en chunks de chunk_rows lignes
+            pending = []
+            written = False
+            for chunk in (value if isinstance(value, ChunkedSection) else [value]):
+                for row in chunk:
+                    pending.append(row)
+                    if len(pending) >= chunk_rows:
+                        with timings.measure("serialization"):
+                            write_line({"section": name, "rows": pending})
+                        pending = []
+                        written = True
+            if pending or not written:
+                with timings.measure("serialization"):
+                    write_line({"section": name, "rows": pending})
+            continue
+
+        with timings.measure("serialization"):
+            if isinstance(value, list):
+                for start in range(0, max(len(value), 1), chunk_rows):
+                    write_line({"section": name, "rows": value[start:start + chunk_rows]})
+            else:
+                write_line({"section": name, "data": value})
+
+    write_line({"section": "end", "success": True, "stats": stats})
+    return stats
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="CS2 Demo Parser v2.0 - Extraction exhaustive"
     )
-    parser.add_argument("demo_path", help="Chemin vers le fichier .dem")
-    parser.add_argument("output_path", help="Chemin de sortie JSON")
+    parser.add_argument("demo_path", nargs="?", help="Chemin vers le fichier .dem")
+    parser.add_argument("output_path", nargs="?", help="Chemin de sortie JSON (inutile avec --stream)")
     parser.add_argument(
         "--full-positions",
         action="store_true",
-        help="Extraire toutes les positions (fichier plus gros)"
+        help="Sans effet, conservé pour compatibilité: les positions couvrent tout le match"
     )
     parser.add_argument(
         "--no-weapon-fires",
@@ -1015,34 +3905,190 @@ def main():
         default=64,
         help="Taux d'échantillonnage des positions (en ticks, défaut: 64)"
     )
+    parser.add_argument(
+        "--position-sampling",
+        choices=POSITION_SAMPLING_MODES,
+        default="uniform",
+        help="Échantillonnage des positions: uniform, ou adaptive (dense autour des contacts, épars à l'arrêt)"
+    )
+    parser.add_argument(
+        "--position-error",
+        type=float,
+        default=32.0,
+        help="Mode adaptive: écart de position toléré avant un nouvel échantillon (unités, défaut: 32)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Format des sections positions/weaponFires (json, columnar, arrow, parquet, tracks)"
+    )
+    parser.add_argument(
+        "--string-tables",
+        action="store_true",
+        help="Remplacer steamIds, noms et armes des lignes par des index dans une section stringTables"
+    )
+    parser.add_argument(
+        "--sections",
+        help="Sections à produire, séparées par des virgules (défaut: toutes; "
+             f"disponibles: {', '.join(OUTPUT_SECTIONS)})"
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=1,
+        help="Threads d'extraction pour une démo (défaut: 1 = séquentiel, 0 = nombre de cœurs)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Écrire les sections en NDJSON sur stdout au fil de l'extraction"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Mode serveur longue durée (requêtes JSON lignes sur stdin/stdout)"
+    )
+    parser.add_argument(
+        "--socket",
+        help="Avec --serve: écouter sur ce socket unix au lieu de stdin/stdout"
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=0,
+        help="Avec --serve: s'arrêter après N parsings pour recyclage (0 = illimité)"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SOURCE",
+        help="Parser toutes les démos d'un dossier ou d'un manifeste (sorties <demo>.v2.json)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Avec --batch: nombre de processus (défaut: nombre de cœurs)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Écrire un profil cProfile (.prof) et tracemalloc (.memory.txt) à côté de la sortie"
+    )
+    parser.add_argument(
+        "--profile-out",
+        metavar="PREFIX",
+        help="Préfixe des fichiers de profil (active --profile; requis avec --stream)"
+    )
+    parser.add_argument(
+        "--capabilities",
+        action="store_true",
+        help="Afficher version, sections, formats et dépendances en JSON (sans importer pandas/demoparser2)"
+    )
+    parser.add_argument(
+        "--check-imports",
+        action="store_true",
+        help="Avec --capabilities: importer les dépendances et mesurer leur durée (détecte une installation cassée)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Dossier du cache des résultats (défaut: $PARSER_CACHE_DIR, désactivé si vide)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        help=f"Taille maximale du cache en Mo (défaut: $PARSER_CACHE_MAX_MB ou {CACHE_MAX_MB})"
+    )
 
     args = parser.parse_args()
 
-    if not Path(args.demo_path).exists():
-        print(json.dumps({
-            "success": False,
-            "error": f"File not found: {args.demo_path}"
-        }), file=sys.stderr)
-        sys.exit(1)
+    if args.check_imports and not args.capabilities:
+        parser.error("--check-imports s'utilise avec --capabilities")
+
+    if args.capabilities:
+        print(json.dumps(capabilities(args.check_imports)))
+        return
+
+    cache = default_cache(args.cache_dir, args.cache_max_mb)
+
+    if args.serve:
+        # Interpréteur chaud: dépendances chargées avant d'annoncer "ready"
+        try:
+            load_dependencies()
+        except ImportError as e:
+            print(json.dumps({"success": False, "error": str(e)}), file=sys.stderr)
+            sys.exit(1)
+
+        server = ParserServer(max_jobs=args.max_jobs, cache=cache)
+        if args.socket:
+            serve_unix_socket(server, args.socket)
+        else:
+            serve_stdio(server)
+        return
 
     # Configuration
     config = ParserConfig(
         extract_positions=not args.no_positions,
         extract_weapon_fires=not args.no_weapon_fires,
         position_sample_rate=args.sample_rate,
-        max_position_ticks=200000 if args.full_positions else 50000,
+        position_sampling=args.position_sampling,
+        position_error_threshold=args.position_error,
+        output_format=args.format,
+        string_tables=args.string_tables,
+        extract_workers=args.extract_workers,
+        sections=[name.strip() for name in args.sections.split(",") if name.strip()] if args.sections else None,
     )
 
+    if args.batch:
+        if not Path(args.batch).exists():
+            print(json.dumps({
+                "success": False,
+                "error": f"File not found: {args.batch}"
+            }), file=sys.stderr)
+            sys.exit(1)
+
+        summary = run_batch(
+            collect_batch_demos(args.batch), config, args.workers, cache=cache, profile=args.profile
+        )
+        print(json.dumps({"success": summary["failed"] == 0, "summary": summary}))
+        sys.exit(0 if summary["failed"] == 0 else 1)
+
+    if not args.demo_path:
+        parser.error("demo_path est requis")
+
+    if not args.stream and not args.output_path:
+        parser.error("output_path est requis sans --stream")
+
+    # Jamais à côté de la démo: son dossier peut être en lecture seule ou partagé
+    profile = args.profile or bool(args.profile_out)
+    if profile and args.stream and not args.profile_out:
+        parser.error("--profile avec --stream requiert --profile-out")
+
+    if not Path(args.demo_path).exists():
+        print(json.dumps({
+            "success": False,
+            "error": f"File not found: {args.demo_path}"
+        }), file=sys.stderr)
+        sys.exit(1)
+
     try:
-        result = parse_demo(args.demo_path, config)
+        if args.stream:
+            with profiled(args.profile_out if profile else None):
+                sections = format_sections(
+                    iter_sections(args.demo_path, config), config.output_format, string_tables=config.string_tables
+                )
+                write_ndjson_stream(sections, sys.stdout)
+            return
 
-        with open(args.output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False)
+        stats, cached = parse_to_file(
+            args.demo_path, args.output_path, config, cache, profile, args.profile_out
+        )
 
         print(json.dumps({
             "success": True,
             "output": args.output_path,
-            "stats": result.get("parsingStats", {}),
+            "stats": stats,
+            "cached": cached,
         }))
 
     except Exception as e:
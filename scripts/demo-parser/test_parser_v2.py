@@ -0,0 +1,1134 @@
+#!/usr/bin/env python3
+"""
+Tests de parser_v2.py sur des démos synthétiques.
+
+Les démos viennent de fake_demoparser.FakeDemoParser (graine fixe): pas
+besoin de fichier .dem, seulement pandas/numpy (utilisable en CI).
+
+Les sections que la refonte ne doit pas modifier sont comparées, champ par
+champ puis à l'octet près, à la sortie du parser_v2 d'origine sur la même
+démo (golden/parser_v2_baseline.json, généré depuis l'historique git par
+golden/make_baseline.py). Les autres tests vérifient chaque comportement
+nouveau directement: tick plan, jointures temporelles, machine à états,
+formats de sortie, cache, serveur, batch...
+
+Usage:
+    python -m pytest -q test_parser_v2.py
+    python golden/make_baseline.py   # régénérer la référence historique
+"""
+
+import io
+import os
+import sys
+import json
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_demoparser import FakeDemoParser
+
+# parser_v2 importe demoparser2 au premier parsing: le module synthétique suffit ici
+try:
+    import demoparser2  # noqa: F401
+except ImportError:
+    sys.modules["demoparser2"] = types.SimpleNamespace(DemoParser=FakeDemoParser)
+
+import parser_v2
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "golden" / "parser_v2_baseline.json"
+
+# Démo courte mais complète: mi-temps, tirs, grenades, bombe, achats
+SCENARIO = dict(rounds=8, tickrate=64, fires_per_second=1.0, seed=3)
+
+# Statistiques dépendantes de la machine ou du cache des accès
+VOLATILE_STATS = ("timings", "decoding")
+
+
+def fake_demo(scenario=None) -> FakeDemoParser:
+    return FakeDemoParser(**(scenario or SCENARIO))
+
+
+@pytest.fixture
+def parse(monkeypatch):
+    """Parse une démo synthétique et retourne le document JSON tel qu'écrit sur disque."""
+    def run(scenario=None, **fields) -> dict:
+        fake = fake_demo(scenario)
+        monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake)
+        config = parser_v2.ParserConfig(**fields)
+
+        out = io.StringIO()
+        sections = parser_v2.format_sections(
+            parser_v2.iter_sections("fake.dem", config), config.output_format, string_tables=config.string_tables
+        )
+        parser_v2.write_json_document(sections, out)
+
+        document = json.loads(out.getvalue())
+        for key in VOLATILE_STATS:
+            document["parsingStats"].pop(key, None)
+        return document
+    return run
+
+
+# =============================================================================
+# SORTIE HISTORIQUE
+# =============================================================================
+
+BASELINE = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def field_differences(actual, expected, path="") -> list:
+    """Champs (chemin, obtenu, attendu) dont la sérialisation JSON diffère (1 != 1.0)."""
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        return [
+            difference
+            for key in dict.fromkeys([*expected, *actual])
+            for difference in field_differences(actual.get(key), expected.get(key), f"{path}.{key}")
+        ]
+    if json.dumps(actual) != json.dumps(expected):
+        return [(path or ".", actual, expected)]
+    return []
+
+
+@pytest.fixture(scope="module")
+def baseline_document():
+    fake = fake_demo(BASELINE["scenario"])
+    original = parser_v2.DemoParser
+    parser_v2.DemoParser = lambda demo_path: fake
+    try:
+        return parser_v2.parse_demo("fake.dem", parser_v2.ParserConfig())
+    finally:
+        parser_v2.DemoParser = original
+
+
+@pytest.mark.parametrize("name", list(BASELINE["sections"]))
+def test_section_matches_baseline_parser(baseline_document, name):
+    actual, expected = baseline_document[name], BASELINE["sections"][name]
+
+    if isinstance(expected, list):
+        assert len(actual) == len(expected), f"{name}: {len(actual)} lignes, {len(expected)} attendues"
+        for i, (row, expected_row) in enumerate(zip(actual, expected)):
+            differences = field_differences(row, expected_row)
+            assert not differences, f"{name}[{i}] (tick {expected_row.get('tick')}): {differences[:5]}"
+    else:
+        assert not field_differences(actual, expected)
+
+    # Mêmes octets que le parser d'origine
+    assert json.dumps(actual, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+def test_baseline_covers_every_section_kind():
+    sections = BASELINE["sections"]
+    # Démo de référence non triviale: la comparaison porte sur de vraies lignes
+    for name in ("kills", "damages", "grenades", "purchases", "weaponFires", "entryDuels"):
+        assert len(sections[name]) > 0, name
+    assert {r["roundNumber"] for r in sections["rounds"]} == set(range(1, BASELINE["scenario"]["rounds"] + 1))
+    assert all(len(r["players"]) == 10 for r in sections["economyByRound"])
+    assert {k["weaponCategory"] for k in sections["kills"]} > {"rifles"}
+
+
+def test_kill_fields_are_consistent(baseline_document):
+    rounds = baseline_document["rounds"]
+    round_index = parser_v2.RoundIndex(rounds)
+    names = {p["steamId"]: p["name"] for p in baseline_document["players"]}
+
+    for kill in baseline_document["kills"]:
+        assert kill["round"] == round_index.assign([kill["tick"]])[0]
+        assert kill["attackerName"] == names[kill["attackerSteamId"]]
+        assert kill["victimName"] == names[kill["victimSteamId"]]
+        attacker, victim = kill["attackerPosition"], kill["victimPosition"]
+        assert kill["distance"] == pytest.approx(
+            float(np.hypot(np.hypot(attacker["x"] - victim["x"], attacker["y"] - victim["y"]), attacker["z"] - victim["z"]))
+        )
+
+
+# =============================================================================
+# TICK PLAN
+# =============================================================================
+
+@pytest.fixture
+def parse_ticks_calls(monkeypatch):
+    """Props et ticks de chaque appel à parse_ticks de la démo synthétique."""
+    calls = []
+    original = FakeDemoParser.parse_ticks
+
+    def spy(self, wanted_props, **kwargs):
+        calls.append((list(wanted_props), kwargs.get("ticks")))
+        return original(self, wanted_props, **kwargs)
+
+    monkeypatch.setattr(FakeDemoParser, "parse_ticks", spy)
+    return calls
+
+
+def test_tick_plan_decodes_all_extractors_in_one_pass(parse, parse_ticks_calls):
+    document = parse(sections=["players", "kills", "economyByRound", "clutches"])
+
+    # Joueurs, positions des kills, économie et rosters: un seul parse_ticks
+    ((props, ticks),) = parse_ticks_calls
+    for wanted in (parser_v2.PLAYER_TICK_PROPS, parser_v2.KILL_TICK_PROPS, parser_v2.ECONOMY_TICK_PROPS):
+        assert set(wanted) <= set(props)
+    assert len(props) == len(set(props))
+    assert {kill["tick"] for kill in document["kills"]} <= set(ticks)
+    assert document["players"] and document["economyByRound"]
+
+
+def test_full_parse_decodes_ticks_once_per_pass(parse, parse_ticks_calls):
+    parse()
+    # Tick plan, puis une passe par fenêtre de tirs et de positions (une seule
+    # fenêtre chacune sur cette démo): jamais un appel par extracteur
+    assert len(parse_ticks_calls) == 3
+    assert [props for props, _ in parse_ticks_calls[1:]] == [parser_v2.FIRE_TICK_PROPS, parser_v2.POSITION_TICK_PROPS]
+
+
+# =============================================================================
+# POSITIONS PAR FENÊTRES DE ROUNDS
+# =============================================================================
+
+def test_position_windows_group_rounds_up_to_max_ticks():
+    rounds = [{"tick": end, "roundNumber": i + 1} for i, end in enumerate([1000, 2000, 3000, 90000])]
+    round_index = parser_v2.RoundIndex(rounds, freeze_ticks=[100, 1100, 2100, 3100])
+    windows = parser_v2.position_windows(round_index, sample_rate=10, max_ticks=200)
+
+    # Un tableau de ticks par round: grille de sample_rate, fin du freeze → fin du round
+    per_round = [ticks for window in windows for ticks in window]
+    assert len(per_round) == len(rounds)
+    for ticks, start, end in zip(per_round, [100, 1100, 2100, 3100], [1000, 2000, 3000, 90000]):
+        assert ticks.tolist() == list(range(start, end + 1, 10))
+
+    # Rounds 1 et 2 (91 ticks chacun) partagent une fenêtre; le round 4, plus
+    # long que max_ticks, forme la sienne (tout le match, pas de plafond global)
+    assert [len(window) for window in windows] == [2, 1, 1]
+    for window in windows:
+        assert len(window) == 1 or sum(map(len, window)) <= 200
+
+
+def test_positions_cover_every_round_with_one_decode_per_window(parse, monkeypatch):
+    calls = []
+    original = FakeDemoParser.parse_ticks
+
+    def spy(self, wanted_props, **kwargs):
+        if list(wanted_props) == parser_v2.POSITION_TICK_PROPS:
+            calls.append(kwargs.get("ticks"))
+        return original(self, wanted_props, **kwargs)
+
+    monkeypatch.setattr(FakeDemoParser, "parse_ticks", spy)
+    document = parse(sections=["positions", "rounds"])
+
+    sample_rate = parser_v2.ParserConfig().position_sample_rate
+    round_index = parser_v2.RoundIndex(document["rounds"])
+    rounds_with_positions = set(round_index.assign([snapshot["tick"] for snapshot in document["positions"]]).tolist())
+    assert rounds_with_positions == {r["roundNumber"] for r in document["rounds"]}
+    assert all(snapshot["tick"] % sample_rate == 0 for snapshot in document["positions"])
+
+    # Démo synthétique de 8 rounds: moins de TICK_WINDOW_MAX_TICKS ticks échantillonnés
+    assert len(calls) == 1
+
+
+# =============================================================================
+# JOINTURE TEMPORELLE
+# =============================================================================
+
+def nested_window_join(left_ticks, right_ticks, min_offset, max_offset, left_keys=(), right_keys=()):
+    """Référence en double boucle de window_join (mêmes paires, même ordre)."""
+    def key(keys, i):
+        values = tuple(column[i] for column in keys)
+        return None if any(v is None or v == "" for v in values) else values
+
+    pairs = []
+    right_order = sorted(range(len(right_ticks)), key=lambda j: (right_ticks[j], j))
+    for i in range(len(left_ticks)):
+        left_key = key(left_keys, i)
+        for j in right_order:
+            if left_key is None or left_key != key(right_keys, j):
+                continue
+            if min_offset <= right_ticks[j] - left_ticks[i] <= max_offset:
+                pairs.append((i, j))
+    return pairs
+
+
+def joined_pairs(*args, **kwargs):
+    left, right = parser_v2.window_join(*args, **kwargs)
+    return list(zip(left.tolist(), right.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("offsets", [(0, 20), (-20, 0), (-5, 5), (2, 4)])
+def test_window_join_matches_nested_loop(seed, offsets):
+    rng = np.random.default_rng(seed)
+    # Doublons de ticks et de clés, clés absentes, steamids au-delà de 2^53
+    players = [2**53 + 1, 2**53 + 2, 76561198000007919, None]
+    left_ticks = rng.integers(0, 100, 40).tolist()
+    right_ticks = rng.integers(0, 100, 60).tolist()
+    left_keys = [[players[k] for k in rng.integers(0, 4, 40)], rng.integers(1, 3, 40).tolist()]
+    right_keys = [[players[k] for k in rng.integers(0, 4, 60)], rng.integers(1, 3, 60).tolist()]
+
+    expected = nested_window_join(left_ticks, right_ticks, *offsets, left_keys, right_keys)
+    assert expected
+    assert joined_pairs(left_ticks, right_ticks, *offsets, left_keys=left_keys, right_keys=right_keys) == expected
+
+    # Sans clé: toutes les paires dans la fenêtre
+    assert joined_pairs(left_ticks, right_ticks, *offsets) == nested_window_join(left_ticks, right_ticks, *offsets)
+
+
+def test_window_join_edges_and_missing_matches():
+    # Bornes de la fenêtre incluses, un tick de plus exclu
+    assert joined_pairs([100], [89, 90, 110, 111], -10, 10) == [(0, 1), (0, 2)]
+    # Pas de correspondance: clé différente, clé absente ou vide, côté vide
+    assert joined_pairs([100], [100], 0, 0, left_keys=[["a"]], right_keys=[["b"]]) == []
+    assert joined_pairs([100], [100], 0, 0, left_keys=[[None]], right_keys=[[None]]) == []
+    assert joined_pairs([100], [100], 0, 0, left_keys=[[""]], right_keys=[[""]]) == []
+    assert joined_pairs([], [100], 0, 0) == []
+    assert joined_pairs([100], [], 0, 0) == []
+    # steamids voisins au-delà de 2^53 (égaux en float64) restent distincts
+    assert joined_pairs([0, 0], [0], 0, 0, left_keys=[[2**53 + 1, 2**53 + 2]], right_keys=[[2**53 + 2]]) == [(1, 0)]
+    # Clés en doublon: toutes les paires, dans l'ordre (tick, position) à droite
+    assert joined_pairs([0], [5, 3, 5], 0, 10, left_keys=[["a"]], right_keys=[["a", "a", "a"]]) == [(0, 1), (0, 0), (0, 2)]
+
+
+def test_join_tick_state_nearest_previous_state():
+    big = 2**53 + 1
+    state_df = pd.DataFrame({
+        "tick": [10, 10, 20, 10, 30],
+        "steamid": [str(big), str(big), str(big), str(big + 1), ""],
+    })
+    rows = parser_v2.join_tick_state(
+        [10, 25, 25, 26, 10, 30, 10],
+        [str(big), str(big), str(big), str(big), str(big + 1), "", str(big + 2)],
+        state_df,
+        tolerance=5,
+    )
+    # Doublon (10, big): dernière ligne; 25 → état du tick 20 (à 5 ticks, borne
+    # incluse); 26 hors tolérance; joueur voisin distinct; steamid absent ou inconnu: -1
+    assert rows.tolist() == [1, 2, 2, -1, 3, -1, -1]
+
+
+def reference_trades(kills, tickrate):
+    """extract_trades historique (double boucle), au tickrate de la démo."""
+    trades = []
+    sorted_kills = sorted(kills, key=lambda k: (k["round"], k["tick"]))
+    for i, kill in enumerate(sorted_kills):
+        for trade_kill in sorted_kills[i + 1:]:
+            time_diff = (trade_kill["tick"] - kill["tick"]) / tickrate
+            if trade_kill["round"] != kill["round"] or time_diff > parser_v2.TRADE_WINDOW_SECONDS:
+                break
+            if trade_kill["victimSteamId"] == kill["attackerSteamId"]:
+                trades.append({
+                    "round": kill["round"],
+                    "originalKillTick": kill["tick"],
+                    "tradeTick": trade_kill["tick"],
+                    "timeToTrade": time_diff,
+                    "originalVictimId": kill["victimSteamId"],
+                    "originalKillerId": kill["attackerSteamId"],
+                    "traderId": trade_kill["attackerSteamId"],
+                })
+                break
+    return trades
+
+
+@pytest.mark.parametrize("tickrate", [64, 128])
+def test_trades_match_nested_loop_at_demo_tickrate(tickrate):
+    rng = np.random.default_rng(tickrate)
+    players = [str(2**53 + i) for i in range(6)]
+    kills = []
+    for _ in range(300):
+        attacker, victim = rng.choice(len(players), 2, replace=False)
+        kills.append({
+            "round": int(rng.integers(1, 4)),
+            "tick": int(rng.integers(0, 2000)),
+            "attackerSteamId": players[attacker],
+            "victimSteamId": players[victim],
+        })
+    # Trade exactement en bord de fenêtre
+    window = parser_v2.seconds_to_ticks(parser_v2.TRADE_WINDOW_SECONDS, tickrate)
+    kills += [
+        {"round": 9, "tick": 0, "attackerSteamId": "a", "victimSteamId": "b"},
+        {"round": 9, "tick": window, "attackerSteamId": "c", "victimSteamId": "a"},
+        {"round": 9, "tick": 0, "attackerSteamId": "d", "victimSteamId": "e"},
+        {"round": 9, "tick": window + 1, "attackerSteamId": "f", "victimSteamId": "d"},
+    ]
+
+    trades = parser_v2.extract_trades(kills, tickrate)
+    assert trades == reference_trades(kills, tickrate)
+    assert [t["originalKillerId"] for t in trades if t["round"] == 9] == ["a"]
+
+
+# =============================================================================
+# MACHINE À ÉTATS DES ROUNDS
+# =============================================================================
+
+ROSTER = {"t1": parser_v2.TEAM_T, "t2": parser_v2.TEAM_T, "t3": parser_v2.TEAM_T,
+          "c1": parser_v2.TEAM_CT, "c2": parser_v2.TEAM_CT}
+
+
+def round_states(deaths, round_ends, freeze_tick=100):
+    """
+    extract_round_states sur des événements construits à la main.
+
+    deaths: (tick, victime, tueur); round_ends: (tick, vainqueur "T"/"CT"),
+    un round par entrée; roster ROSTER au freeze_end de chaque round.
+    """
+    events = parser_v2.EventBatch()
+    events.frames["round_end"] = pd.DataFrame({
+        "tick": [tick for tick, _ in round_ends],
+        "round": list(range(1, len(round_ends) + 1)),
+        "winner": [winner for _, winner in round_ends],
+        "reason": ["t_killed"] * len(round_ends),
+    })
+    events.frames["player_death"] = pd.DataFrame({
+        "tick": [tick for tick, _, _ in deaths],
+        "user_steamid": [victim for _, victim, _ in deaths],
+        "attacker_steamid": [attacker for _, _, attacker in deaths],
+        "user_team_num": [ROSTER[victim] for _, victim, _ in deaths],
+        "attacker_team_num": [ROSTER[attacker] for _, _, attacker in deaths],
+    })
+
+    rounds = parser_v2.extract_rounds(events)
+    freeze_ticks = [freeze_tick + i * 1000 for i in range(len(round_ends))]
+    round_index = parser_v2.RoundIndex(rounds, freeze_ticks)
+    roster_df = pd.DataFrame({
+        "tick": np.repeat(freeze_ticks, len(ROSTER)),
+        "steamid": list(ROSTER) * len(freeze_ticks),
+        "team_num": list(ROSTER.values()) * len(freeze_ticks),
+    })
+    return parser_v2.extract_round_states(events, round_index, rounds, roster_df)
+
+
+# t2 puis t3 tombent: t1 seul contre deux CT à partir du tick 300
+ONE_VS_TWO = [(200, "t2", "c1"), (300, "t3", "c2")]
+
+
+def test_clutch_1vN_won_and_timeline():
+    states = round_states(ONE_VS_TWO + [(400, "c1", "t1"), (500, "c2", "t1")], [(600, "T")])
+    assert states["clutches"] == [{
+        "round": 1, "steamId": "t1", "versus": 2, "startTick": 300,
+        "killsInClutch": 2, "won": True, "survived": True,
+    }]
+    # [tick, vivants T, vivants CT] depuis le freeze_end; le 1v1 au tick 400 n'ouvre pas un second clutch
+    assert states["manAdvantage"] == [
+        {"round": 1, "timeline": [[100, 3, 2], [200, 2, 2], [300, 1, 2], [400, 1, 1], [500, 1, 0]]},
+    ]
+
+
+def test_clutcher_dies():
+    states = round_states(ONE_VS_TWO + [(400, "c1", "t1"), (450, "t1", "c2")], [(600, "CT")])
+    (clutch,) = states["clutches"]
+    assert (clutch["steamId"], clutch["killsInClutch"], clutch["won"], clutch["survived"]) == ("t1", 1, False, False)
+
+
+def test_team_wipe_without_clutch_kill():
+    # CT éliminés un par un: c2 en 1v3, éliminé sans kill; timeline jusqu'à 0 CT
+    states = round_states([(200, "c1", "t1"), (250, "c2", "t2")], [(300, "T")])
+    assert states["clutches"] == [{
+        "round": 1, "steamId": "c2", "versus": 3, "startTick": 200,
+        "killsInClutch": 0, "won": False, "survived": False,
+    }]
+    assert states["manAdvantage"][0]["timeline"] == [[100, 3, 2], [200, 3, 1], [250, 3, 0]]
+
+    # Deux morts au même tick: une seule entrée de timeline
+    states = round_states([(200, "c1", "t1"), (200, "c2", "t2")], [(300, "T")])
+    assert states["manAdvantage"][0]["timeline"] == [[100, 3, 2], [200, 3, 0]]
+
+
+@pytest.mark.parametrize("winner, won", [("T", True), ("CT", False)])
+def test_clutch_won_follows_round_winner(winner, won):
+    # rounds.winner (WINNER_MAP) → équipe (WINNER_TEAM_NUM) comparée à celle du clutcher
+    states = round_states(ONE_VS_TWO, [(600, winner)])
+    assert states["clutches"][0]["won"] is won
+    assert parser_v2.WINNER_TEAM_NUM[parser_v2.WINNER_MAP[winner]] == ROSTER["t1" if won else "c1"]
+
+
+def test_round_without_round_end_is_not_reported():
+    # Démo tronquée: les morts après le dernier round_end n'ont pas d'issue connue
+    # et ne débordent pas sur le round précédent
+    truncated = ONE_VS_TWO + [(1200, "c1", "t1"), (1300, "c2", "t2"), (1400, "t3", "c1")]
+    states = round_states(truncated, [(600, "CT")])
+    assert [c["round"] for c in states["clutches"]] == [1]
+    assert states["clutches"][0]["killsInClutch"] == 0
+    assert [t["round"] for t in states["manAdvantage"]] == [1]
+    assert states["manAdvantage"][0]["timeline"][-1] == [300, 1, 2]
+
+
+# =============================================================================
+# INSTRUMENTATION
+# =============================================================================
+
+def test_timings_peak_alloc_per_step_under_tracemalloc():
+    import tracemalloc
+
+    timings = parser_v2.Timings()
+    tracemalloc.start()
+    try:
+        with timings.measure("large"):
+            block = bytearray(8 * 1024 * 1024)
+            del block
+        # Après le pic du processus: une étape plus petite garde son propre pic
+        with timings.measure("outer"):
+            with timings.measure("small"):
+                block = bytearray(1024 * 1024)
+                del block
+            with timings.measure("empty"):
+                pass
+    finally:
+        tracemalloc.stop()
+
+    peaks = {name: step["peakAllocKb"] for name, step in timings.steps.items()}
+    assert peaks["large"] >= 8 * 1024
+    assert 1024 <= peaks["small"] < 2 * 1024
+    assert peaks["empty"] < 64
+    # Le pic d'une étape imbriquée remonte à l'étape englobante
+    assert peaks["outer"] >= peaks["small"]
+    assert all(step["rssHighWaterKb"] >= 0 for step in timings.steps.values())
+
+
+def test_timings_share_tracemalloc_peak_across_instances():
+    import tracemalloc
+
+    outer, inner = parser_v2.Timings(), parser_v2.Timings()
+    tracemalloc.start()
+    try:
+        with outer.measure("parse"):
+            with inner.measure("large"):
+                block = bytearray(4 * 1024 * 1024)
+                del block
+            # reset_peak d'une autre instance après le pic
+            with inner.measure("empty"):
+                pass
+    finally:
+        tracemalloc.stop()
+
+    assert outer.steps["parse"]["peakAllocKb"] >= inner.steps["large"]["peakAllocKb"] >= 4 * 1024
+
+
+@pytest.mark.parametrize("profile", [False, True])
+def test_profile_adds_per_step_alloc_peaks(monkeypatch, tmp_path, profile):
+    fake = fake_demo()
+    monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake)
+    stats, _ = parser_v2.parse_to_file(
+        "fake.dem", str(tmp_path / "out.json"), parser_v2.ParserConfig(sections=["kills", "weaponFires"]),
+        profile=profile, profile_path=str(tmp_path / "profile"),
+    )
+
+    steps = stats["timings"]
+    assert {"imports", "parseEvents", "parseTicks", "kills", "weaponFires", "serialization"} <= set(steps)
+    for step in steps.values():
+        assert step["rssHighWaterKb"] > 0 or parser_v2.resource is None
+        assert ("peakAllocKb" in step) is profile
+    assert (tmp_path / "profile.prof").exists() is profile
+
+
+# =============================================================================
+# CAPACITÉS
+# =============================================================================
+
+def test_capabilities_without_imports():
+    caps = parser_v2.capabilities()
+    assert caps["ready"] and caps["missing"] == []
+    assert caps["sections"] == parser_v2.OUTPUT_SECTIONS
+    assert "imports" not in caps and "importError" not in caps
+
+
+def test_capabilities_check_imports_reports_import_times():
+    caps = parser_v2.capabilities(check_imports=True)
+    assert caps["ready"]
+    assert set(caps["imports"]) == {"numpy", "pandas", "demoparser2"}
+    assert all(ms is not None and ms >= 0 for ms in caps["imports"].values())
+
+
+def test_capabilities_check_imports_detects_broken_install(monkeypatch):
+    # Métadonnées présentes mais module non importable (ex: wheel invalide)
+    broken = parser_v2.LazyImport("broken", "parser_v2_missing_module")
+    monkeypatch.setattr(parser_v2, "LAZY_IMPORTS", [*parser_v2.LAZY_IMPORTS, broken])
+
+    assert parser_v2.capabilities()["ready"]
+    caps = parser_v2.capabilities(check_imports=True)
+    assert caps["ready"] is False
+    assert "parser_v2_missing_module" in caps["importError"]
+    assert caps["imports"]["parser_v2_missing_module"] is None
+
+
+# =============================================================================
+# CACHE DES RÉSULTATS
+# =============================================================================
+
+@pytest.fixture
+def demo_file(tmp_path):
+    path = tmp_path / "match.dem"
+    path.write_bytes(b"demo content")
+    return str(path)
+
+
+def cache_key(demo_file, **fields) -> str:
+    return parser_v2.ParseCache.key(demo_file, parser_v2.ParserConfig(**fields))
+
+
+def test_cache_key_ignores_options_without_effect(demo_file):
+    base = cache_key(demo_file, sections=["kills", "trades"])
+    # Ordre des sections, threads, options de positions sans la section positions
+    assert cache_key(demo_file, sections=["trades", "kills"]) == base
+    assert cache_key(demo_file, sections=["kills", "trades"], extract_workers=4) == base
+    assert cache_key(
+        demo_file, sections=["kills", "trades"],
+        position_sampling="adaptive", position_sample_rate=16, position_error_threshold=8.0,
+    ) == base
+    # extract_positions=False équivaut à ne pas demander positions
+    assert cache_key(demo_file, extract_positions=False) == cache_key(
+        demo_file, sections=[name for name in parser_v2.OUTPUT_SECTIONS if name != "positions"]
+    )
+    # Seuil d'erreur sans effet en échantillonnage uniform
+    assert cache_key(demo_file, position_error_threshold=8.0) == cache_key(demo_file)
+
+
+def test_cache_key_changes_with_output(demo_file):
+    base = cache_key(demo_file, sections=["positions"])
+    changed = [
+        cache_key(demo_file, sections=["positions", "kills"]),
+        cache_key(demo_file, sections=["positions"], position_sample_rate=32),
+        cache_key(demo_file, sections=["positions"], position_sampling="adaptive"),
+        cache_key(demo_file, sections=["positions"], output_format="tracks"),
+        cache_key(demo_file, sections=["positions"], string_tables=True),
+    ]
+    assert len({base, *changed}) == len(changed) + 1
+    assert cache_key(demo_file, sections=["positions"], position_sampling="adaptive", position_error_threshold=8.0) \
+        != changed[2]
+
+    Path(demo_file).write_bytes(b"other demo content")
+    assert cache_key(demo_file, sections=["positions"]) != base
+
+
+def test_cache_hit_and_output_revision(monkeypatch, tmp_path, demo_file):
+    decoded = []
+
+    def open_demo(demo_path):
+        decoded.append(demo_path)
+        return fake_demo()
+
+    monkeypatch.setattr(parser_v2, "DemoParser", open_demo)
+    cache = parser_v2.ParseCache(str(tmp_path / "cache"), 100 * 1024 * 1024)
+    config = parser_v2.ParserConfig(sections=["kills", "trades"])
+
+    first = tmp_path / "first.json"
+    stats, cached = parser_v2.parse_to_file(demo_file, str(first), config, cache)
+    assert not cached and len(decoded) == 1
+
+    # Même démo, sections dans un autre ordre: copie du cache, sans décodage
+    second = tmp_path / "second.json"
+    hit_stats, cached = parser_v2.parse_to_file(
+        demo_file, str(second), parser_v2.ParserConfig(sections=["trades", "kills"]), cache
+    )
+    assert cached and len(decoded) == 1
+    assert hit_stats == stats
+    assert second.read_bytes() == first.read_bytes()
+
+    # Nouvelle révision de sortie: les entrées existantes ne sont plus servies
+    monkeypatch.setattr(parser_v2, "OUTPUT_REVISION", parser_v2.OUTPUT_REVISION + 1)
+    _, cached = parser_v2.parse_to_file(demo_file, str(second), config, cache)
+    assert not cached and len(decoded) == 2
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = parser_v2.ParseCache(str(tmp_path / "cache"), 2500)
+    output = tmp_path / "out.json"
+    output.write_bytes(b"x" * 1000)
+
+    def entry(key: str) -> Path:
+        return tmp_path / "cache" / f"{key}.json"
+
+    for age, key in enumerate(["a", "b"]):
+        cache.store(key, str(output), {})
+        os.utime(entry(key), (1000 + age, 1000 + age))
+
+    # Une lecture rafraîchit "a": "b" devient la moins récemment utilisée
+    assert cache.fetch("a", str(tmp_path / "copy.json")) == {}
+    cache.store("c", str(output), {})
+
+    assert entry("a").exists() and entry("c").exists()
+    assert not entry("b").exists()
+    assert not (tmp_path / "cache" / "b.stats.json").exists()
+    assert cache.fetch("b", str(tmp_path / "copy.json")) is None
+
+
+# =============================================================================
+# MODE SERVEUR
+# =============================================================================
+
+def serve(monkeypatch, server, requests) -> list:
+    """serve_stdio sur des requêtes JSON lignes; retourne les réponses décodées."""
+    lines = [request if isinstance(request, str) else json.dumps(request) for request in requests]
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    parser_v2.serve_stdio(server)
+
+    # Les prints parasites partent sur stderr, stdout est restauré
+    assert sys.stdout is stdout
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def test_serve_stdio_round_trip(monkeypatch, tmp_path, demo_file):
+    monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake_demo())
+    output = tmp_path / "out.json"
+
+    ready, parsed, health, caps, shutdown = serve(monkeypatch, parser_v2.ParserServer(), [
+        {"id": 1, "type": "parse", "demoPath": demo_file, "outputPath": str(output),
+         "config": {"sections": ["kills", "trades"]}},
+        {"id": 2, "type": "health"},
+        {"id": 3, "type": "capabilities"},
+        {"id": 4, "type": "shutdown"},
+        {"id": 5, "type": "health"},  # après shutdown: non traitée
+    ])
+
+    assert ready["type"] == "ready" and ready["ready"] and ready["id"] is None
+    assert parsed["id"] == 1 and parsed["success"] and not parsed["cached"]
+    assert parsed["output"] == str(output)
+    document = json.loads(output.read_text(encoding="utf-8"))
+    assert list(document) == ["version", "kills", "trades", "parsingStats"]
+    assert parsed["stats"]["totalKills"] == len(document["kills"]) > 0
+    assert (health["id"], health["status"], health["jobs"]) == (2, "ok", 1)
+    assert caps["id"] == 3 and caps["sections"] == parser_v2.OUTPUT_SECTIONS
+    assert shutdown == {"id": 4, "type": "shutdown", "success": True}
+
+
+def test_serve_stdio_error_replies(monkeypatch, tmp_path, demo_file):
+    server = parser_v2.ParserServer()
+    replies = serve(monkeypatch, server, [
+        "{not json",
+        {"id": 1, "type": "parse", "outputPath": str(tmp_path / "out.json")},
+        {"id": 2, "type": "parse", "demoPath": demo_file, "outputPath": str(tmp_path / "out.json"),
+         "config": {"no_such_option": 1}},
+        {"id": 3, "type": "parse", "demoPath": demo_file, "outputPath": str(tmp_path / "out.json"),
+         "config": {"position_sampling": "random"}},
+        {"id": 4, "type": "parse", "demoPath": str(tmp_path / "missing.dem"), "outputPath": str(tmp_path / "out.json")},
+        {"id": 5, "type": "reload"},
+        {"id": 6, "type": "ready"},
+    ])[1:]
+
+    assert replies[0]["id"] is None and not replies[0]["success"]
+    assert replies[0]["error"].startswith("Invalid request")
+    assert replies[1]["error"] == "Missing request field: demoPath"
+    assert "no_such_option" in replies[2]["error"]
+    assert "random" in replies[3]["error"]
+    assert replies[4]["error"].startswith("File not found")
+    assert replies[5]["error"] == "Unknown request type: reload"
+    assert all(reply["success"] is False for reply in replies[:6])
+    # Requêtes rejetées: rien ne compte pour le recyclage
+    assert replies[6] == {"id": 6, "type": "ready", "ready": True, "version": parser_v2.PARSER_VERSION}
+    assert server.jobs == 0
+
+
+def test_serve_stdio_recycles_after_max_jobs(monkeypatch, tmp_path, demo_file):
+    monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake_demo())
+    request = {"type": "parse", "demoPath": demo_file, "outputPath": str(tmp_path / "out.json"),
+               "config": {"sections": ["rounds"]}}
+
+    replies = serve(monkeypatch, parser_v2.ParserServer(max_jobs=2), [
+        {**request, "id": 1}, {**request, "id": 2}, {**request, "id": 3},
+    ])[1:]
+
+    assert [reply.get("id") for reply in replies] == [1, 2, None]
+    assert all(reply["success"] for reply in replies[:2])
+    assert replies[2] == {"id": None, "type": "recycle", "jobs": 2}
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="sockets unix indisponibles")
+def test_serve_unix_socket_round_trip(monkeypatch, tmp_path, demo_file):
+    import socket
+    import threading
+    import time
+
+    monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake_demo())
+    socket_path = str(tmp_path / "parser.sock")
+    thread = threading.Thread(
+        target=parser_v2.serve_unix_socket, args=(parser_v2.ParserServer(), socket_path), daemon=True
+    )
+    thread.start()
+
+    def exchange(requests) -> list:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        for _ in range(100):
+            try:
+                client.connect(socket_path)
+                break
+            except OSError:
+                time.sleep(0.05)
+        with client, client.makefile("rw", encoding="utf-8") as stream:
+            replies = []
+            for request in requests:
+                stream.write(json.dumps(request) + "\n")
+                stream.flush()
+                replies.append(json.loads(stream.readline()))
+            return replies
+
+    try:
+        # Une connexion fermée par le client: le serveur attend la suivante
+        (parsed,) = exchange([{"id": 1, "type": "parse", "demoPath": demo_file,
+                               "outputPath": str(tmp_path / "out.json"), "config": {"sections": ["kills"]}}])
+        health, shutdown = exchange([{"id": 2, "type": "health"}, {"id": 3, "type": "shutdown"}])
+    finally:
+        thread.join(timeout=30)
+
+    assert parsed["success"] and parsed["stats"]["totalKills"] > 0
+    assert health["jobs"] == 1
+    assert shutdown["success"]
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
+
+
+# =============================================================================
+# MODE BATCH
+# =============================================================================
+
+# demoparser2 synthétique pour les processus du lot: graine lue dans le .dem
+BATCH_DEMOPARSER = '''
+from pathlib import Path
+from fake_demoparser import FakeDemoParser
+
+
+class DemoParser(FakeDemoParser):
+    def __init__(self, demo_path):
+        super().__init__(demo_path, rounds=4, fires_per_second=0.2, seed=int(Path(demo_path).read_text()))
+'''
+
+
+def run_batch_cli(tmp_path, source, *args):
+    import subprocess
+
+    modules = tmp_path / "modules"
+    modules.mkdir(exist_ok=True)
+    (modules / "demoparser2.py").write_text(BATCH_DEMOPARSER, encoding="utf-8")
+    script_dir = Path(parser_v2.__file__).resolve().parent
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(modules), str(script_dir)]), "PARSER_CACHE_DIR": ""}
+
+    completed = subprocess.run(
+        [sys.executable, str(script_dir / "parser_v2.py"), "--batch", str(source), *args],
+        capture_output=True, text=True, env=env, timeout=300,
+    )
+    lines = [json.loads(line) for line in completed.stdout.splitlines()]
+    return completed.returncode, lines[:-1], lines[-1]
+
+
+def test_batch_parses_each_demo_next_to_its_input(monkeypatch, tmp_path):
+    demos = tmp_path / "demos"
+    (demos / "nested").mkdir(parents=True)
+    for seed, path in [(1, demos / "a.dem"), (2, demos / "nested" / "b.dem")]:
+        path.write_text(str(seed))
+
+    code, results, summary = run_batch_cli(tmp_path, demos, "--workers", "2", "--sections", "kills,economyByRound")
+
+    assert code == 0
+    assert summary == {"success": True, "summary": {"total": 2, "succeeded": 2, "failed": 0}}
+    assert sorted(result["demo"] for result in results) == [str(demos / "a.dem"), str(demos / "nested" / "b.dem")]
+
+    # Chaque sortie est celle d'un parsing isolé de la même démo
+    config = parser_v2.ParserConfig(sections=["kills", "economyByRound"])
+    for result in results:
+        assert result["success"] and not result["cached"]
+        assert result["output"] == result["demo"] + parser_v2.BATCH_OUTPUT_SUFFIX
+        document = json.loads(Path(result["output"]).read_text(encoding="utf-8"))
+
+        seed = int(Path(result["demo"]).read_text())
+        fake = FakeDemoParser(rounds=4, fires_per_second=0.2, seed=seed)
+        monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake)
+        expected = parser_v2.parse_demo(result["demo"], config)
+        assert document["kills"] == expected["kills"]
+        assert document["economyByRound"] == expected["economyByRound"]
+        assert result["stats"]["totalKills"] == len(expected["kills"])
+
+
+def test_batch_reports_failures_per_demo(tmp_path):
+    (tmp_path / "a.dem").write_text("1")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# lot de test\na.dem\nmissing.dem\n", encoding="utf-8")
+
+    code, results, summary = run_batch_cli(tmp_path, manifest, "--sections", "rounds")
+
+    assert code == 1
+    assert summary == {"success": False, "summary": {"total": 2, "succeeded": 1, "failed": 1}}
+    by_demo = {Path(result["demo"]).name: result for result in results}
+    assert by_demo["a.dem"]["success"]
+    assert not by_demo["missing.dem"]["success"]
+    assert by_demo["missing.dem"]["error"].startswith("File not found")
+
+
+# =============================================================================
+# FORMATS COLONNAIRES
+# =============================================================================
+
+def test_columnar_matches_json_rows(parse):
+    rows = parse()
+    columnar = parse(output_format="columnar")
+    assert columnar["version"] == parser_v2.format_version("columnar")
+    for name in parser_v2.COLUMNAR_LAYOUTS:
+        section = columnar[name]
+        assert section["format"] == "columnar"
+        assert section["columns"] == parser_v2.rows_to_columns(name, rows[name])
+        assert section["rows"] == len(section["columns"]["tick"])
+    # Les autres sections restent des tableaux d'objets
+    assert columnar["kills"] == rows["kills"]
+
+
+@pytest.mark.parametrize("output_format", ["arrow", "parquet"])
+def test_arrow_sidecar_files_match_json_rows(parse, monkeypatch, tmp_path, output_format):
+    pa = pytest.importorskip("pyarrow")
+    rows = parse(sections=list(parser_v2.COLUMNAR_LAYOUTS))
+
+    fake = fake_demo()
+    monkeypatch.setattr(parser_v2, "DemoParser", lambda demo_path: fake)
+    output = tmp_path / "out.json"
+    parser_v2.parse_to_file(
+        "fake.dem", str(output),
+        parser_v2.ParserConfig(sections=list(parser_v2.COLUMNAR_LAYOUTS), output_format=output_format),
+    )
+    document = json.loads(output.read_text(encoding="utf-8"))
+
+    for name in parser_v2.COLUMNAR_LAYOUTS:
+        columns = parser_v2.rows_to_columns(name, rows[name])
+        section = document[name]
+        assert section == {"format": output_format, "rows": len(columns["tick"]), "path": f"out.json.{name}.{output_format}"}
+        path = str(tmp_path / section["path"])
+        if output_format == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+        else:
+            table = pa.ipc.open_file(path).read_all()
+        assert table.to_pydict() == columns
+
+
+# =============================================================================
+# SÉLECTION DES SECTIONS
+# =============================================================================
+
+def test_sections_subset_matches_full_document(parse):
+    full = parse()
+    subset = parse(sections=["trades", "positions"])
+    assert list(subset) == ["version", "positions", "trades", "parsingStats"]
+    assert subset["trades"] == full["trades"]
+    assert subset["positions"] == full["positions"]
+
+
+def test_resolve_sections_runs_dependencies_without_emitting_them():
+    selected, needed = parser_v2.resolve_sections(parser_v2.ParserConfig(sections=["clutches", "trades"]))
+    assert selected == ["clutches", "trades"]
+    assert needed == ["metadata", "rounds", "kills", "roundStates", "clutches", "trades"]
+
+    # Section désactivée par la configuration: ni produite ni exécutée
+    selected, needed = parser_v2.resolve_sections(
+        parser_v2.ParserConfig(sections=["positions"], extract_positions=False)
+    )
+    assert selected == needed == []
+
+
+def test_unknown_sections_rejected():
+    with pytest.raises(ValueError, match="roundStates, nope"):
+        parser_v2.resolve_sections(parser_v2.ParserConfig(sections=["kills", "roundStates", "nope"]))
+
+
+# =============================================================================
+# ÉTAT DES TIRS
+# =============================================================================
+
+def test_weapon_fire_state_for_every_shot(parse):
+    fires = parse(sections=["weaponFires"])["weaponFires"]
+    assert fires
+
+    # État réel des joueurs à chaque tick de tir
+    ticks = sorted({fire["tick"] for fire in fires})
+    states = fake_demo().parse_ticks(parser_v2.FIRE_TICK_PROPS, ticks=ticks)
+    by_key = {
+        (int(tick), str(steamid)): row
+        for tick, steamid, row in zip(states["tick"], states["steamid"], states.to_dict("records"))
+    }
+
+    for fire in fires:
+        state = by_key[(fire["tick"], fire["steamId"])]
+        assert fire["position"] == {"x": state["X"], "y": state["Y"], "z": state["Z"]}
+        assert fire["velocity"] == {"x": state["velocity_X"], "y": state["velocity_Y"], "z": state["velocity_Z"]}
+        assert fire["speed"] == pytest.approx(float(np.hypot(state["velocity_X"], state["velocity_Y"])))
+        assert fire["viewAngles"] == {"yaw": state["yaw"], "pitch": state["pitch"]}
+        assert (fire["isScoped"], fire["isCrouching"], fire["isAirborne"]) == (
+            state["is_scoped"], state["in_crouch"], state["is_airborne"]
+        )
+        assert fire["isMoving"] == (fire["speed"] > 10)
+        assert fire["isCounterStrafed"] == (fire["speed"] < 34)
+
+
+# =============================================================================
+# ÉCHANTILLONNAGE ADAPTATIF
+# =============================================================================
+
+def test_adaptive_positions_stay_within_threshold_of_dense_grid(parse):
+    rate, threshold = 64, 32.0
+    dense_rate = rate // parser_v2.ADAPTIVE_GRID_DIVISOR
+    document = parse(sections=["rounds", "kills", "damages", "positions"], position_sample_rate=dense_rate)
+    adaptive = parse(
+        sections=["positions"], position_sampling="adaptive",
+        position_sample_rate=rate, position_error_threshold=threshold,
+    )["positions"]
+
+    tickrate = SCENARIO["tickrate"]
+    max_gap = parser_v2.seconds_to_ticks(parser_v2.ADAPTIVE_MAX_GAP_SECONDS, tickrate)
+    contact_window = parser_v2.seconds_to_ticks(parser_v2.ADAPTIVE_CONTACT_SECONDS, tickrate)
+    contacts = [
+        (event["tick"], steamid)
+        for event in document["kills"] + document["damages"]
+        for steamid in (event["attackerSteamId"], event["victimSteamId"])
+    ]
+    round_ends = np.array([r["tick"] for r in document["rounds"]])
+
+    def by_player(snapshots):
+        return {
+            (snapshot["tick"], player["steamId"]): player
+            for snapshot in snapshots for player in snapshot["players"]
+        }
+
+    dense = by_player(document["positions"])
+    kept = by_player(adaptive)
+    assert kept.keys() <= dense.keys()
+    assert len(kept) < len(dense) / parser_v2.ADAPTIVE_GRID_DIVISOR
+
+    # Rejoue la grille dense joueur par joueur: chaque état non retenu est
+    # déductible du dernier échantillon retenu (même round)
+    last = {}
+    for (tick, steamid), player in sorted(dense.items()):
+        key = (int(np.searchsorted(round_ends, tick)), steamid)
+        near_contact = any(abs(tick - t) <= contact_window and s == steamid for t, s in contacts)
+
+        if (tick, steamid) in kept:
+            assert kept[(tick, steamid)] == player
+            last[key] = (tick, player)
+            continue
+
+        assert not near_contact, (tick, steamid)
+        if tick % rate:
+            continue
+        assert key in last, (tick, steamid)
+        prev_tick, prev = last[key]
+        assert tick - prev_tick < max_gap
+        assert {k: v for k, v in player.items() if k not in parser_v2.ADAPTIVE_CONTINUOUS_KEYS} \
+            == {k: v for k, v in prev.items() if k not in parser_v2.ADAPTIVE_CONTINUOUS_KEYS}
+        dt = (tick - prev_tick) / tickrate
+        error = np.linalg.norm([player[axis] - prev[axis] - prev[f"velocity{axis.upper()}"] * dt for axis in "xyz"])
+        assert error <= threshold, (tick, steamid)
+
+
+# =============================================================================
+# FORMAT TRACKS
+# =============================================================================
+
+def test_tracks_round_trip(parse):
+    rows = parse()
+    tracks = parse(output_format="tracks")
+    for name in parser_v2.COLUMNAR_LAYOUTS:
+        decoded = parser_v2.rows_to_columns(name, parser_v2.decode_tracks(name, tracks[name]))
+        expected = parser_v2.rows_to_columns(name, rows[name])
+        assert list(decoded) == list(expected)
+
+        # Même tick: ordre des pistes (ordre d'apparition des joueurs)
+        track_order = {key: i for i, key in enumerate(dict.fromkeys(expected["steamId"]))}
+        order = sorted(range(len(expected["tick"])), key=lambda i: (expected["tick"][i], track_order[expected["steamId"][i]]))
+        expected = {column: [values[i] for i in order] for column, values in expected.items()}
+
+        # Colonnes quantifiées: à un demi-pas de quantification près; speed est
+        # recalculée depuis les vélocités décodées; le reste est exact
+        for column, values in expected.items():
+            if column in parser_v2.TRACK_DELTA_SCALES:
+                step = 0.5 / parser_v2.TRACK_DELTA_SCALES[column]
+                assert np.all(np.abs(np.subtract(decoded[column], values)) <= step + 1e-9), (name, column)
+            elif column not in parser_v2.TRACK_DERIVED:
+                assert decoded[column] == values, (name, column)
+        assert decoded["speed"] == pytest.approx(np.hypot(decoded["velocityX"], decoded["velocityY"]).tolist())
+
+
+def test_track_codecs_do_not_accumulate_rounding():
+    # Marche aléatoire longue: l'erreur reste d'un demi-pas, sans dérive
+    values = np.cumsum(np.random.default_rng(0).normal(0, 37.3, 100_000)).tolist()
+    decoded = parser_v2.delta_decode(parser_v2.delta_encode(values, 8), 8)
+    assert np.max(np.abs(np.subtract(decoded, values))) <= 0.5 / 8 + 1e-9
+
+    assert parser_v2.delta_encode([3, 3, 5, 2], 1) == [3, 0, 2, -3]
+    assert parser_v2.delta_decode([3, 0, 2, -3], 1) == [3, 3, 5, 2]
+
+    values = ["ak47", "ak47", None, None, None, "ak47"]
+    assert parser_v2.rle_encode(values) == [["ak47", 2], [None, 3], ["ak47", 1]]
+    assert parser_v2.rle_decode(parser_v2.rle_encode(values)) == values
+
+
+# =============================================================================
+# TABLES DE CHAÎNES
+# =============================================================================
+
+@pytest.mark.parametrize("output_format", ["json", "columnar", "tracks"])
+def test_string_tables_round_trip(parse, output_format):
+    plain = parse(output_format=output_format)
+    encoded = parse(output_format=output_format, string_tables=True)
+
+    assert encoded["version"] == plain["version"] + "-strings"
+    assert list(encoded)[-2:] == ["stringTables", "parsingStats"]
+
+    resolved = parser_v2.resolve_string_tables(encoded)
+    resolved["version"] = plain["version"]
+    assert resolved == plain
+
+
+def test_string_tables_rejected_for_sidecar_formats():
+    with pytest.raises(ValueError):
+        next(parser_v2.format_sections(iter([]), "arrow", "out.json", string_tables=True))
+
+
+def test_string_tables_replace_repeated_strings_by_index(parse):
+    plain = parse()
+    encoded = parse(string_tables=True)
+    tables = encoded["stringTables"]
+    assert list(tables) == parser_v2.STRING_TABLES
+    for values in tables.values():
+        assert len(values) == len(set(values))
+
+    # Index attribués dans l'ordre de première apparition
+    steamids = list(dict.fromkeys(row["steamId"] for row in plain["players"]))
+    assert tables["steamIds"][:len(steamids)] == steamids
+
+    for plain_kill, kill in zip(plain["kills"], encoded["kills"]):
+        for key, table in (("attackerSteamId", "steamIds"), ("victimName", "names"), ("weapon", "weapons")):
+            assert isinstance(kill[key], int)
+            assert tables[table][kill[key]] == plain_kill[key]
+
+    assert len(json.dumps(encoded)) < len(json.dumps(plain))
+
+
+# =============================================================================
+# EXTRACTION PARALLÈLE
+# =============================================================================
+
+@pytest.mark.parametrize("output_format", ["json", "tracks"])
+def test_extract_workers_do_not_change_output(parse, output_format):
+    serial = parse(output_format=output_format)
+    for workers in (2, 4, 0):
+        assert parse(output_format=output_format, extract_workers=workers) == serial, workers
+
+
+def test_extraction_pool_keeps_order_and_bounds_lookahead():
+    import time
+
+    pulled = []
+
+    def items():
+        for i in range(20):
+            pulled.append(i)
+            yield i
+
+    def slow_first(i):
+        # Les premiers items finissent après les suivants
+        time.sleep(0.01 * max(0, 3 - i))
+        return i * i
+
+    with parser_v2.ExtractionPool(2) as pool:
+        results = pool.map(slow_first, items())
+        assert next(results) == 0
+        # Au plus workers calculs d'avance sur le résultat consommé
+        assert len(pulled) <= 3
+        assert list(results) == [i * i for i in range(1, 20)]
@@ -26,8 +26,22 @@ export interface ParseOptions {
   extractPositions?: boolean;
   /** Taux d'échantillonnage des positions */
   positionSampleRate?: number;
+  /** Échantillonnage des positions: uniforme, ou adaptatif (dense autour des contacts, épars à l'arrêt) */
+  positionSampling?: 'uniform' | 'adaptive';
+  /** Mode adaptatif: écart de position toléré avant un nouvel échantillon (unités de jeu) */
+  positionErrorThreshold?: number;
   /** Timeout en millisecondes */
   timeout?: number;
+  /** Lire la sortie NDJSON du parser au fil de l'eau (sans fichier temporaire) */
+  stream?: boolean;
+  /** Sections à extraire (défaut: toutes), ex: ['kills', 'trades'] */
+  sections?: string[];
+  /** Encodage de positions/weaponFires entre Python et Node ('tracks' = pistes compactes, décodées à la lecture) */
+  format?: 'json' | 'tracks';
+  /** steamIds, noms et armes transmis par index dans une table de chaînes (résolus à la lecture) */
+  stringTables?: boolean;
+  /** Threads d'extraction pour cette démo (1 = séquentiel, 0 = nombre de cœurs); sortie identique */
+  extractWorkers?: number;
 }
 
 /**
@@ -0,0 +1,228 @@
+/**
+ * Parser Server Pool - Processus parser_v2.py --serve maintenus à chaud
+ *
+ * Chaque worker est un interpréteur Python déjà initialisé (demoparser2,
+ * pandas, numpy importés) qui traite les demandes de parsing une par une
+ * via un protocole JSON lignes sur stdin/stdout. Un worker se recycle de
+ * lui-même après PARSER_SERVER_MAX_JOBS parsings et est remplacé.
+ *
+ * Activé avec PARSER_SERVER_WORKERS > 0 (typiquement = JOB_CONCURRENCY).
+ */
+
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
+
+/**
+ * Réponse du serveur (une ligne JSON)
+ */
+export interface ParserServerResponse {
+  id: number | null;
+  type?: string;
+  success?: boolean;
+  ready?: boolean;
+  output?: string;
+  error?: string;
+  stats?: Record<string, unknown>;
+}
+
+/**
+ * Champs ParserConfig (snake_case, côté Python)
+ */
+export type ParserServerConfig = Record<string, string | number | boolean | string[]>;
+
+export interface ParserServerPoolOptions {
+  pythonPath: string;
+  scriptPath: string;
+  workers: number;
+  maxJobsPerWorker: number;
+}
+
+interface PendingRequest {
+  resolve: (response: ParserServerResponse) => void;
+  timeoutId: NodeJS.Timeout;
+}
+
+const READY_TIMEOUT_MS = 30 * 1000;
+
+class ParserServerWorker {
+  private process: ChildProcessWithoutNullStreams;
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 1;
+  private stderr = '';
+  readonly ready: Promise<boolean>;
+  alive = true;
+  busy = false;
+
+  constructor(options: ParserServerPoolOptions, private onExit: (worker: ParserServerWorker) => void) {
+    this.process = spawn(options.pythonPath, [
+      options.scriptPath,
+      '--serve',
+      '--max-jobs',
+      options.maxJobsPerWorker.toString(),
+    ]);
+
+    let markReady: (ready: boolean) => void = () => {};
+    this.ready = new Promise((resolve) => {
+      markReady = resolve;
+    });
+    const readyTimeoutId = setTimeout(() => {
+      markReady(false);
+      this.kill();
+    }, READY_TIMEOUT_MS);
+
+    const lines = readline.createInterface({ input: this.process.stdout });
+    lines.on('line', (line) => {
+      let response: ParserServerResponse;
+      try {
+        response = JSON.parse(line);
+      } catch {
+        return;
+      }
+
+      if (response.id === null) {
+        // Messages non sollicités: annonce de démarrage et recyclage
+        if (response.type === 'ready') {
+          clearTimeout(readyTimeoutId);
+          markReady(response.ready === true);
+        } else if (response.type === 'recycle') {
+          this.alive = false;
+        }
+        return;
+      }
+
+      const request = this.pending.get(response.id);
+      if (request) {
+        this.pending.delete(response.id);
+        clearTimeout(request.timeoutId);
+        request.resolve(response);
+      }
+    });
+
+    this.process.stderr.on('data', (data) => {
+      // Conserver uniquement la fin pour les messages d'erreur
+      this.stderr = (this.stderr + data.toString()).slice(-4000);
+    });
+
+    this.process.on('close', (code) => {
+      clearTimeout(readyTimeoutId);
+      markReady(false);
+      this.alive = false;
+      for (const [id, request] of this.pending) {
+        clearTimeout(request.timeoutId);
+        request.resolve({
+          id,
+          success: false,
+          error: this.stderr || `Parser server arrêté (exit code: ${code})`,
+        });
+      }
+      this.pending.clear();
+      this.onExit(this);
+    });
+
+    this.process.on('error', (err) => {
+      this.stderr += err.message;
+    });
+  }
+
+  request(payload: Record<string, unknown>, timeout: number): Promise<ParserServerResponse> {
+    const id = this.nextId++;
+
+    return new Promise((resolve) => {
+      const timeoutId = setTimeout(() => {
+        this.pending.delete(id);
+        // Un parsing bloqué n'est pas interruptible: on remplace le worker
+        this.kill();
+        resolve({ id, success: false, error: `Timeout après ${timeout / 1000}s` });
+      }, timeout);
+
+      this.pending.set(id, { resolve, timeoutId });
+      this.process.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+    });
+  }
+
+  kill(): void {
+    this.alive = false;
+    this.process.kill('SIGKILL');
+  }
+}
+
+export class ParserServerPool {
+  private workers: ParserServerWorker[] = [];
+  private waiting: Array<(worker: ParserServerWorker) => void> = [];
+
+  constructor(private options: ParserServerPoolOptions) {}
+
+  /**
+   * Vérifie qu'un worker démarre et répond (remplace un spawn de vérification)
+   */
+  async checkHealth(timeout = 5000): Promise<{ available: boolean; reason?: string }> {
+    const worker = await this.acquire();
+    try {
+      const response = await worker.request({ type: 'health' }, timeout);
+      if (response.error) {
+        return { available: false, reason: `Parser server indisponible: ${response.error}` };
+      }
+      return { available: true };
+    } finally {
+      this.release(worker);
+    }
+  }
+
+  /**
+   * Parse une démo sur un worker chaud; le JSON est écrit dans outputPath
+   */
+  async parse(
+    demoPath: string,
+    outputPath: string,
+    config: ParserServerConfig,
+    timeout: number
+  ): Promise<ParserServerResponse> {
+    const worker = await this.acquire();
+    try {
+      return await worker.request({ type: 'parse', demoPath, outputPath, config }, timeout);
+    } finally {
+      this.release(worker);
+    }
+  }
+
+  shutdown(): void {
+    for (const worker of this.workers) {
+      worker.kill();
+    }
+    this.workers = [];
+  }
+
+  private async acquire(): Promise<ParserServerWorker> {
+    for (;;) {
+      const worker = this.workers.find((w) => w.alive && !w.busy)
+        ?? (this.workers.length < this.options.workers ? this.spawnWorker() : null);
+
+      if (!worker) {
+        await new Promise<ParserServerWorker>((resolve) => this.waiting.push(resolve));
+        continue;
+      }
+
+      worker.busy = true;
+      if (await worker.ready) {
+        return worker;
+      }
+      worker.busy = false;
+      worker.kill();
+      throw new Error('Parser server: le worker n\'a pas pu démarrer');
+    }
+  }
+
+  private release(worker: ParserServerWorker): void {
+    worker.busy = false;
+    this.waiting.shift()?.(worker);
+  }
+
+  private spawnWorker(): ParserServerWorker {
+    const worker = new ParserServerWorker(this.options, (exited) => {
+      this.workers = this.workers.filter((w) => w !== exited);
+      this.waiting.shift()?.(exited);
+    });
+    this.workers.push(worker);
+    return worker;
+  }
+}
@@ -10,18 +10,36 @@
 import { spawn } from 'child_process';
 import { promises as fs } from 'fs';
 import path from 'path';
+import readline from 'readline';
 import type {
   IParserStrategy,
   ParserAvailability,
   ParseOptions,
   ParseResult,
 } from './IParserStrategy';
-import type { ParsedDemoDataV2 } from '../types-v2';
+import { ParserServerPool, type ParserServerConfig } from './ParserServerPool';
+import type { ParsedDemoDataV2, ParserCapabilities } from '../types-v2';
+import { decodeTrackSections } from '../tracks';
+import { resolveStringTables } from '../string-tables';
 
 const PARSER_SCRIPT = path.join(process.cwd(), 'scripts/demo-parser/parser_v2.py');
 const PYTHON_PATH = process.env.PYTHON_PATH || 'python3';
 const DEFAULT_TIMEOUT_MS = 10 * 60 * 1000; // 10 minutes
 
+// Serveurs parser_v2.py --serve chauds (0 = un processus par démo)
+const SERVER_WORKERS = parseInt(process.env.PARSER_SERVER_WORKERS || '0', 10);
+const SERVER_MAX_JOBS = parseInt(process.env.PARSER_SERVER_MAX_JOBS || '20', 10);
+
+/**
+ * Ligne NDJSON produite par parser_v2.py --stream
+ */
+interface StreamMessage {
+  section: string;
+  data?: unknown;
+  rows?: unknown[];
+  success?: boolean;
+}
+
 export class ParserV2Strategy implements IParserStrategy {
   readonly id = 'parser-v2';
   readonly version = '2.0';
@@ -30,6 +48,14 @@ export class ParserV2Strategy implements IParserStrategy {
 
   private pythonAvailable: boolean | null = null;
   private scriptExists: boolean | null = null;
+  private serverPool: ParserServerPool | null = SERVER_WORKERS > 0
+    ? new ParserServerPool({
+        pythonPath: PYTHON_PATH,
+        scriptPath: PARSER_SCRIPT,
+        workers: SERVER_WORKERS,
+        maxJobsPerWorker: SERVER_MAX_JOBS,
+      })
+    : null;
 
   async checkAvailability(): Promise<ParserAvailability> {
     // Vérifier si le script existe
@@ -138,11 +164,25 @@ export class ParserV2Strategy implements IParserStrategy {
         };
       }
 
-      // Préparer les arguments
-      const args = this.buildParserArgs(demoPath, outputPath, options);
+      // Mode streaming: sections lues au fil de l'eau sur stdout
+      if (options?.stream) {
+        const args = this.buildParserArgs(demoPath, null, options);
+        const streamed = await this.executePythonStream(args, options.timeout || DEFAULT_TIMEOUT_MS);
+
+        return {
+          success: streamed.success,
+          data: streamed.data && resolveStringTables(decodeTrackSections(streamed.data)),
+          error: streamed.error,
+          parserVersion: this.version,
+          parseTimeMs: Date.now() - startTime,
+        };
+      }
 
-      // Exécuter le parser
-      const result = await this.executePython(args, options?.timeout || DEFAULT_TIMEOUT_MS);
+      // Exécuter le parser (serveur chaud si configuré, sinon un processus dédié)
+      const timeout = options?.timeout || DEFAULT_TIMEOUT_MS;
+      const result = this.serverPool
+        ? await this.serverPool.parse(demoPath, outputPath, this.buildServerConfig(options), timeout)
+        : await this.executePython(this.buildParserArgs(demoPath, outputPath, options), timeout);
 
       if (!result.success) {
         return {
@@ -155,7 +195,7 @@ export class ParserV2Strategy implements IParserStrategy {
 
       // Lire et parser le résultat JSON
       const jsonContent = await fs.readFile(outputPath, 'utf-8');
-      const data: ParsedDemoDataV2 = JSON.parse(jsonContent);
+      const data: ParsedDemoDataV2 = resolveStringTables(decodeTrackSections(JSON.parse(jsonContent)));
 
       // Nettoyer le fichier temporaire
       await fs.unlink(outputPath).catch(() => {});
@@ -181,10 +221,10 @@ export class ParserV2Strategy implements IParserStrategy {
 
   private buildParserArgs(
     demoPath: string,
-    outputPath: string,
+    outputPath: string | null,
     options?: ParseOptions
   ): string[] {
-    const args = [PARSER_SCRIPT, demoPath, outputPath];
+    const args = outputPath ? [PARSER_SCRIPT, demoPath, outputPath] : [PARSER_SCRIPT, demoPath, '--stream'];
 
     if (options?.extractWeaponFires === false) {
       args.push('--no-weapon-fires');
@@ -195,16 +235,82 @@ export class ParserV2Strategy implements IParserStrategy {
     if (options?.positionSampleRate && options.positionSampleRate !== 64) {
       args.push('--position-sample-rate', options.positionSampleRate.toString());
     }
+    if (options?.positionSampling === 'adaptive') {
+      args.push('--position-sampling', 'adaptive');
+    }
+    if (options?.positionErrorThreshold !== undefined) {
+      args.push('--position-error', options.positionErrorThreshold.toString());
+    }
+    if (options?.sections?.length) {
+      args.push('--sections', options.sections.join(','));
+    }
+    if (options?.format === 'tracks') {
+      args.push('--format', 'tracks');
+    }
+    if (options?.stringTables) {
+      args.push('--string-tables');
+    }
+    if (options?.extractWorkers !== undefined) {
+      args.push('--extract-workers', options.extractWorkers.toString());
+    }
 
     return args;
   }
 
+  private buildServerConfig(options?: ParseOptions): ParserServerConfig {
+    const config: ParserServerConfig = {};
+
+    if (options?.extractWeaponFires === false) {
+      config.extract_weapon_fires = false;
+    }
+    if (options?.extractPositions === false) {
+      config.extract_positions = false;
+    }
+    if (options?.positionSampleRate) {
+      config.position_sample_rate = options.positionSampleRate;
+    }
+    if (options?.positionSampling) {
+      config.position_sampling = options.positionSampling;
+    }
+    if (options?.positionErrorThreshold !== undefined) {
+      config.position_error_threshold = options.positionErrorThreshold;
+    }
+    if (options?.sections?.length) {
+      config.sections = options.sections;
+    }
+    if (options?.format === 'tracks') {
+      config.output_format = 'tracks';
+    }
+    if (options?.stringTables) {
+      config.string_tables = true;
+    }
+    if (options?.extractWorkers !== undefined) {
+      config.extract_workers = options.extractWorkers;
+    }
+
+    return config;
+  }
+
   private async checkPythonDependencies(): Promise<{ available: boolean; reason?: string }> {
+    // Un serveur chaud qui répond suffit: pas de processus de vérification en plus
+    if (this.serverPool) {
+      if (this.pythonAvailable) {
+        return { available: true };
+      }
+      try {
+        return await this.serverPool.checkHealth();
+      } catch (error) {
+        return {
+          available: false,
+          reason: `Parser server indisponible: ${error instanceof Error ? error.message : 'Unknown'}`,
+        };
+      }
+    }
+
+    // --capabilities lit les métadonnées des paquets sans importer pandas ni
+    // demoparser2: réponse en quelques dizaines de ms même à froid
     return new Promise((resolve) => {
-      const checkProcess = spawn(PYTHON_PATH, [
-        '-c',
-        'import demoparser2; print("OK")',
-      ]);
+      const checkProcess = spawn(PYTHON_PATH, [PARSER_SCRIPT, '--capabilities']);
 
       let stdout = '';
       let stderr = '';
@@ -218,12 +324,24 @@ export class ParserV2Strategy implements IParserStrategy {
       });
 
       checkProcess.on('close', (code) => {
-        if (code === 0 && stdout.includes('OK')) {
+        let capabilities: ParserCapabilities | null = null;
+        try {
+          capabilities = JSON.parse(stdout) as ParserCapabilities;
+        } catch {
+          // Sortie non JSON: Python absent ou script en erreur
+        }
+
+        if (code === 0 && capabilities?.ready) {
           resolve({ available: true });
+        } else if (capabilities) {
+          resolve({
+            available: false,
+            reason: `Dépendances Python manquantes: ${capabilities.missing.join(', ')} (pip install ${capabilities.missing.join(' ')})`,
+          });
         } else {
           resolve({
             available: false,
-            reason: `demoparser2 non installé: ${stderr || 'pip install demoparser2'}`,
+            reason: `parser_v2.py --capabilities a échoué: ${stderr || `code ${code}`}`,
           });
         }
       });
@@ -290,6 +408,88 @@ export class ParserV2Strategy implements IParserStrategy {
       });
     });
   }
+
+  private executePythonStream(
+    args: string[],
+    timeout: number
+  ): Promise<{ success: boolean; data?: ParsedDemoDataV2; error?: string }> {
+    return new Promise((resolve) => {
+      const pythonProcess = spawn(PYTHON_PATH, args, {
+        stdio: ['ignore', 'pipe', 'pipe'],
+      });
+
+      const sections: Record<string, unknown> = {};
+      let completed = false;
+      let streamError: string | undefined;
+      let stderr = '';
+
+      // Chaque ligne est une section scalaire ou un chunk de lignes d'une section
+      const lines = readline.createInterface({ input: pythonProcess.stdout });
+      lines.on('line', (line) => {
+        if (!line || streamError) return;
+
+        let message: StreamMessage;
+        try {
+          message = JSON.parse(line);
+        } catch {
+          streamError = `Ligne NDJSON invalide: ${line.slice(0, 200)}`;
+          return;
+        }
+
+        if (message.section === 'end') {
+          completed = message.success === true;
+          return;
+        }
+
+        if (message.rows) {
+          const existing = sections[message.section] as unknown[] | undefined;
+          if (existing) {
+            for (const row of message.rows) existing.push(row);
+          } else {
+            sections[message.section] = message.rows;
+          }
+        } else {
+          sections[message.section] = message.data;
+        }
+      });
+
+      pythonProcess.stderr.on('data', (data) => {
+        stderr += data.toString();
+      });
+
+      pythonProcess.on('close', (code) => {
+        clearTimeout(timeoutId);
+
+        if (code === 0 && completed && !streamError) {
+          resolve({ success: true, data: sections as unknown as ParsedDemoDataV2 });
+          return;
+        }
+
+        if (streamError) {
+          resolve({ success: false, error: streamError });
+          return;
+        }
+
+        // Essayer de parser l'erreur JSON
+        try {
+          const errorObj = JSON.parse(stderr);
+          resolve({ success: false, error: errorObj.error || stderr });
+        } catch {
+          resolve({ success: false, error: stderr || `Flux incomplet (exit code: ${code})` });
+        }
+      });
+
+      pythonProcess.on('error', (err) => {
+        resolve({ success: false, error: err.message });
+      });
+
+      // Timeout
+      const timeoutId = setTimeout(() => {
+        pythonProcess.kill('SIGKILL');
+        resolve({ success: false, error: `Timeout après ${timeout / 1000}s` });
+      }, timeout);
+    });
+  }
 }
 
 // Singleton pour éviter les vérifications multiples
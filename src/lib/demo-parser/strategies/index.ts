@@ -17,6 +17,8 @@ export type {
 // Stratégies concrètes
 export { ParserV2Strategy, parserV2Strategy } from './ParserV2Strategy';
 export { ParserV1Strategy, parserV1Strategy } from './ParserV1Strategy';
+export { ParserServerPool } from './ParserServerPool';
+export type { ParserServerConfig, ParserServerPoolOptions, ParserServerResponse } from './ParserServerPool';
 
 // Context (orchestrateur)
 export { ParserContext, parserContext } from './ParserContext';
@@ -0,0 +1,75 @@
+/**
+ * Résolution des tables de chaînes de parser_v2.py (--string-tables)
+ *
+ * Les steamIds, noms et armes des lignes sont remplacés par des index dans
+ * une section stringTables:
+ *
+ *   { steamIds: [...], names: [...], weapons: [...], weaponCategories: [...] }
+ *
+ * Chaque champ de STRING_TABLE_KEYS (objets imbriqués compris) porte l'index
+ * de sa valeur dans la table correspondante. Même spécification que
+ * resolve_string_tables (Python). À appliquer après decodeTrackSections.
+ */
+
+import type { ParsedDemoDataV2 } from './types-v2';
+
+export type StringTables = Record<string, unknown[]>;
+
+/** Clé de ligne → table (STRING_TABLE_KEYS de parser_v2.py) */
+export const STRING_TABLE_KEYS: Record<string, string> = {
+  steamId: 'steamIds',
+  attackerSteamId: 'steamIds',
+  victimSteamId: 'steamIds',
+  killerSteamId: 'steamIds',
+  throwerSteamId: 'steamIds',
+  flasherSteamId: 'steamIds',
+  winnerId: 'steamIds',
+  loserId: 'steamIds',
+  traderId: 'steamIds',
+  originalVictimId: 'steamIds',
+  originalKillerId: 'steamIds',
+  name: 'names',
+  attackerName: 'names',
+  victimName: 'names',
+  weapon: 'weapons',
+  item: 'weapons',
+  weaponCategory: 'weaponCategories',
+  itemCategory: 'weaponCategories',
+};
+
+function resolveValue(value: unknown, tables: StringTables): unknown {
+  if (Array.isArray(value)) {
+    return value.map((item) => resolveValue(item, tables));
+  }
+  if (typeof value !== 'object' || value === null) {
+    return value;
+  }
+
+  const resolved: Record<string, unknown> = {};
+  for (const [key, item] of Object.entries(value)) {
+    const table = STRING_TABLE_KEYS[key];
+    resolved[key] = table !== undefined && typeof item === 'number'
+      ? tables[table][item]
+      : resolveValue(item, tables);
+  }
+  return resolved;
+}
+
+/**
+ * Remplace en place les index par les chaînes et retire la section stringTables
+ */
+export function resolveStringTables(data: ParsedDemoDataV2): ParsedDemoDataV2 {
+  const raw = data as unknown as Record<string, unknown>;
+  const tables = raw.stringTables as StringTables | undefined;
+  if (!tables) {
+    return data;
+  }
+
+  delete raw.stringTables;
+  for (const [name, value] of Object.entries(raw)) {
+    if (Array.isArray(value)) {
+      raw[name] = resolveValue(value, tables);
+    }
+  }
+  return data;
+}
@@ -0,0 +1,156 @@
+/**
+ * Décodeur du format "tracks" de parser_v2.py (--format tracks)
+ *
+ * Les sections volumineuses (positions, weaponFires) sont encodées en pistes
+ * par joueur:
+ *
+ *   { format: 'tracks', rows: n,
+ *     encoding: { colonne: { codec: 'delta', scale } | { codec: 'rle' } },
+ *     derived: ['speed'],
+ *     tracks: [{ steamId, rows: k, columns: { colonne: données } }] }
+ *
+ * - delta: entiers [q0, q1 - q0, ...]; valeur i = (q0 + ... + qi) / scale
+ * - rle: [[valeur, répétitions], ...]
+ * - speed = sqrt(velocityX² + velocityY²), recalculée depuis les vélocités
+ *
+ * Les lignes d'origine s'obtiennent en fusionnant les pistes par tick (tri
+ * stable, piste par piste). Les lignes d'un même tick sortent dans l'ordre des
+ * pistes: des tirs simultanés de joueurs différents peuvent être permutés.
+ * Même spécification que decode_tracks (Python).
+ */
+
+import type {
+  ParsedDemoDataV2,
+  PlayerStateSnapshot,
+  PositionSnapshotV2,
+  WeaponFireEvent,
+} from './types-v2';
+
+export type TrackCodec = { codec: 'delta'; scale: number } | { codec: 'rle' };
+
+export interface TrackSection {
+  format: 'tracks';
+  rows: number;
+  encoding: Record<string, TrackCodec>;
+  derived: string[];
+  tracks: Array<{
+    steamId: string;
+    rows: number;
+    columns: Record<string, unknown[]>;
+  }>;
+}
+
+type FlatRow = Record<string, unknown> & { tick: number; steamId: string };
+
+/**
+ * Vérifie si une section est encodée en pistes
+ */
+export function isTrackSection(value: unknown): value is TrackSection {
+  return typeof value === 'object' && value !== null && (value as { format?: string }).format === 'tracks';
+}
+
+function deltaDecode(deltas: number[], scale: number): number[] {
+  const values = new Array<number>(deltas.length);
+  let quantized = 0;
+  for (let i = 0; i < deltas.length; i++) {
+    quantized += deltas[i];
+    values[i] = quantized / scale;
+  }
+  return values;
+}
+
+function rleDecode(runs: Array<[unknown, number]>): unknown[] {
+  const values: unknown[] = [];
+  for (const [value, count] of runs) {
+    for (let i = 0; i < count; i++) values.push(value);
+  }
+  return values;
+}
+
+/**
+ * Décode une section en lignes à plat (une ligne par joueur et par tick), triées par tick
+ */
+export function decodeTrackSection(section: TrackSection): FlatRow[] {
+  const rows: FlatRow[] = [];
+  const withSpeed = section.derived.includes('speed');
+
+  for (const track of section.tracks) {
+    const columns: Record<string, unknown[]> = {};
+    for (const [column, data] of Object.entries(track.columns)) {
+      const codec = section.encoding[column];
+      columns[column] = codec.codec === 'delta'
+        ? deltaDecode(data as number[], codec.scale)
+        : rleDecode(data as Array<[unknown, number]>);
+    }
+
+    for (let i = 0; i < track.rows; i++) {
+      const row = { steamId: track.steamId } as FlatRow;
+      for (const [column, values] of Object.entries(columns)) {
+        row[column] = values[i];
+      }
+      if (withSpeed) {
+        const vx = row.velocityX as number;
+        const vy = row.velocityY as number;
+        row.speed = Math.sqrt(vx * vx + vy * vy);
+      }
+      rows.push(row);
+    }
+  }
+
+  // Array.prototype.sort est stable: fusion des pistes par tick
+  return rows.sort((a, b) => a.tick - b.tick);
+}
+
+/**
+ * Reconstruit la section positions (snapshots par tick)
+ */
+export function decodePositionTracks(section: TrackSection): PositionSnapshotV2[] {
+  const snapshots: PositionSnapshotV2[] = [];
+  for (const { tick, ...rest } of decodeTrackSection(section)) {
+    const player = rest as unknown as PlayerStateSnapshot;
+    const last = snapshots[snapshots.length - 1];
+    if (last && last.tick === tick) {
+      last.players.push(player);
+    } else {
+      snapshots.push({ tick, players: [player] });
+    }
+  }
+  return snapshots;
+}
+
+/**
+ * Reconstruit la section weaponFires (objets imbriqués d'origine)
+ */
+export function decodeWeaponFireTracks(section: TrackSection): WeaponFireEvent[] {
+  return decodeTrackSection(section).map((row) => ({
+    tick: row.tick,
+    round: row.round as number,
+    steamId: row.steamId,
+    weapon: row.weapon as string,
+    weaponCategory: row.weaponCategory as WeaponFireEvent['weaponCategory'],
+    silencer: row.silencer as boolean,
+    position: { x: row.x as number, y: row.y as number, z: row.z as number },
+    velocity: { x: row.velocityX as number, y: row.velocityY as number, z: row.velocityZ as number },
+    speed: row.speed as number,
+    viewAngles: { yaw: row.yaw as number, pitch: row.pitch as number },
+    isScoped: row.isScoped as boolean,
+    isCrouching: row.isCrouching as boolean,
+    isAirborne: row.isAirborne as boolean,
+    isMoving: row.isMoving as boolean,
+    isCounterStrafed: row.isCounterStrafed as boolean,
+  }));
+}
+
+/**
+ * Remplace en place les sections encodées en pistes par leur forme JSON d'origine
+ */
+export function decodeTrackSections(data: ParsedDemoDataV2): ParsedDemoDataV2 {
+  const raw = data as unknown as Record<string, unknown>;
+  if (isTrackSection(raw.positions)) {
+    data.positions = decodePositionTracks(raw.positions);
+  }
+  if (isTrackSection(raw.weaponFires)) {
+    data.weaponFires = decodeWeaponFireTracks(raw.weaponFires);
+  }
+  return data;
+}
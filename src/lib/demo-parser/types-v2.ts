@@ -8,7 +8,7 @@
  * - Événements de flash (player_blind)
  * - Événements bombe complets
  * - Positions continues avec états joueurs
- * - Données dérivées (clutches, trades, entries)
+ * - Données dérivées (clutches, trades, entries, flash assists, dégâts avant la mort)
  */
 
 // =============================================================================
@@ -109,6 +109,9 @@ export interface ParsedDemoDataV2 {
   clutches: ClutchSituation[];
   entryDuels: EntryDuel[];
   trades: TradeEvent[];
+  manAdvantage?: ManAdvantageTimeline[];
+  flashAssists?: FlashAssist[];
+  damageBeforeDeath?: DamageBeforeDeath[];
   parsingStats: ParsingStats;
 }
 
@@ -372,6 +375,16 @@ export interface ClutchSituation {
   startTick: number;
   won: boolean;
   versus?: number; // 1v1, 1v2, etc.
+  survived?: boolean; // Joueur en clutch encore vivant en fin de round
+}
+
+/**
+ * Évolution des joueurs vivants par équipe pendant un round
+ * timeline: [tick, vivants T, vivants CT], du freeze_end à la dernière mort
+ */
+export interface ManAdvantageTimeline {
+  round: number;
+  timeline: Array<[number, number, number]>;
 }
 
 /**
@@ -400,6 +413,38 @@ export interface TradeEvent {
   traderId: string;
 }
 
+/**
+ * Kill dont la victime était aveuglée par une flash adverse
+ */
+export interface FlashAssist {
+  round: number;
+  killTick: number;
+  killerSteamId: string;
+  victimSteamId: string;
+  flasherSteamId: string;
+  blindTick: number;
+  blindDuration: number;
+  timeBlindToKill: number; // secondes
+}
+
+/**
+ * Dégâts reçus par la victime avant sa mort
+ */
+export interface DamageBeforeDeath {
+  round: number;
+  tick: number;
+  victimSteamId: string;
+  killerSteamId: string;
+  totalDamage: number;
+  hits: number;
+  firstDamageTick: number | null;
+  attackers: Array<{
+    steamId: string;
+    damage: number;
+    hits: number;
+  }>;
+}
+
 // =============================================================================
 // STATISTIQUES
 // =============================================================================
@@ -416,6 +461,55 @@ export interface ParsingStats {
   totalWeaponFires: number;
   totalPositionSnapshots: number;
   totalPurchases: number;
+  /** Accès à la démo (header, convars, events, ticks): réponses mémorisées / décodages réels */
+  decoding?: Record<string, { hits: number; misses: number }>;
+  /** Mesures par étape (imports, parseEvents, parseTicks, chaque section, serialization) */
+  timings?: Record<string, StepTiming>;
+}
+
+/**
+ * Mesure d'une étape du parsing
+ */
+export interface StepTiming {
+  wallMs: number;
+  cpuMs: number;
+  /**
+   * Pic de mémoire résidente du processus à la fin de l'étape (niveau haut
+   * global, ne mesure pas la consommation de l'étape)
+   */
+  rssHighWaterKb: number;
+  /** Pic de mémoire allouée pendant l'étape (tracemalloc, avec --profile uniquement) */
+  peakAllocKb?: number;
+}
+
+/**
+ * Capacités du parser (parser_v2.py --capabilities), obtenues sans import lourd
+ * sauf avec --check-imports
+ */
+export interface ParserCapabilities {
+  success: boolean;
+  /**
+   * Dépendances requises (demoparser2, numpy, pandas) installées; avec
+   * --check-imports, également importables
+   */
+  ready: boolean;
+  missing: string[];
+  parserVersion: string;
+  sections: string[];
+  outputFormats: string[];
+  positionSampling: string[];
+  /** Versions installées, null si absente */
+  dependencies: Record<string, string | null>;
+  /**
+   * Durées d'import (ms) par module, avec --check-imports uniquement (null si
+   * l'import a échoué); pour un parsing, voir parsingStats.timings.imports
+   */
+  imports?: Record<string, number | null>;
+  /** Cause de l'échec d'import (--check-imports) */
+  importError?: string;
+  /** Durée de chargement du module parser_v2 jusqu'à la réponse */
+  startupMs: number;
+  pid: number;
 }
 
 // =============================================================================